@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import Cancha
+from .models import CAMPOS_CALIFICACIONES, Cancha
 
 class CanchaAdmin(admin.ModelAdmin):
     list_display = ['responsable', 'nombre', 'disponibilidad', 'fecha_creacion', 'ultima_modificacion', 'slug']
     prepopulated_fields = {'slug': ('nombre',)}
-    readonly_fields = ['fecha_creacion', 'ultima_modificacion']
+    readonly_fields = ['fecha_creacion', 'ultima_modificacion'] + CAMPOS_CALIFICACIONES
 
 admin.site.register(Cancha, CanchaAdmin)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CanchaConfig(AppConfig):
@@ -6,4 +7,6 @@ class CanchaConfig(AppConfig):
     name = 'apps.cancha'
     
     def ready(self):
-        import apps.cancha.signals
\ No newline at end of file
+        import apps.cancha.signals
+        from .busqueda import instalar_indice_busqueda
+        post_migrate.connect(instalar_indice_busqueda, sender=self)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from django.db import connection
+from apps.direccion.models import Direccion
+from apps.comun import cache_versiones
+from .busqueda import normalizar
+from .models import Cancha
+
+ESPACIO_CACHE = 'autocompletar'
+SUGERENCIAS_POR_DEFECTO = 8
+SUGERENCIAS_MAXIMAS = 20
+# Segundos entre comprobaciones de la versión compartida, para no consultar la cache en cada tecla.
+# Sin cache compartida no hay versión que comprobar y el índice se reconstruye con este intervalo.
+# La reconstrucción corre en un hilo aparte: mientras tanto se responde con el índice anterior
+INTERVALO_VERSION = 5
+
+def _claves(texto):
+    # Una clave por cada palabra del texto normalizado, para sugerir también desde la segunda palabra
+    palabras = normalizar(texto).split()
+    return [' '.join(palabras[i:]) for i in range(len(palabras))]
+
+class IndicePrefijos:
+    """
+    Índice en memoria de nombres de canchas, calles y distritos para autocompletar.
+    Es un arreglo ordenado de (clave, tipo, texto, id, slug) donde se busca el primer prefijo
+    con bisect; cada origen ('cancha', id) o ('calle', id) recuerda sus entradas para
+    actualizarlas sin reconstruir todo.
+    """
+    
+    def __init__(self):
+        self._entradas = []
+        self._por_origen = {}
+        self._lock = threading.Lock()
+        self.version = None
+        self._comprobado = 0
+        self._construido = False
+        self._recarga = threading.Lock()
+    
+    def _quitar(self, origen):
+        for entrada in self._por_origen.pop(origen, []):
+            posicion = bisect_left(self._entradas, entrada)
+            if posicion < len(self._entradas) and self._entradas[posicion] == entrada:
+                del self._entradas[posicion]
+    
+    def _agregar(self, origen, tipo, texto, objeto_id=None, slug=None):
+        self._quitar(origen)
+        entradas = [(clave, tipo, texto, objeto_id, slug) for clave in _claves(texto)]
+        for entrada in entradas:
+            insort(self._entradas, entrada)
+        self._por_origen[origen] = entradas
+    
+    def reconstruir(self):
+        """Carga todo el índice desde la base con dos consultas."""
+        # La versión se lee antes de las filas: un cambio confirmado durante la carga la deja atrás
+        # y la próxima comprobación vuelve a reconstruir en lugar de perderlo
+        version = cache_versiones.version(ESPACIO_CACHE, 0)
+        entradas, por_origen = [], {}
+        for _, etiqueta in Direccion.DISTRITOS:
+            por_origen[('distrito', etiqueta)] = [(clave, 'distrito', etiqueta, None, None) for clave in _claves(etiqueta)]
+        for cancha_id, nombre, slug in Cancha.objects.values_list('id', 'nombre', 'slug'):
+            por_origen[('cancha', cancha_id)] = [(clave, 'cancha', nombre, cancha_id, slug) for clave in _claves(nombre)]
+        for direccion_id, nombre_calle in Direccion.objects.values_list('id', 'nombre_calle'):
+            por_origen[('calle', direccion_id)] = [(clave, 'calle', nombre_calle, None, None) for clave in _claves(nombre_calle)]
+        for lista in por_origen.values():
+            entradas.extend(lista)
+        entradas.sort()
+        with self._lock:
+            self._entradas, self._por_origen = entradas, por_origen
+            self.version = version
+            self._comprobado = time.monotonic()
+            self._construido = True
+    
+    def _recargar(self):
+        try:
+            self.reconstruir()
+        finally:
+            self._recarga.release()
+            # El hilo abrió su propia conexión
+            connection.close()
+    
+    def actualizar(self, origen, tipo=None, texto=None, objeto_id=None, slug=None):
+        """Reemplaza las entradas de un origen; sin texto solo las quita."""
+        with self._lock:
+            if self.version is None:
+                # Aún no se construyó: se cargará completo en la primera búsqueda
+                return
+            if texto:
+                self._agregar(origen, tipo, texto, objeto_id, slug)
+            else:
+                self._quitar(origen)
+            # Los demás procesos ven la versión nueva y se reconstruyen en su próxima comprobación;
+            # si otro proceso también cambió el índice, este se reconstruye en la próxima búsqueda
+            anterior = self.version
+            nueva = cache_versiones.incrementar_version(ESPACIO_CACHE, 0)
+            self.version = nueva if nueva == anterior + 1 else None
+    
+    def buscar(self, prefijo, limite=SUGERENCIAS_POR_DEFECTO):
+        """Retorna hasta limite sugerencias {'texto', 'tipo', 'id', 'slug'} cuyo texto empieza con prefijo."""
+        prefijo = normalizar(prefijo)
+        if not prefijo:
+            return []
+        ahora = time.monotonic()
+        if not self._construido:
+            self.reconstruir()
+        elif (self.version is None or ahora - self._comprobado > INTERVALO_VERSION) and not self._recarga.locked():
+            self._comprobado = ahora
+            if not cache_versiones.cache_compartida() or self.version != cache_versiones.version(ESPACIO_CACHE, 0):
+                # Un solo hilo recarga por proceso y la búsqueda no lo espera
+                if self._recarga.acquire(blocking=False):
+                    threading.Thread(target=self._recargar, daemon=True).start()
+        sugerencias, vistas = [], set()
+        with self._lock:
+            posicion = bisect_left(self._entradas, (prefijo,))
+            while posicion < len(self._entradas) and len(sugerencias) < limite:
+                clave, tipo, texto, objeto_id, slug = self._entradas[posicion]
+                if not clave.startswith(prefijo):
+                    break
+                # Varias calles o palabras del mismo texto generan una sola sugerencia
+                if (tipo, texto, objeto_id) not in vistas:
+                    vistas.add((tipo, texto, objeto_id))
+                    sugerencias.append({'texto': texto, 'tipo': tipo, 'id': objeto_id, 'slug': slug})
+                posicion += 1
+        return sugerencias
+
+indice = IndicePrefijos()
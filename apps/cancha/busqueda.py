@@ -0,0 +1,168 @@
+import logging
+import re
+import unicodedata
+from django.db import connections, router
+from django.db.models import Q
+from apps.direccion.models import Direccion
+from .models import Cancha
+
+logger = logging.getLogger(__name__)
+
+TABLA_BUSQUEDA = 'cancha_busqueda'
+
+# Alias de base -> si existe el índice, comprobado una vez por proceso (también cuando no existe)
+_indice_por_base = {}
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y solo letras y números separados por un espacio ('Jesús María' -> 'jesus maria')."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+    return ' '.join(re.findall(r'[a-z0-9]+', texto.lower()))
+
+def _conexion():
+    return connections[router.db_for_write(Cancha)]
+
+def _motor(connection):
+    # 'fts5', 'tsvector' o None si la base no tiene índice de texto completo
+    if connection.vendor == 'postgresql':
+        return 'tsvector'
+    if connection.vendor == 'sqlite':
+        return 'fts5'
+    return None
+
+def instalar_indice_busqueda(using='default', **kwargs):
+    """
+    Crea la tabla del índice de búsqueda: FTS5 en SQLite y tsvector con índice GIN en PostgreSQL.
+    Se ejecuta después de migrate; es idempotente. Otros motores usan la búsqueda por LIKE.
+    """
+    connection = connections[using]
+    # La próxima búsqueda vuelve a comprobar si el índice existe
+    _indice_por_base.pop(connection.alias, None)
+    motor = _motor(connection)
+    if motor == 'fts5':
+        sentencias = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_BUSQUEDA} USING fts5("
+            "cancha_id UNINDEXED, nombre, direccion, tokenize = 'unicode61 remove_diacritics 2')"
+        ]
+    elif motor == 'tsvector':
+        sentencias = [
+            f'CREATE TABLE IF NOT EXISTS {TABLA_BUSQUEDA} (cancha_id bigint PRIMARY KEY, documento tsvector NOT NULL)',
+            f'CREATE INDEX IF NOT EXISTS {TABLA_BUSQUEDA}_documento ON {TABLA_BUSQUEDA} USING gin (documento)',
+        ]
+    else:
+        logger.warning("Índice de búsqueda no disponible para %s.", connection.vendor)
+        return
+    try:
+        with connection.cursor() as cursor:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+    except Exception:
+        # SQLite compilado sin FTS5
+        logger.warning("No se pudo crear el índice de búsqueda de canchas.", exc_info=True)
+
+def _indice_disponible(connection):
+    # La introspección es una consulta: se hace una vez por base y se recuerda también el resultado
+    # negativo (por ejemplo SQLite sin FTS5); instalar_indice_busqueda la vuelve a habilitar
+    if connection.alias not in _indice_por_base:
+        _indice_por_base[connection.alias] = (
+            _motor(connection) is not None and TABLA_BUSQUEDA in connection.introspection.table_names()
+        )
+    return _indice_por_base[connection.alias]
+
+def _documentos(cancha_ids=None):
+    """Retorna {cancha_id: (nombre, direccion)} normalizados, con dos consultas."""
+    canchas = Cancha.objects.all()
+    direcciones = Direccion.objects.all()
+    if cancha_ids is not None:
+        canchas = canchas.filter(id__in=cancha_ids)
+        direcciones = direcciones.filter(cancha_id__in=cancha_ids)
+    distritos = dict(Direccion.DISTRITOS)
+    textos = {}
+    for cancha_id, nombre_calle, distrito, referencia in direcciones.values_list('cancha_id', 'nombre_calle', 'distrito', 'referencia'):
+        textos.setdefault(cancha_id, []).extend([nombre_calle, distritos.get(distrito, distrito), referencia])
+    return {
+        cancha_id: (normalizar(nombre), normalizar(' '.join(filter(None, textos.get(cancha_id, [])))))
+        for cancha_id, nombre in canchas.values_list('id', 'nombre')
+    }
+
+def _escribir(cursor, motor, documentos):
+    if motor == 'fts5':
+        cursor.executemany(
+            f'INSERT INTO {TABLA_BUSQUEDA} (cancha_id, nombre, direccion) VALUES (%s, %s, %s)',
+            [(cancha_id, nombre, direccion) for cancha_id, (nombre, direccion) in documentos.items()]
+        )
+    else:
+        # El nombre pesa más que la dirección en el ranking
+        cursor.executemany(
+            f"INSERT INTO {TABLA_BUSQUEDA} (cancha_id, documento) VALUES "
+            "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))",
+            [(cancha_id, nombre, direccion) for cancha_id, (nombre, direccion) in documentos.items()]
+        )
+
+def indexar_canchas(cancha_ids):
+    """Actualiza el índice de las canchas indicadas; las que ya no existen se quitan del índice."""
+    connection = _conexion()
+    if not cancha_ids or not _indice_disponible(connection):
+        return
+    cancha_ids = list(cancha_ids)
+    documentos = _documentos(cancha_ids)
+    marcadores = ', '.join(['%s'] * len(cancha_ids))
+    with connection.cursor() as cursor:
+        # FTS5 no admite UPSERT: se reemplazan las filas
+        cursor.execute(f'DELETE FROM {TABLA_BUSQUEDA} WHERE cancha_id IN ({marcadores})', cancha_ids)
+        _escribir(cursor, _motor(connection), documentos)
+
+def reconstruir_indice():
+    """Vuelve a generar el índice completo. Retorna la cantidad de canchas indexadas o None si no hay índice."""
+    connection = _conexion()
+    instalar_indice_busqueda(using=connection.alias)
+    if not _indice_disponible(connection):
+        return None
+    documentos = _documentos()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_BUSQUEDA}')
+        _escribir(cursor, _motor(connection), documentos)
+    return len(documentos)
+
+def buscar_canchas(texto, limite=None):
+    """
+    Ids de las canchas que contienen todas las palabras de texto (como prefijo, sin tildes)
+    en su nombre o dirección, ordenados por relevancia.
+    """
+    palabras = normalizar(texto).split()
+    if not palabras:
+        return []
+    connection = _conexion()
+    if not _indice_disponible(connection):
+        return _buscar_sin_indice(palabras, limite)
+    
+    if _motor(connection) == 'fts5':
+        # bm25 es menor cuanto más relevante; el nombre pesa el doble que la dirección
+        sql = (
+            f'SELECT cancha_id FROM {TABLA_BUSQUEDA} WHERE {TABLA_BUSQUEDA} MATCH %s '
+            f'ORDER BY bm25({TABLA_BUSQUEDA}, 0, 2.0, 1.0), cancha_id'
+        )
+        parametros = [' '.join(f'"{palabra}"*' for palabra in palabras)]
+    else:
+        sql = (
+            f"SELECT cancha_id FROM {TABLA_BUSQUEDA} WHERE documento @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank(documento, to_tsquery('simple', %s)) DESC, cancha_id"
+        )
+        parametros = [' & '.join(f'{palabra}:*' for palabra in palabras)] * 2
+    if limite:
+        sql += ' LIMIT %s'
+        parametros.append(limite)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return [fila[0] for fila in cursor.fetchall()]
+
+def _buscar_sin_indice(palabras, limite=None):
+    # Motores sin índice: LIKE sobre las columnas, sin plegado de tildes
+    canchas = Cancha.objects.all()
+    for palabra in palabras:
+        canchas = canchas.filter(
+            Q(nombre__icontains=palabra) | Q(direcciones__nombre_calle__icontains=palabra)
+            | Q(direcciones__distrito__icontains=palabra) | Q(direcciones__referencia__icontains=palabra)
+        )
+    ids = canchas.order_by('nombre', 'id').values_list('id', flat=True).distinct()
+    return list(ids[:limite] if limite else ids)
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from apps.cancha.models import Cancha
+from apps.horario.models import Horario
+from .listado import invalidar_tarjetas
+
+def horarios_libres(cancha_id):
+    # Horarios de la cancha que aún no tienen ninguna reserva
+    return Horario.objects.filter(cancha_id=cancha_id, reservas__isnull=True)
+
+def actualizar_disponibilidad(cancha_id):
+    """
+    Recalcula la disponibilidad de una cancha.
+    Solo escribe en la base de datos si el valor realmente cambia.
+    Retorna True si se actualizó la cancha.
+    """
+    if cancha_id is None:
+        return False
+    disponible = horarios_libres(cancha_id).exists()
+    # El UPDATE condicionado evita pasar por Cancha.save() y no escribe si no hay cambio
+    actualizada = Cancha.objects.filter(pk=cancha_id).exclude(disponibilidad=disponible).update(disponibilidad=disponible) > 0
+    if actualizada:
+        transaction.on_commit(lambda: invalidar_tarjetas([cancha_id]))
+    return actualizada
+
+def recalcular_disponibilidad_canchas(cancha_ids=None):
+    """
+    Reconstruye la disponibilidad de todas las canchas (o solo de cancha_ids) con dos consultas de
+    las canchas que cambian y un UPDATE por estado. Retorna la cantidad de canchas que cambiaron.
+    """
+    canchas = Cancha.objects.all()
+    if cancha_ids is not None:
+        canchas = canchas.filter(pk__in=cancha_ids)
+    libres = Horario.objects.filter(cancha=OuterRef('pk'), reservas__isnull=True)
+    # Los ids se leen antes del UPDATE para invalidar solo las tarjetas que cambian
+    activadas = list(canchas.filter(Exists(libres), disponibilidad=False).values_list('pk', flat=True))
+    desactivadas = list(canchas.filter(~Exists(libres), disponibilidad=True).values_list('pk', flat=True))
+    if activadas:
+        Cancha.objects.filter(pk__in=activadas).update(disponibilidad=True)
+    if desactivadas:
+        Cancha.objects.filter(pk__in=desactivadas).update(disponibilidad=False)
+    if activadas or desactivadas:
+        transaction.on_commit(lambda: invalidar_tarjetas(activadas + desactivadas))
+    return len(activadas) + len(desactivadas)
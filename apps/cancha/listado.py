@@ -0,0 +1,149 @@
+import base64
+import json
+from datetime import date
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast
+from django.template.loader import render_to_string
+from apps.direccion.models import Direccion
+from apps.comun import cache_versiones
+from .models import CAMPOS_CALIFICACIONES, Cancha
+
+ESPACIO_CACHE = 'tarjeta'
+
+# Columnas que usan las tarjetas de inicio y mis canchas
+CAMPOS_TARJETA = [
+    'id', 'nombre', 'slug', 'imagen', 'disponibilidad', 'fecha_creacion',
+    'responsable__id', 'responsable__nombre', 'responsable__apellidos', 'responsable__slug',
+] + CAMPOS_CALIFICACIONES
+
+CAMPOS_DIRECCION = ['tipo_calle', 'nombre_calle', 'numero_calle', 'distrito']
+
+def consulta_listado(canchas=None):
+    """
+    Queryset con todo lo que muestra una tarjeta de cancha en una sola consulta: responsable por
+    select_related, calificaciones desnormalizadas y la dirección principal (la primera registrada)
+    anotada con subconsultas.
+    """
+    canchas = Cancha.objects.all() if canchas is None else canchas
+    principal = Direccion.objects.filter(cancha=OuterRef('pk')).order_by('id')
+    return canchas.select_related('responsable').only(*CAMPOS_TARJETA).annotate(**{
+        f'direccion_{campo}': Subquery(principal.values(campo)[:1]) for campo in CAMPOS_DIRECCION
+    })
+
+def tarjetas(canchas):
+    """
+    Evalúa un queryset de consulta_listado y agrega a cada cancha el atributo 'direccion'
+    (una Direccion sin guardar, para usar sus get_*_display en la plantilla sin consultas).
+    """
+    canchas = list(canchas)
+    for cancha in canchas:
+        valores = {campo: getattr(cancha, f'direccion_{campo}') for campo in CAMPOS_DIRECCION}
+        cancha.direccion = Direccion(cancha_id=cancha.id, **valores) if valores['nombre_calle'] is not None else None
+    return canchas
+
+def invalidar_tarjetas(cancha_ids):
+    """
+    Invalida las tarjetas renderizadas de las canchas. Llamar con transaction.on_commit tras escribir
+    algo que muestran, para que nadie cachee la tarjeta previa bajo la versión nueva.
+    """
+    for cancha_id in set(cancha_ids) - {None}:
+        cache_versiones.incrementar_version(ESPACIO_CACHE, cancha_id)
+
+def tarjetas_html(canchas):
+    """
+    HTML de las tarjetas de inicio de las canchas (resultado de tarjetas()), en el mismo orden.
+    Cada tarjeta se cachea por cancha y versión; solo se renderizan las que no estaban en cache.
+    """
+    por_id = {cancha.id: cancha for cancha in canchas}
+    html = cache_versiones.obtener_o_calcular_varios(
+        ESPACIO_CACHE,
+        list(por_id),
+        'inicio',
+        lambda cancha_id: render_to_string('usuario/inicio/bloque_cancha.html', {'cancha': por_id[cancha_id]}),
+    )
+    return [html[cancha.id] for cancha in canchas]
+
+TARJETAS_POR_PAGINA = 12
+TARJETAS_MAXIMAS_POR_PAGINA = 48
+# Tope de ids que se piden al buscador por consulta
+RESULTADOS_BUSQUEDA_MAXIMOS = 500
+
+# Orden del catálogo: (anotación o campo, descendente); el id siempre desempata
+ORDENES_CATALOGO = {
+    'calificacion': [('promedio', True), ('id', True)],
+    'recientes': [('fecha_creacion', True), ('id', True)],
+    'nombre': [('nombre', False), ('id', False)],
+    # Solo con búsqueda: posición en el ranking del índice de texto
+    'relevancia': [('relevancia', False), ('id', False)],
+}
+
+def codificar_cursor(orden, valores):
+    return base64.urlsafe_b64encode(json.dumps([orden, valores]).encode()).decode()
+
+def decodificar_cursor(cursor, orden):
+    """Retorna los valores del cursor o lanza ValueError si no es válido para el orden."""
+    try:
+        orden_cursor, valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Cursor inválido.') from e
+    if orden_cursor != orden or not isinstance(valores, list) or len(valores) != len(ORDENES_CATALOGO[orden]):
+        raise ValueError('Cursor inválido.')
+    return [_validar_valor(campo, valor) for (campo, _), valor in zip(ORDENES_CATALOGO[orden], valores)]
+
+def _validar_valor(campo, valor):
+    # Cada valor del cursor debe tener el tipo de su columna antes de llegar a la consulta
+    if campo == 'fecha_creacion':
+        try:
+            return date.fromisoformat(valor)
+        except (TypeError, ValueError) as e:
+            raise ValueError('Cursor inválido.') from e
+    if campo == 'nombre':
+        if not isinstance(valor, str):
+            raise ValueError('Cursor inválido.')
+        return valor
+    tipos = (int, float) if campo == 'promedio' else int
+    if isinstance(valor, bool) or not isinstance(valor, tipos):
+        raise ValueError('Cursor inválido.')
+    return valor
+
+def _despues_de(campos, valores):
+    # Condición lexicográfica "después de la fila del cursor" para (c1, c2, ...)
+    condicion = Q()
+    for i, (campo, descendente) in enumerate(campos):
+        iguales = Q(**{previo: valor for (previo, _), valor in zip(campos[:i], valores[:i])})
+        condicion |= iguales & Q(**{f"{campo}__{'lt' if descendente else 'gt'}": valores[i]})
+    return condicion
+
+def pagina_catalogo(canchas, orden='calificacion', cursor=None, tamaño=TARJETAS_POR_PAGINA, relevancia=None):
+    """
+    Una página de tarjetas del catálogo ordenada por ORDENES_CATALOGO[orden] y paginada por cursor
+    (sin OFFSET): la memoria y el tiempo por página no dependen del tamaño del catálogo.
+    relevancia es la lista de ids ordenada por el buscador y es obligatoria para ese orden.
+    Retorna (tarjetas, cursor de la página siguiente o None).
+    """
+    tamaño = max(1, min(tamaño, TARJETAS_MAXIMAS_POR_PAGINA))
+    campos = ORDENES_CATALOGO[orden]
+    canchas = consulta_listado(canchas).annotate(
+        promedio=Case(
+            When(cantidad_calificaciones__gt=0, then=Cast('suma_calificaciones', FloatField()) / F('cantidad_calificaciones')),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+    if orden == 'relevancia':
+        canchas = canchas.annotate(relevancia=Case(
+            *[When(id=cancha_id, then=Value(posicion)) for posicion, cancha_id in enumerate(relevancia or [])],
+            default=Value(len(relevancia or [])),
+            output_field=IntegerField(),
+        ))
+    if cursor:
+        canchas = canchas.filter(_despues_de(campos, decodificar_cursor(cursor, orden)))
+    canchas = canchas.order_by(*[f"-{campo}" if descendente else campo for campo, descendente in campos])
+    # Una tarjeta extra indica si hay otra página
+    pagina = tarjetas(canchas[:tamaño + 1])
+    siguiente = None
+    if len(pagina) > tamaño:
+        ultima = pagina[tamaño - 1]
+        valores = [getattr(ultima, campo) for campo, _ in campos]
+        siguiente = codificar_cursor(orden, [valor.isoformat() if hasattr(valor, 'isoformat') else valor for valor in valores])
+    return pagina[:tamaño], siguiente
\ No newline at end of file
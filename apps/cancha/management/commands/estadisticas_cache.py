@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.comun import cache_versiones
+
+class Command(BaseCommand):
+    help = 'Muestra los aciertos y fallos de los espacios de cache versionados'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('espacios', nargs='*', default=['grilla', 'tarjeta'], help='Espacios de cache a consultar')
+        parser.add_argument('--reiniciar', action='store_true', help='Reinicia los contadores después de mostrarlos')
+    
+    def handle(self, *args, **options):
+        for espacio in options['espacios']:
+            datos = cache_versiones.estadisticas(espacio)
+            self.stdout.write(f"{espacio}: hits={datos['hits']} misses={datos['misses']} hit_rate={datos['hit_rate']}")
+            if options['reiniciar']:
+                cache_versiones.reiniciar_estadisticas(espacio)
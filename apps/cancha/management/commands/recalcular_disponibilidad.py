@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from apps.cancha.disponibilidad import recalcular_disponibilidad_canchas
+
+class Command(BaseCommand):
+    help = 'Reconstruye la disponibilidad de todas las canchas a partir de sus horarios y reservas'
+    
+    def handle(self, *args, **kwargs):
+        actualizadas = recalcular_disponibilidad_canchas()
+        self.stdout.write(self.style.SUCCESS(f'Disponibilidad recalculada. Canchas actualizadas: {actualizadas}.'))
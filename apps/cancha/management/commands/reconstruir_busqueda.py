@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.cancha.busqueda import reconstruir_indice
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de canchas a partir de sus nombres y direcciones'
+    
+    def handle(self, *args, **kwargs):
+        indexadas = reconstruir_indice()
+        if indexadas is None:
+            self.stdout.write(self.style.WARNING('La base de datos no tiene índice de búsqueda; se usará la búsqueda por LIKE.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido. Canchas indexadas: {indexadas}.'))
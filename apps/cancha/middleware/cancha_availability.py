@@ -1,12 +1,11 @@
-from apps.cancha.models import Cancha
-from apps.horario.models import Horario
-from django.db.models import Q
+from apps.cancha.disponibilidad import recalcular_disponibilidad_canchas
 
 class CanchaAvailabilityMiddleware:
     """
-    Middleware que valida la disponibilidad de cada cancha en cada solicitud.
-    Si una cancha tiene horarios no reservados, se marca como disponible.
-    Si todos los horarios están reservados o no existen, se marca como no disponible.
+    Middleware opcional que reconstruye la disponibilidad de las canchas en cada solicitud.
+    La disponibilidad ahora se mantiene con señales de Horario y Reserva
+    (ver apps.cancha.signals), por lo que este middleware ya no está en MIDDLEWARE.
+    Para una reconstrucción completa usar: python manage.py recalcular_disponibilidad
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -18,17 +17,4 @@ class CanchaAvailabilityMiddleware:
         return response
     
     def actualizar_disponibilidad_canchas(self):
-        # Obtenemos todas las canchas
-        canchas = Cancha.objects.all()
-        
-        # Actualizamos la disponibilidad para cada cancha
-        for cancha in canchas:
-            # Obtener horarios de la cancha
-            horarios_disponibles = Horario.objects.filter(
-                cancha=cancha
-            ).exclude(
-                Q(reservas__isnull=False)
-            )
-            # Actualizar el campo de disponibilidad
-            cancha.disponibilidad = horarios_disponibles.exists()
-            cancha.save()
\ No newline at end of file
+        recalcular_disponibilidad_canchas()
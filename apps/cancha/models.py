@@ -1,9 +1,16 @@
 from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
-from django.contrib.auth.models import Group
+from apps.comun.cambios import CamposModificadosMixin
+from apps.usuario.grupos import GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo
 
-class Cancha(models.Model):
+# Campos mantenidos por las señales de Reseña; nunca se escriben desde Cancha.save()
+CAMPOS_CALIFICACIONES = [
+    'cantidad_calificaciones', 'suma_calificaciones',
+    'estrellas_1', 'estrellas_2', 'estrellas_3', 'estrellas_4', 'estrellas_5',
+]
+
+class Cancha(CamposModificadosMixin, models.Model):
     responsable = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='canchas')
     nombre = models.CharField('Nombre de la cancha', max_length=100, blank=False, null=False)
     disponibilidad = models.BooleanField('Disponible', default=False, blank=False, null=False)
@@ -11,6 +18,20 @@ class Cancha(models.Model):
     fecha_creacion = models.DateField(auto_now_add=True)
     ultima_modificacion = models.DateField(auto_now=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
+    # Agregados de las reseñas, mantenidos por las señales de Reseña
+    cantidad_calificaciones = models.PositiveIntegerField('Cantidad de calificaciones', default=0)
+    suma_calificaciones = models.PositiveIntegerField('Suma de calificaciones', default=0)
+    # Histograma: cantidad de reseñas con cada calificación
+    estrellas_1 = models.PositiveIntegerField('Reseñas de 1 estrella', default=0)
+    estrellas_2 = models.PositiveIntegerField('Reseñas de 2 estrellas', default=0)
+    estrellas_3 = models.PositiveIntegerField('Reseñas de 3 estrellas', default=0)
+    estrellas_4 = models.PositiveIntegerField('Reseñas de 4 estrellas', default=0)
+    estrellas_5 = models.PositiveIntegerField('Reseñas de 5 estrellas', default=0)
+    # Se incrementa con F() en cada cambio de horarios o reservas; es el ETag de la grilla de la API
+    version_horarios = models.PositiveBigIntegerField('Versión de los horarios', default=0, editable=False)
+    
+    # Se escriben con expresiones F; guardarlos desde save() podría pisar un incremento concurrente
+    campos_excluidos = CAMPOS_CALIFICACIONES + ['version_horarios']
     
     class Meta:
         verbose_name = 'Cancha'
@@ -20,16 +41,16 @@ class Cancha(models.Model):
         return self.nombre
     
     def save(self, *args, **kwargs):
-        # Verificar si el usuario pertenece al grupo 'Responsable'
-        if not self.responsable.groups.filter(name='Responsable').exists():
-            cliente_group = Group.objects.get(name='Cliente')
-            responsable_group = Group.objects.get(name='Responsable')
+        # Verificar si el usuario pertenece al grupo 'Responsable' solo si el responsable es nuevo
+        if (self._state.adding or self.has_changed('responsable')) and not self.responsable.is_responsible:
+            cliente_group = grupo(GRUPO_CLIENTE)
+            responsable_group = grupo(GRUPO_RESPONSABLE)
             
             # Remover del grupo Cliente y agregar a Responsable
             self.responsable.groups.remove(cliente_group)
             self.responsable.groups.add(responsable_group)
         
-        if not self.pk or Cancha.objects.get(pk=self.pk).nombre != self.nombre:
+        if self._state.adding or self.has_changed('nombre'):
             self.slug = slugify(self.nombre)
         
         if not self.imagen or self.imagen.name == '':
@@ -42,14 +63,33 @@ class Cancha(models.Model):
         
         # Verificar si el usuario tiene otras canchas
         if self.responsable.canchas.count() == 0:
-            cliente_group = Group.objects.get(name='Cliente')
-            responsable_group = Group.objects.get(name='Responsable')
+            cliente_group = grupo(GRUPO_CLIENTE)
+            responsable_group = grupo(GRUPO_RESPONSABLE)
             
             # Si el usuario no tiene más canchas, cambiarlo de grupo a "Cliente"
             if responsable_group in self.responsable.groups.all():
                 self.responsable.groups.remove(responsable_group)
                 self.responsable.groups.add(cliente_group)
     
+    @property
+    def calificacion(self):
+        # Promedio de las reseñas sin consultar la tabla de reseñas; None si no tiene
+        if not self.cantidad_calificaciones:
+            return None
+        return round(self.suma_calificaciones / self.cantidad_calificaciones, 1)
+    
+    @property
+    def histograma_calificaciones(self):
+        """Distribución de 5 a 1 estrellas: [{'estrellas', 'cantidad', 'porcentaje'}, ...]."""
+        total = self.cantidad_calificaciones
+        return [
+            {
+                'estrellas': estrellas,
+                'cantidad': getattr(self, f'estrellas_{estrellas}'),
+                'porcentaje': round(100 * getattr(self, f'estrellas_{estrellas}') / total) if total else 0,
+            }
+            for estrellas in range(5, 0, -1)
+        ]
+    
     def promedio_calificaciones(self):
-        promedio = self.reseñas.aggregate(models.Avg('calificacion'))['calificacion__avg']
-        return round(promedio, 1) if promedio else "Sin calificaciones"
\ No newline at end of file
+        return self.calificacion or "Sin calificaciones"
\ No newline at end of file
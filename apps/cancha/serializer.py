@@ -2,7 +2,12 @@ from rest_framework import serializers
 from .models import Cancha
 
 class CanchaSerializer(serializers.ModelSerializer):
+    # Agregados precalculados de las reseñas; no consultan la tabla de reseñas
+    calificacion = serializers.FloatField(read_only=True)
+    histograma_calificaciones = serializers.ListField(child=serializers.DictField(), read_only=True)
+    
     class Meta:
         model = Cancha
-        fields = ['id', 'nombre', 'fecha_creacion', 'ultima_modificacion', 'responsable', 'imagen', 'slug']
-        read_only_fields = ['disponibilidad', 'fecha_creacion', 'ultima_modificacion', 'slug']
\ No newline at end of file
+        fields = ['id', 'nombre', 'fecha_creacion', 'ultima_modificacion', 'responsable', 'imagen', 'slug',
+                  'calificacion', 'cantidad_calificaciones', 'histograma_calificaciones']
+        read_only_fields = ['disponibilidad', 'fecha_creacion', 'ultima_modificacion', 'slug', 'cantidad_calificaciones']
\ No newline at end of file
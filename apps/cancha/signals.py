@@ -1,16 +1,120 @@
-from django.db.models.signals import post_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.contrib.auth.models import Group
+from apps.usuario.grupos import GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva
 from .models import Cancha
+from apps.horario.grilla import horarios_modificados
+from .disponibilidad import actualizar_disponibilidad
+from .listado import invalidar_tarjetas
+from .busqueda import indexar_canchas
+from .autocompletar import indice as indice_autocompletar
+from apps.direccion.models import Direccion
+from apps.usuario.models import Usuario
 
 @receiver(post_delete, sender=Cancha)
 def cambiar_a_cliente(sender, instance, **kwargs):
     # Verificar si el usuario responsable ya no tiene canchas
     if instance.responsable.canchas.count() == 0:
-        responsable_group = Group.objects.get(name='Responsable')
-        cliente_group = Group.objects.get(name='Cliente')
+        responsable_group = grupo(GRUPO_RESPONSABLE)
+        cliente_group = grupo(GRUPO_CLIENTE)
         
         # Cambiar al grupo Cliente si ya no tiene canchas
-        if responsable_group in instance.responsable.groups.all():
+        if instance.responsable.is_responsible:
             instance.responsable.groups.remove(responsable_group)
-            instance.responsable.groups.add(cliente_group)
\ No newline at end of file
+            instance.responsable.groups.add(cliente_group)
+
+def _cancha_modificada(cancha_id):
+    # Un horario o reserva de la cancha cambió: disponibilidad y grilla cacheada
+    actualizar_disponibilidad(cancha_id)
+    horarios_modificados(cancha_id)
+
+@receiver(pre_save, sender=Horario)
+def guardar_cancha_anterior_horario(sender, instance, **kwargs):
+    # Recordar la cancha previa por si el horario se mueve a otra cancha
+    instance._cancha_anterior_id = None
+    if instance.pk:
+        instance._cancha_anterior_id = Horario.objects.filter(pk=instance.pk).values_list('cancha_id', flat=True).first()
+
+@receiver(post_save, sender=Horario)
+def horario_guardado(sender, instance, **kwargs):
+    _cancha_modificada(instance.cancha_id)
+    cancha_anterior_id = getattr(instance, '_cancha_anterior_id', None)
+    if cancha_anterior_id and cancha_anterior_id != instance.cancha_id:
+        _cancha_modificada(cancha_anterior_id)
+
+@receiver(post_delete, sender=Horario)
+def horario_eliminado(sender, instance, **kwargs):
+    _cancha_modificada(instance.cancha_id)
+
+def _cancha_de_horario(horario_id):
+    return Horario.objects.filter(pk=horario_id).values_list('cancha_id', flat=True).first()
+
+@receiver(pre_save, sender=Reserva)
+def guardar_cancha_anterior_reserva(sender, instance, **kwargs):
+    # Recordar la cancha previa por si la reserva cambia de horario
+    instance._cancha_anterior_id = None
+    if instance.pk:
+        instance._cancha_anterior_id = Reserva.objects.filter(pk=instance.pk).values_list('horario__cancha_id', flat=True).first()
+
+@receiver(post_save, sender=Reserva)
+def reserva_guardada(sender, instance, **kwargs):
+    cancha_id = _cancha_de_horario(instance.horario_id)
+    _cancha_modificada(cancha_id)
+    cancha_anterior_id = getattr(instance, '_cancha_anterior_id', None)
+    if cancha_anterior_id and cancha_anterior_id != cancha_id:
+        _cancha_modificada(cancha_anterior_id)
+
+@receiver(post_delete, sender=Reserva)
+def reserva_eliminada(sender, instance, **kwargs):
+    _cancha_modificada(_cancha_de_horario(instance.horario_id))
+
+@receiver(post_save, sender=Cancha)
+@receiver(post_delete, sender=Cancha)
+def cancha_indexada(sender, instance, update_fields=None, **kwargs):
+    # Nombre nuevo o cancha eliminada: actualizar el índice de búsqueda. save() pasa en update_fields
+    # solo los campos modificados, así que sin 'nombre' no hay nada que reindexar
+    if update_fields is not None and 'nombre' not in update_fields:
+        return
+    indexar_canchas([instance.pk])
+    # El índice de autocompletar vive en memoria: solo se toca si la transacción se confirma
+    texto = instance.nombre if kwargs['signal'] is post_save else None
+    origen, cancha_id, slug = ('cancha', instance.pk), instance.pk, instance.slug
+    transaction.on_commit(lambda: indice_autocompletar.actualizar(origen, 'cancha', texto, cancha_id, slug))
+
+@receiver(pre_save, sender=Direccion)
+def guardar_cancha_anterior_direccion(sender, instance, **kwargs):
+    instance._cancha_anterior_id = None
+    if instance.pk:
+        instance._cancha_anterior_id = Direccion.objects.filter(pk=instance.pk).values_list('cancha_id', flat=True).first()
+
+@receiver(post_save, sender=Direccion)
+@receiver(post_delete, sender=Direccion)
+def direccion_indexada(sender, instance, **kwargs):
+    indexar_canchas({instance.cancha_id, getattr(instance, '_cancha_anterior_id', None)} - {None})
+    texto = instance.nombre_calle if kwargs['signal'] is post_save else None
+    origen = ('calle', instance.pk)
+    transaction.on_commit(lambda: indice_autocompletar.actualizar(origen, 'calle', texto))
+
+@receiver(post_save, sender=Cancha)
+@receiver(post_delete, sender=Cancha)
+def tarjeta_cancha_invalidada(sender, instance, **kwargs):
+    cancha_id = instance.pk
+    transaction.on_commit(lambda: invalidar_tarjetas([cancha_id]))
+
+@receiver(post_save, sender=Direccion)
+@receiver(post_delete, sender=Direccion)
+def tarjeta_direccion_invalidada(sender, instance, **kwargs):
+    cancha_ids = [instance.cancha_id, getattr(instance, '_cancha_anterior_id', None)]
+    transaction.on_commit(lambda: invalidar_tarjetas(cancha_ids))
+
+@receiver(post_save, sender=Usuario)
+def tarjetas_responsable_invalidadas(sender, instance, update_fields=None, **kwargs):
+    # Las tarjetas solo muestran el nombre del responsable; save() pasa en update_fields los campos
+    # modificados, así que contraseña, imagen o último acceso no las invalidan
+    if update_fields is not None and not {'nombre', 'apellidos'} & set(update_fields):
+        return
+    cancha_ids = list(Cancha.objects.filter(responsable=instance).values_list('pk', flat=True))
+    if cancha_ids:
+        transaction.on_commit(lambda: invalidar_tarjetas(cancha_ids))
@@ -10,12 +10,16 @@ urlpatterns = [
     path('api/', include(router.urls)),
     # Rutas generales
     path('registro-cancha/', views.registro_cancha, name='registro_cancha'),
+    path('horarios-libres/', views.horarios_libres, name='horarios_libres'),
+    path('autocompletar/', views.autocompletar, name='autocompletar'),
     path('detalle/<int:cancha_id>/<slug:cancha_slug>/', views.detalle_cancha, name='detalle_cancha'),
     path('editar/<int:cancha_id>/<slug:cancha_slug>/', views.editar_cancha, name='editar_cancha'),
     path('eliminar/<int:cancha_id>/<slug:cancha_slug>/', views.eliminar_cancha, name='eliminar_cancha'),
     path('agregar-horario/<int:cancha_id>/<slug:cancha_slug>/', views.agregar_horario, name='agregar_horario'),
+    path('publicar-horarios/<int:cancha_id>/<slug:cancha_slug>/', views.publicar_horarios, name='publicar_horarios'),
     path('editar-horarios_dia/<int:cancha_id>/<slug:cancha_slug>/', views.editar_horarios_dia, name='editar_horarios_dia'),
     path('eliminar-horarios/<int:cancha_id>/<slug:cancha_slug>/', views.eliminar_horarios_dia, name='eliminar_horarios_dia'),
     path('<int:cancha_id>/<slug:cancha_slug>/horario/<int:horario_id>/<str:hora_inicio>/<str:hora_fin>/', views.detalle_horario, name='detalle_horario'),
     path('<int:cancha_id>/<slug:cancha_slug>/horario/<int:horario_id>/<str:hora_inicio>/<str:hora_fin>/reservar/', views.reservar_horario, name='reservar_horario'),
+    path('reservar-horarios/<int:cancha_id>/<slug:cancha_slug>/', views.reservar_horarios, name='reservar_horarios'),
 ]
\ No newline at end of file
@@ -2,17 +2,27 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from rest_framework import viewsets
+from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from .serializer import CanchaSerializer
 from apps.usuario.factory import CanchaConcreteFactory
-from apps.horario.models import Horario
-from apps.reserva.models import Reserva
+from apps.horario.models import DIAS_SEMANA, Horario, PlantillaHorario, DiaPlantillaHorario
+from apps.horario.grilla import obtener_dias_horarios_cache, grilla_compacta_versionada, horarios_modificados
+from apps.horario.busqueda import validar_parametros_busqueda, buscar_horarios_libres
+from apps.horario.publicacion import horario_semanal, validar_rango, publicar_horarios as publicar_horarios_rango, validar_edicion, editar_horarios
+from apps.direccion.models import Direccion
+from apps.reserva.servicio import crear_reserva, crear_reservas
 from apps.reseña.models import Reseña
+from apps.reseña.paginacion import pagina_reseñas
 from .models import Cancha
-from datetime import timedelta, datetime, time
-from itertools import groupby
-from operator import attrgetter
+from .autocompletar import indice as indice_autocompletar, SUGERENCIAS_POR_DEFECTO, SUGERENCIAS_MAXIMAS
+from datetime import datetime, time
 import re
 
 class CanchaViewSet(viewsets.ModelViewSet):
@@ -23,76 +33,80 @@ class CanchaViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(responsable=self.request.user)
-
-def obtener_dias_horarios(cancha):
-    horarios = Horario.objects.filter(cancha=cancha).order_by('dia', 'hora_inicio')
-    today = datetime.now().date()
-    
-    dias_horarios = []
     
-    for dia, horarios_dia in groupby(horarios, key=attrgetter('dia')):
-        horarios_dia = list(horarios_dia)
-        horas_dia = []
-        # Generar todas las horas entre 00:00 y 23:00
-        for h in range(24):
-            hora_inicio = time(hour=h, minute=0)
-            if h == 23:  # Último bloque del día
-                hora_fin = time(hour=23, minute=59)
-            else:
-                hora_fin = (datetime.combine(today, hora_inicio) + timedelta(hours=1)).time()
-            # Buscar si la hora está dentro de algún horario creado
-            horario_encontrado = next(
-                (horario for horario in horarios_dia if horario.hora_inicio <= hora_inicio < horario.hora_fin),
-                None
-            )
-            if horario_encontrado:
-                # Verificar si está reservado
-                reservado = Reserva.objects.filter(
-                    horario=horario_encontrado,
-                    hora_reserva_inicio=hora_inicio,
-                    hora_reserva_fin=hora_fin
-                ).exists()
-                if reservado:
-                    estado = "rojo"  # Reservado
-                else:
-                    estado = "verde"  # Disponible
-            else:
-                estado = "gris"  # Sin horario
-            # Añadir bloque de hora
-            horas_dia.append({
-                "id": horario_encontrado.id if horario_encontrado else None,
-                "hora_inicio": hora_inicio.strftime('%H:%M'),
-                "hora_fin": hora_fin.strftime('%H:%M'),
-                "estado": estado,
-            })
-        # Agregar información del día
-        dias_horarios.append({
-            "dia": dia.strftime('%Y-%m-%d'),
-            "horas": horas_dia,
-            "hora_inicio": horarios_dia[0].hora_inicio.strftime('%H:%M') if horarios_dia else None,
-            "hora_fin": horarios_dia[-1].hora_fin.strftime('%H:%M') if horarios_dia else None,
-        })
-    return dias_horarios
+    @action(detail=True, methods=['get'])
+    def disponibilidad(self, request, slug=None):
+        """
+        Grilla de disponibilidad de la cancha entre ?desde= y ?hasta= (YYYY-MM-DD).
+        Responde 304 si el ETag enviado en If-None-Match coincide con la versión actual.
+        """
+        cancha = self.get_object()
+        try:
+            desde = datetime.strptime(request.query_params['desde'], "%Y-%m-%d").date() if request.query_params.get('desde') else None
+            hasta = datetime.strptime(request.query_params['hasta'], "%Y-%m-%d").date() if request.query_params.get('hasta') else None
+        except ValueError:
+            return Response({"detail": "Las fechas deben tener el formato YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if desde and hasta and desde > hasta:
+            return Response({"detail": "La fecha desde no puede ser posterior a la fecha hasta."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # El ETag solo depende de la versión de los horarios de la cancha y del rango pedido
+        version, obtener_dias = grilla_compacta_versionada(cancha, desde, hasta)
+        etag = quote_etag(f'{cancha.id}-{version}-{desde or ""}-{hasta or ""}')
+        etags_cliente = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in etags_cliente or '*' in etags_cliente:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        datos = {
+            'cancha': cancha.id,
+            'desde': desde,
+            'hasta': hasta,
+            'dias': obtener_dias(),
+        }
+        return Response(datos, headers={'ETag': etag})
 
 @login_required
 def detalle_cancha(request, cancha_id, cancha_slug):
     cancha = get_object_or_404(Cancha, id=cancha_id, slug=cancha_slug)
-    dias_horarios = obtener_dias_horarios(cancha)
+    dias_horarios = obtener_dias_horarios_cache(cancha)
     calificacion = cancha.promedio_calificaciones()
     reseña = Reseña.objects.filter(usuario=request.user, cancha=cancha).first()
-    reseñas = Reseña.objects.filter(cancha=cancha).order_by('-id')
+    # Solo la primera página; las siguientes se cargan con mas_reseñas
+    reseñas, siguiente_reseñas = pagina_reseñas(cancha.id)
+    responsable = request.user == cancha.responsable
     contexto = {
         'cancha': cancha,
-        'responsable': request.user == cancha.responsable,
+        'responsable': responsable,
         'reseña': reseña,
         'reseñas': reseñas,
+        'siguiente_reseñas': siguiente_reseñas,
         'calificacion': calificacion,
         'dias_horarios': dias_horarios,
         'horas': [time(hour=h).strftime('%H:%M') for h in range(24)],
         'hoy': datetime.now().date().strftime('%Y-%m-%d'),
+        'dias_semana': DIAS_SEMANA,
+        'plantillas': cancha.plantillas_horario.all() if responsable else [],
     }
     return render(request, 'cancha/detalle_cancha/detalle_cancha.html', contexto)
 
+def autocompletar(request):
+    # Sugerencias de canchas, calles y distritos mientras se escribe: ?q=<prefijo>&k=<cantidad>
+    limite = request.GET.get('k', '')
+    limite = min(int(limite), SUGERENCIAS_MAXIMAS) if limite.isdigit() and int(limite) > 0 else SUGERENCIAS_POR_DEFECTO
+    return JsonResponse({'sugerencias': indice_autocompletar.buscar(request.GET.get('q', ''), limite)})
+
+def horarios_libres(request):
+    contexto = {
+        'datos': request.GET,
+        'DISTRITOS': Direccion.DISTRITOS,
+    }
+    if request.GET.get('dia'):
+        parametros, error = validar_parametros_busqueda(request.GET)
+        if error:
+            messages.error(request, error)
+        else:
+            contexto['resultados'] = buscar_horarios_libres(**parametros)
+    return render(request, 'cancha/horarios_libres.html', contexto)
+
 def validar_datos_cancha(request):
     nombre = request.POST.get('nombre', '').strip()
     tipo_calle = request.POST.get('tipo_calle', '').strip()
@@ -233,60 +247,71 @@ def agregar_horario(request, cancha_id, cancha_slug):
 
 @login_required
 @require_POST
-def editar_horarios_dia(request, cancha_id, cancha_slug):
+def publicar_horarios(request, cancha_id, cancha_slug):
     cancha = get_object_or_404(Cancha, id=cancha_id, slug=cancha_slug, responsable=request.user)
-    dia = request.POST.get('dia')
-    hora_inicio = request.POST.get('hora_inicio')
-    hora_fin = request.POST.get('hora_fin')
+    rango, error = validar_rango(request.POST.get('desde'), request.POST.get('hasta'))
+    if not error:
+        plantilla_id = request.POST.get('plantilla')
+        if plantilla_id:
+            plantilla = get_object_or_404(PlantillaHorario, id=plantilla_id, cancha=cancha)
+            semanal = plantilla.horario_semanal()
+        else:
+            # Un bloque por día de la semana con hora de inicio y fin; los días sin horas quedan cerrados
+            semanal, error = horario_semanal([
+                {'dias': [dia], 'hora_inicio': request.POST.get(f'hora_inicio_{dia}'), 'hora_fin': request.POST.get(f'hora_fin_{dia}')}
+                for dia, _ in DIAS_SEMANA
+                if request.POST.get(f'hora_inicio_{dia}') and request.POST.get(f'hora_fin_{dia}')
+            ])
+    if error:
+        messages.error(request, error)
+        return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+    
+    nombre = (request.POST.get('guardar_como') or '').strip()
     try:
-        # Validación de existencia de horarios para el día seleccionado
-        horarios_existentes = Horario.objects.filter(cancha=cancha, dia=dia)
-        if not horarios_existentes.exists():
-            messages.error(request, f"No hay horarios existentes para el día {dia}.")
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        
-        # Validaciones de entrada
-        if not hora_inicio or not hora_fin:
-            messages.error(request, "Debe especificar una hora de inicio y una hora de fin.")
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        
-        # Validar formato de las horas
-        hora_inicio_dt = datetime.strptime(hora_inicio, "%H:%M").time()
-        hora_fin_dt = datetime.strptime(hora_fin, "%H:%M").time()
-        if hora_inicio_dt >= hora_fin_dt:
-            messages.error(request, "La hora de inicio debe ser anterior a la hora de fin.")
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        if hora_fin_dt > time(23, 59):
-            messages.error(request, "La hora de fin no puede superar las 23:59.")
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        
-        # Verificar reservas en conflicto
-        reservas_en_conflicto = []
-        for horario in horarios_existentes:
-            reservas = Reserva.objects.filter(horario=horario)
-            for reserva in reservas:
-                if reserva.hora_reserva_inicio < hora_inicio_dt or reserva.hora_reserva_fin > hora_fin_dt:
-                    reservas_en_conflicto.append(reserva)
-        
-        if reservas_en_conflicto:
-            reservas_detalle = ", ".join(
-                f"Reserva de {reserva.usuario} de {reserva.hora_reserva_inicio} a {reserva.hora_reserva_fin}" for reserva in reservas_en_conflicto
-            )
-            messages.error(
-                request, 
-                f"No se pueden modificar los horarios porque existen reservas en conflicto: {reservas_detalle}."
-            )
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        
-        # Actualizar los horarios
-        for horario in horarios_existentes:
-            horario.hora_inicio = hora_inicio_dt
-            horario.hora_fin = hora_fin_dt
-            horario.save()
-        
-        messages.success(request, f"Horarios del día {dia} actualizados exitosamente.")
-    except Exception as e:
-        messages.error(request, f"Error al editar horarios: {str(e)}")
+        # La plantilla se guarda en la misma transacción: si la publicación falla no queda modificada
+        with transaction.atomic():
+            if nombre and not request.POST.get('plantilla'):
+                plantilla, _ = PlantillaHorario.objects.get_or_create(cancha=cancha, nombre=nombre)
+                plantilla.dias.all().delete()
+                DiaPlantillaHorario.objects.bulk_create([
+                    DiaPlantillaHorario(plantilla=plantilla, dia_semana=dia, hora_inicio=inicio, hora_fin=fin)
+                    for dia, (inicio, fin) in semanal.items()
+                ])
+            resultado = publicar_horarios_rango(cancha.id, *rango, semanal)
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
+        return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+    
+    messages.success(request, f"Se publicaron {len(resultado['creados'])} horarios.")
+    if resultado['existentes']:
+        messages.info(request, f"{len(resultado['existentes'])} días ya tenían horario y no se modificaron.")
+    for dia, motivo in resultado['omitidos']:
+        messages.warning(request, f"{dia.strftime('%Y-%m-%d')}: {motivo}")
+    return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+
+@login_required
+@require_POST
+def editar_horarios_dia(request, cancha_id, cancha_slug):
+    cancha = get_object_or_404(Cancha, id=cancha_id, slug=cancha_slug, responsable=request.user)
+    # dia (o desde) con hasta opcional para editar un rango; dias_semana limita el rango a esos días
+    datos = request.POST.dict()
+    datos['dias_semana'] = request.POST.getlist('dias_semana')
+    parametros, error = validar_edicion(datos)
+    if error:
+        messages.error(request, error)
+        return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+    
+    resultado = editar_horarios(cancha.id, **parametros)
+    if resultado['conflictos']:
+        return render(request, 'cancha/detalle_cancha/conflictos_horario.html', {
+            'cancha': cancha,
+            'parametros': parametros,
+            'conflictos': resultado['conflictos'],
+        }, status=409)
+    if not resultado['actualizados']:
+        messages.error(request, "No hay horarios existentes para modificar en las fechas seleccionadas.")
+    else:
+        messages.success(request, f"{resultado['actualizados']} horarios actualizados exitosamente.")
     return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
 
 @login_required
@@ -297,6 +322,7 @@ def eliminar_horarios_dia(request, cancha_id, cancha_slug):
     try:
         # Eliminar todos los horarios asociados al día y a la cancha seleccionada
         horarios_eliminados = Horario.objects.filter(cancha=cancha, dia=dia).delete()
+        horarios_modificados(cancha.id)
         if horarios_eliminados[0] > 0:  # Chequea si se eliminaron registros
             messages.success(request, f"Todos los horarios del día {dia} han sido eliminados.")
         else:
@@ -339,29 +365,55 @@ def reservar_horario(request, cancha_id, cancha_slug, horario_id, hora_inicio, h
             messages.error(request, "El rango de horas no es válido dentro del horario disponible.")
             return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
         
-        # Validar si el rango de horas ya está reservado
-        reservas_conflictivas = Reserva.objects.filter(
-            horario=horario,
-            hora_reserva_inicio__lt=hora_fin_obj,
-            hora_reserva_fin__gt=hora_inicio_obj
-        )
-        if reservas_conflictivas.exists():
-            hora_inicio = reservas_conflictivas.first().hora_reserva_inicio.strftime('%H:%M')
-            hora_fin = reservas_conflictivas.first().hora_reserva_fin.strftime('%H:%M')
-            messages.error(request, "Este horario ya está reservado.")
-            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
-        
-        # Crear la reserva
-        Reserva.objects.create(
+        # Verificar conflictos y crear la reserva en una sola transacción
+        crear_reserva(
             usuario=request.user,
-            horario=horario,
+            horario_id=horario.id,
             hora_reserva_inicio=hora_inicio_obj,
             hora_reserva_fin=hora_fin_obj,
         )
         messages.success(request, f"Reserva exitosa: {hora_inicio_obj.strftime('%H:%M')} - {hora_fin_obj.strftime('%H:%M')}")
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
     except ValueError:
         messages.error(request, "Formato de hora inválido.")
     except Exception as e:
         messages.error(request, f"Error al reservar el horario: {e}")
     
+    return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+
+@login_required
+@require_POST
+def reservar_horarios(request, cancha_id, cancha_slug):
+    cancha = get_object_or_404(Cancha, id=cancha_id, slug=cancha_slug)
+    # Cada bloque seleccionado llega como "horario_id,HH:MM,HH:MM"
+    items = []
+    for bloque in request.POST.getlist('bloques'):
+        partes = bloque.split(',')
+        if len(partes) != 3:
+            messages.error(request, "Selección de horarios inválida.")
+            return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+        items.append({'horario': partes[0], 'hora_reserva_inicio': partes[1], 'hora_reserva_fin': partes[2]})
+    if not items:
+        messages.error(request, "Debe seleccionar al menos un horario.")
+        return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
+    
+    atomico = not request.POST.get('parcial')
+    try:
+        creadas, errores = crear_reservas(request.user, items, atomico=atomico, cancha_id=cancha.id)
+    except ValidationError as e:
+        creadas, errores = [], [{'item': None, 'detalle': " ".join(e.messages)}]
+    
+    if creadas:
+        messages.success(request, f"Se reservaron {len(creadas)} horarios.")
+    if errores:
+        detalle = "; ".join(
+            f"{items[error['item']]['hora_reserva_inicio']} - {items[error['item']]['hora_reserva_fin']}: {error['detalle']}"
+            if error['item'] is not None else error['detalle']
+            for error in errores
+        )
+        if atomico:
+            messages.error(request, f"No se realizó ninguna reserva. {detalle}")
+        else:
+            messages.warning(request, f"Horarios no reservados: {detalle}")
     return redirect('detalle_cancha', cancha_id=cancha.id, cancha_slug=cancha.slug)
\ No newline at end of file
@@ -0,0 +1,100 @@
+import time
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Las entradas se invalidan cambiando la versión, no borrando claves
+TIMEOUT_POR_DEFECTO = 60 * 60
+
+def cache_compartida():
+    """
+    True si la cache la comparten todos los procesos (Redis, Memcached, base de datos). Con LocMemCache
+    cada proceso tiene sus propias versiones y no ve los incrementos de los demás.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+def _clave_version(espacio, objeto_id):
+    return f'{espacio}:version:{objeto_id}'
+
+def version(espacio, objeto_id):
+    """Versión actual de un objeto dentro de un espacio de cache (por ejemplo 'grilla', 5)."""
+    clave = _clave_version(espacio, objeto_id)
+    valor = cache.get(clave)
+    if valor is None:
+        # Inicializar con un valor basado en el reloj: si la clave fue desalojada
+        # no se reutiliza una versión anterior y no se sirven entradas obsoletas
+        cache.add(clave, time.time_ns(), None)
+        valor = cache.get(clave)
+    return valor
+
+def incrementar_version(espacio, objeto_id):
+    clave = _clave_version(espacio, objeto_id)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        # La clave no existía todavía
+        return version(espacio, objeto_id)
+
+def _contar(clave, cantidad=1):
+    if cantidad and not cache.add(clave, cantidad, None):
+        try:
+            cache.incr(clave, cantidad)
+        except ValueError:
+            cache.add(clave, cantidad, None)
+
+def estadisticas(espacio):
+    """Aciertos y fallos registrados para un espacio de cache."""
+    aciertos = cache.get(f'{espacio}:hits', 0)
+    fallos = cache.get(f'{espacio}:misses', 0)
+    total = aciertos + fallos
+    return {
+        'hits': aciertos,
+        'misses': fallos,
+        'hit_rate': round(aciertos / total, 4) if total else 0.0,
+    }
+
+def reiniciar_estadisticas(espacio):
+    cache.delete_many([f'{espacio}:hits', f'{espacio}:misses'])
+
+def obtener_o_calcular(espacio, objeto_id, sufijo, calcular, timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Retorna el valor cacheado para (espacio, objeto_id, versión, sufijo) o lo calcula con calcular().
+    Cualquier escritura que llame a incrementar_version invalida todas las entradas del objeto.
+    """
+    clave = f'{espacio}:{objeto_id}:v{version(espacio, objeto_id)}:{sufijo}'
+    valor = cache.get(clave)
+    if valor is not None:
+        _contar(f'{espacio}:hits')
+        return valor
+    _contar(f'{espacio}:misses')
+    valor = calcular()
+    cache.set(clave, valor, timeout)
+    return valor
+
+def obtener_o_calcular_varios(espacio, objeto_ids, sufijo, calcular, timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Como obtener_o_calcular para varios objetos a la vez: un get_many para las versiones, otro para
+    los valores y un set_many para los que faltaban. calcular(objeto_id) se llama solo en los fallos.
+    Retorna {objeto_id: valor}.
+    """
+    claves_version = {objeto_id: _clave_version(espacio, objeto_id) for objeto_id in objeto_ids}
+    versiones = cache.get_many(claves_version.values())
+    claves = {}
+    for objeto_id, clave_version in claves_version.items():
+        valor_version = versiones.get(clave_version)
+        if valor_version is None:
+            valor_version = version(espacio, objeto_id)
+        claves[objeto_id] = f'{espacio}:{objeto_id}:v{valor_version}:{sufijo}'
+    
+    cacheados = cache.get_many(claves.values())
+    valores, nuevos = {}, {}
+    for objeto_id, clave in claves.items():
+        valor = cacheados.get(clave)
+        if valor is None:
+            valor = nuevos[clave] = calcular(objeto_id)
+        valores[objeto_id] = valor
+    _contar(f'{espacio}:hits', len(claves) - len(nuevos))
+    _contar(f'{espacio}:misses', len(nuevos))
+    if nuevos:
+        cache.set_many(nuevos, timeout)
+    return valores
@@ -0,0 +1,69 @@
+from django.db.models.fields.files import FieldFile
+
+def _valor(instancia, campo):
+    valor = getattr(instancia, campo.attname)
+    # Un archivo recién asignado aún no tiene nombre definitivo: siempre cuenta como cambio
+    if isinstance(valor, FieldFile):
+        return valor.name if valor._committed else object()
+    return valor
+
+class CamposModificadosMixin:
+    """
+    Recuerda los valores de los campos tal como se leyeron de la base para saber qué cambió sin
+    volver a consultar la fila. save() sin update_fields escribe solo los campos modificados,
+    salvo los de campos_excluidos. A diferencia del save() de Django, si la fila se borró mientras
+    tanto no se vuelve a insertar: el UPDATE no afecta filas y se lanza DatabaseError.
+    """
+    # Campos que save() nunca escribe por su cuenta, por ejemplo contadores que se actualizan con F()
+    campos_excluidos = ()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._recordar_valores()
+        return instancia
+    
+    def _recordar_valores(self, nombres=None):
+        # Sin nombres se toma una foto completa; con nombres solo se actualizan esos campos
+        diferidos = self.get_deferred_fields()
+        campos = self._meta.concrete_fields if nombres is None else [self._meta.get_field(nombre) for nombre in nombres]
+        valores = {campo.attname: _valor(self, campo) for campo in campos if campo.attname not in diferidos}
+        if nombres is None or not hasattr(self, '_valores_cargados'):
+            self._valores_cargados = valores
+        else:
+            self._valores_cargados.update(valores)
+    
+    def has_changed(self, nombre):
+        """True si el campo cambió desde que se leyó, o si la instancia no viene de la base."""
+        campo = self._meta.get_field(nombre)
+        cargados = getattr(self, '_valores_cargados', None)
+        if cargados is None or campo.attname not in cargados:
+            return True
+        return _valor(self, campo) != cargados[campo.attname]
+    
+    def campos_modificados(self):
+        """Nombres de los campos a escribir: los modificados (o asignados tras diferirse) y los auto_now."""
+        diferidos = self.get_deferred_fields()
+        modificados = [
+            campo for campo in self._meta.concrete_fields
+            if not campo.primary_key and campo.attname not in diferidos and self.has_changed(campo.name)
+        ]
+        if modificados:
+            modificados += [
+                campo for campo in self._meta.concrete_fields
+                if getattr(campo, 'auto_now', False) and campo not in modificados
+            ]
+        return [campo.name for campo in modificados]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Sin cambios update_fields queda vacío y Django no ejecuta el UPDATE
+            kwargs['update_fields'] = [
+                campo for campo in self.campos_modificados() if campo not in self.campos_excluidos
+            ]
+        super().save(*args, **kwargs)
+        self._recordar_valores(kwargs.get('update_fields'))
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        self._recordar_valores(fields)
@@ -1,9 +1,21 @@
 from django.contrib import admin
-from .models import Horario
+from .models import Horario, PlantillaHorario, DiaPlantillaHorario
 
 class HorarioAdmin(admin.ModelAdmin):
     list_display = ['cancha', 'dia', 'hora_inicio', 'hora_fin']
     list_filter = ['cancha', 'dia']
     search_fields = ['cancha__nombre', 'dia']
 
-admin.site.register(Horario, HorarioAdmin)
\ No newline at end of file
+admin.site.register(Horario, HorarioAdmin)
+
+class DiaPlantillaHorarioInline(admin.TabularInline):
+    model = DiaPlantillaHorario
+    extra = 0
+
+class PlantillaHorarioAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'cancha']
+    list_filter = ['cancha']
+    search_fields = ['nombre', 'cancha__nombre']
+    inlines = [DiaPlantillaHorarioInline]
+
+admin.site.register(PlantillaHorario, PlantillaHorarioAdmin)
\ No newline at end of file
@@ -0,0 +1,94 @@
+from datetime import datetime
+from django.db.models import Exists, OuterRef
+from apps.direccion.models import Direccion
+from apps.horario.models import Horario
+from apps.horario.ocupacion import Ocupacion, intervalos, mascara, minuto
+from apps.reserva.models import Reserva
+
+DURACION_MINIMA_POR_DEFECTO = 60
+
+def validar_parametros_busqueda(datos):
+    """
+    Valida los parámetros de búsqueda (dia, hora_inicio, hora_fin, duracion, distrito).
+    Retorna (parametros, None) o (None, mensaje de error).
+    """
+    dia = (datos.get('dia') or '').strip()
+    hora_inicio = (datos.get('hora_inicio') or '00:00').strip()
+    hora_fin = (datos.get('hora_fin') or '23:59').strip()
+    duracion = (datos.get('duracion') or str(DURACION_MINIMA_POR_DEFECTO)).strip()
+    distrito = (datos.get('distrito') or '').strip()
+    
+    if not dia:
+        return None, 'Debe indicar el día de la búsqueda.'
+    try:
+        dia = datetime.strptime(dia, "%Y-%m-%d").date()
+        hora_inicio = datetime.strptime(hora_inicio, "%H:%M").time()
+        hora_fin = datetime.strptime(hora_fin, "%H:%M").time()
+    except ValueError:
+        return None, 'El día debe tener el formato YYYY-MM-DD y las horas el formato HH:MM.'
+    if hora_inicio >= hora_fin:
+        return None, 'La hora de inicio debe ser anterior a la hora de fin.'
+    if not duracion.isdigit() or int(duracion) <= 0:
+        return None, 'La duración debe ser una cantidad de minutos mayor a cero.'
+    if distrito and distrito not in dict(Direccion.DISTRITOS):
+        return None, 'El distrito seleccionado no es válido.'
+    
+    return {
+        'dia': dia,
+        'hora_inicio': hora_inicio,
+        'hora_fin': hora_fin,
+        'duracion': int(duracion),
+        'distrito': distrito,
+    }, None
+
+def buscar_horarios_libres(dia, hora_inicio, hora_fin, duracion=DURACION_MINIMA_POR_DEFECTO, distrito=''):
+    """
+    Busca en todas las canchas los rangos libres del día dentro de la ventana [hora_inicio, hora_fin)
+    que duren al menos 'duracion' minutos. Usa dos consultas sin importar la cantidad de canchas:
+    los horarios del día que tocan la ventana y sus reservas que también la tocan.
+    Retorna una lista de diccionarios {'cancha', 'horario', 'libres'} ordenada por el primer rango libre.
+    """
+    horarios = Horario.objects.filter(
+        dia=dia,
+        hora_inicio__lt=hora_fin,
+        hora_fin__gt=hora_inicio
+    )
+    if distrito:
+        horarios = horarios.filter(
+            Exists(Direccion.objects.filter(cancha=OuterRef('cancha'), distrito=distrito))
+        )
+    # Solo las columnas necesarias: evita instanciar un modelo por cancha
+    horarios = {
+        horario_id: (inicio, fin, {'id': cancha_id, 'nombre': nombre, 'slug': slug})
+        for horario_id, inicio, fin, cancha_id, nombre, slug in horarios.values_list(
+            'id', 'hora_inicio', 'hora_fin', 'cancha_id', 'cancha__nombre', 'cancha__slug'
+        )
+    }
+    if not horarios:
+        return []
+    
+    # Se filtra por día y no por lista de ids para no depender del límite de parámetros del motor
+    reservas = Reserva.objects.filter(
+        horario__dia=dia,
+        hora_reserva_inicio__lt=hora_fin,
+        hora_reserva_fin__gt=hora_inicio
+    ).values_list('horario_id', 'hora_reserva_inicio', 'hora_reserva_fin')
+    ocupaciones = {
+        horario_id: Ocupacion(programado=mascara(inicio, fin))
+        for horario_id, (inicio, fin, _) in horarios.items()
+    }
+    for horario_id, inicio, fin in reservas:
+        if horario_id in ocupaciones:
+            ocupaciones[horario_id].reservar(inicio, fin)
+    
+    ventana = mascara(hora_inicio, hora_fin)
+    resultados = []
+    for horario_id, ocupacion in ocupaciones.items():
+        libres = [
+            (inicio, fin) for inicio, fin in intervalos(ocupacion.libres & ventana)
+            if minuto(fin) - minuto(inicio) >= duracion
+        ]
+        if libres:
+            resultados.append({'cancha': horarios[horario_id][2], 'horario': horario_id, 'libres': libres})
+    resultados.sort(key=lambda resultado: (resultado['libres'][0][0], resultado['cancha']['nombre']))
+    return resultados
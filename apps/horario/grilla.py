@@ -0,0 +1,138 @@
+from datetime import time
+from django.db import transaction
+from django.db.models import F
+from apps.comun import cache_versiones
+from apps.cancha.models import Cancha
+from apps.horario.models import Horario
+from apps.horario.ocupacion import Ocupacion
+from apps.reserva.models import Reserva
+
+ESPACIO_CACHE = 'grilla'
+
+# Bloques de una hora del día; el último termina a las 23:59
+BLOQUES_HORA = [(time(hour=h), time(hour=h + 1) if h < 23 else time(23, 59)) for h in range(24)]
+
+def bloques_hora(ocupacion, horario_id):
+    """Representa la ocupación de un día como los 24 bloques que espera la plantilla."""
+    horas_dia = []
+    for hora_inicio, hora_fin in BLOQUES_HORA:
+        if ocupacion.minuto_programado(hora_inicio):
+            # Reservado si cualquier minuto del bloque está ocupado
+            estado = "rojo" if ocupacion.reservado_en(hora_inicio, hora_fin) else "verde"
+            bloque_id = horario_id
+        else:
+            estado = "gris"  # Sin horario
+            bloque_id = None
+        horas_dia.append({
+            "id": bloque_id,
+            "hora_inicio": hora_inicio.strftime('%H:%M'),
+            "hora_fin": hora_fin.strftime('%H:%M'),
+            "estado": estado,
+        })
+    return horas_dia
+
+def ocupaciones(cancha, desde=None, hasta=None):
+    """
+    Retorna una lista de (horario, Ocupacion) ordenada por día para la cancha.
+    Usa dos consultas: una para los horarios y otra para las reservas que los solapan.
+    """
+    horarios = Horario.objects.filter(cancha=cancha)
+    reservas = Reserva.objects.filter(horario__cancha=cancha)
+    if desde:
+        horarios = horarios.filter(dia__gte=desde)
+        reservas = reservas.filter(horario__dia__gte=desde)
+    if hasta:
+        horarios = horarios.filter(dia__lte=hasta)
+        reservas = reservas.filter(horario__dia__lte=hasta)
+    
+    reservas_por_horario = {}
+    for horario_id, inicio, fin in reservas.values_list('horario_id', 'hora_reserva_inicio', 'hora_reserva_fin'):
+        reservas_por_horario.setdefault(horario_id, []).append((inicio, fin))
+    
+    return [
+        (horario, Ocupacion.de_horario(horario, reservas_por_horario.get(horario.id, [])))
+        for horario in horarios.order_by('dia', 'hora_inicio')
+    ]
+
+def obtener_dias_horarios(cancha, desde=None, hasta=None):
+    """
+    Construye la grilla de bloques por hora de una cancha entre las fechas desde y hasta (inclusive).
+    Un bloque se marca como reservado si cualquier reserva lo cubre, aunque dure varias horas.
+    """
+    dias_horarios = []
+    for horario, ocupacion in ocupaciones(cancha, desde, hasta):
+        dias_horarios.append({
+            "dia": horario.dia.strftime('%Y-%m-%d'),
+            "horas": bloques_hora(ocupacion, horario.id),
+            "hora_inicio": horario.hora_inicio.strftime('%H:%M'),
+            "hora_fin": horario.hora_fin.strftime('%H:%M'),
+        })
+    return dias_horarios
+
+def grilla_compacta(cancha, desde=None, hasta=None):
+    """
+    Grilla en formato compacto para la API: por día, una cadena de 24 caracteres
+    donde 'g' es sin horario, 'v' disponible y 'r' reservado.
+    """
+    return [
+        {
+            'dia': horario.dia.isoformat(),
+            'horario': horario.id,
+            'hora_inicio': horario.hora_inicio.strftime('%H:%M'),
+            'hora_fin': horario.hora_fin.strftime('%H:%M'),
+            'bloques': ''.join(bloque['estado'][0] for bloque in bloques_hora(ocupacion, horario.id)),
+        }
+        for horario, ocupacion in ocupaciones(cancha, desde, hasta)
+    ]
+
+def obtener_grilla_compacta(cancha, desde=None, hasta=None):
+    """
+    Versión cacheada de grilla_compacta. La clave lleva cancha.version_horarios, que está en la base:
+    también es correcta con una cache por proceso.
+    """
+    return cache_versiones.obtener_o_calcular(
+        ESPACIO_CACHE,
+        cancha.id,
+        f'compacta:{cancha.version_horarios}:{desde or ""}:{hasta or ""}',
+        lambda: grilla_compacta(cancha, desde, hasta),
+    )
+
+def grilla_compacta_versionada(cancha, desde=None, hasta=None):
+    """
+    Retorna (version, obtener_dias) para el ETag de la API. La versión es cancha.version_horarios, leída
+    junto con la cancha, así que responder 304 no consulta horarios ni la cache con ningún backend.
+    """
+    return cancha.version_horarios, lambda: obtener_grilla_compacta(cancha, desde, hasta)
+
+def version_grilla(cancha_id):
+    return cache_versiones.version(ESPACIO_CACHE, cancha_id)
+
+def horarios_modificados(cancha_id):
+    """
+    Registra un cambio en los horarios o reservas de la cancha. Llamar dentro de la transacción de la
+    escritura: incrementa Cancha.version_horarios junto con ella y deja invalidar_grilla para el commit.
+    """
+    if cancha_id is None:
+        return
+    Cancha.objects.filter(pk=cancha_id).update(version_horarios=F('version_horarios') + 1)
+    transaction.on_commit(lambda: invalidar_grilla(cancha_id))
+
+def invalidar_grilla(cancha_id):
+    """
+    Invalida las grillas cacheadas de la cancha. Se llama con transaction.on_commit desde
+    horarios_modificados, para que nadie cachee la grilla previa bajo la versión nueva.
+    """
+    if cancha_id is not None:
+        cache_versiones.incrementar_version(ESPACIO_CACHE, cancha_id)
+
+def obtener_dias_horarios_cache(cancha, desde=None, hasta=None):
+    """Versión cacheada de obtener_dias_horarios, con clave por cancha y versión de su horario."""
+    return cache_versiones.obtener_o_calcular(
+        ESPACIO_CACHE,
+        cancha.id,
+        f'{desde or ""}:{hasta or ""}',
+        lambda: obtener_dias_horarios(cancha, desde, hasta),
+    )
+
+def estadisticas_grilla():
+    return cache_versiones.estadisticas(ESPACIO_CACHE)
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.horario.purga import purgar_horarios_pasados, PURGA_TAMANO_LOTE
+
+class Command(BaseCommand):
+    help = 'Elimina los horarios vencidos y sus reservas en lotes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=PURGA_TAMANO_LOTE, help='Cantidad de horarios por lote')
+        parser.add_argument('--intervalo', type=int, default=0, help='Segundos entre ejecuciones (0 = ejecutar una sola vez)')
+    
+    def handle(self, *args, **options):
+        while True:
+            resultado = purgar_horarios_pasados(tamano_lote=options['lote'])
+            if resultado is None:
+                self.stdout.write(self.style.WARNING('Otra purga está en curso. No se eliminó nada.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Horarios eliminados: {resultado['horarios']}. "
+                    f"Reservas eliminadas: {resultado['reservas']}. "
+                    f"Lotes: {resultado['lotes']}."
+                ))
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
@@ -1,7 +1,15 @@
-import datetime
-from apps.horario.models import Horario
+from django.core.cache import cache
+from apps.horario.purga import purgar_horarios_pasados
 
 class AutoDeleteOldHorariosMiddleware:
+    """
+    Middleware opcional que dispara la purga de horarios vencidos desde el ciclo de solicitudes.
+    Ya no está en MIDDLEWARE: la purga se ejecuta con python manage.py purgar_horarios
+    (por ejemplo desde cron). Si se activa, purga como máximo una vez por INTERVALO segundos.
+    """
+    INTERVALO = 300
+    THROTTLE_KEY = 'horario:purga:middleware'
+    
     def __init__(self, get_response):
         self.get_response = get_response
     
@@ -13,8 +21,5 @@ class AutoDeleteOldHorariosMiddleware:
         return response
     
     def eliminar_horarios_pasados(self):
-        ahora = datetime.datetime.now()
-        horarios_pasados = Horario.objects.filter(dia__lt=ahora.date()) | Horario.objects.filter(dia=ahora.date(), hora_fin__lte=ahora.time())
-        
-        if horarios_pasados.exists():
-            horarios_pasados.delete()
+        if cache.add(self.THROTTLE_KEY, True, self.INTERVALO):
+            purgar_horarios_pasados()
@@ -1,19 +1,58 @@
-from django.db import models
+from django.db import connections, models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.cancha.models import Cancha
 from datetime import datetime, time
 
+DIAS_SEMANA = [
+    (0, 'Lunes'),
+    (1, 'Martes'),
+    (2, 'Miércoles'),
+    (3, 'Jueves'),
+    (4, 'Viernes'),
+    (5, 'Sábado'),
+    (6, 'Domingo'),
+]
+
+class HorarioManager(models.Manager):
+    def bloquear(self, pk):
+        """
+        Obtiene el horario bloqueándolo para escritura hasta el fin de la transacción.
+        Usar dentro de transaction.atomic().
+        """
+        if connections[self.db].features.has_select_for_update:
+            # PostgreSQL/MySQL: lock de fila sobre el horario
+            return self.select_for_update().get(pk=pk)
+        # SQLite no tiene locks de fila: una escritura sin efecto como primera sentencia
+        # toma el lock de escritura de la base (equivalente a BEGIN IMMEDIATE)
+        self.filter(pk=pk).update(cancha_id=models.F('cancha_id'))
+        return self.get(pk=pk)
+    
+    def bloquear_varios(self, pks):
+        """Como bloquear() para varios horarios a la vez; retorna un diccionario {id: horario}."""
+        horarios = self.filter(pk__in=pks).order_by('pk')
+        if connections[self.db].features.has_select_for_update:
+            # Orden por clave primaria para que dos lotes concurrentes no se bloqueen mutuamente
+            return {horario.pk: horario for horario in horarios.select_for_update()}
+        horarios.update(cancha_id=models.F('cancha_id'))
+        return {horario.pk: horario for horario in horarios}
+
 class Horario(models.Model):
     cancha = models.ForeignKey(Cancha, on_delete=models.CASCADE, related_name='horarios')
     dia = models.DateField()
     hora_inicio = models.TimeField()
     hora_fin = models.TimeField()
     
+    objects = HorarioManager()
+    
     class Meta:
         verbose_name = 'Horario'
         verbose_name_plural = 'Horarios'
         unique_together = ['cancha', 'dia']
+        indexes = [
+            # Búsqueda de horarios libres de todas las canchas en un día
+            models.Index(fields=['dia', 'hora_inicio']),
+        ]
     
     def __str__(self):
         return f'{self.cancha.nombre} - {self.dia} de {self.hora_inicio} a {self.hora_fin}'
@@ -40,4 +79,42 @@ class Horario(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class PlantillaHorario(models.Model):
+    """Horario semanal reutilizable (por ejemplo lunes a viernes de 16:00 a 23:00) para publicar rangos de fechas."""
+    cancha = models.ForeignKey(Cancha, on_delete=models.CASCADE, related_name='plantillas_horario')
+    nombre = models.CharField(max_length=100)
+    
+    class Meta:
+        verbose_name = 'Plantilla de horario'
+        verbose_name_plural = 'Plantillas de horario'
+        unique_together = ['cancha', 'nombre']
+    
+    def __str__(self):
+        return f'{self.cancha.nombre} - {self.nombre}'
+    
+    def horario_semanal(self):
+        """Retorna {dia_semana: (hora_inicio, hora_fin)} con los días que abre la cancha."""
+        return {
+            dia_semana: (hora_inicio, hora_fin)
+            for dia_semana, hora_inicio, hora_fin in self.dias.values_list('dia_semana', 'hora_inicio', 'hora_fin')
+        }
+
+class DiaPlantillaHorario(models.Model):
+    plantilla = models.ForeignKey(PlantillaHorario, on_delete=models.CASCADE, related_name='dias')
+    dia_semana = models.PositiveSmallIntegerField('Día de la semana', choices=DIAS_SEMANA)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    
+    class Meta:
+        verbose_name = 'Día de plantilla'
+        verbose_name_plural = 'Días de plantilla'
+        unique_together = ['plantilla', 'dia_semana']
+    
+    def __str__(self):
+        return f'{self.plantilla} - {self.get_dia_semana_display()} de {self.hora_inicio} a {self.hora_fin}'
+    
+    def clean(self):
+        if self.hora_inicio >= self.hora_fin:
+            raise ValidationError("La hora de inicio debe ser anterior a la hora de fin.")
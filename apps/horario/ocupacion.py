@@ -0,0 +1,82 @@
+from datetime import time
+
+MINUTOS_DIA = 24 * 60
+
+def minuto(hora):
+    # Minuto del día (0-1439) de un objeto time
+    return hora.hour * 60 + hora.minute
+
+def mascara(inicio, fin):
+    """Máscara de bits con los minutos [inicio, fin) encendidos."""
+    desde, hasta = minuto(inicio), minuto(fin)
+    if hasta <= desde:
+        return 0
+    return ((1 << (hasta - desde)) - 1) << desde
+
+class Ocupacion:
+    """
+    Ocupación de una cancha en un día como dos enteros de 1440 bits (un bit por minuto):
+    los minutos programados por el horario y los minutos ya reservados.
+    """
+    __slots__ = ('programado', 'reservado')
+    
+    def __init__(self, programado=0, reservado=0):
+        self.programado = programado
+        self.reservado = reservado
+    
+    @classmethod
+    def de_horario(cls, horario, reservas=()):
+        # reservas: iterable de tuplas (hora_reserva_inicio, hora_reserva_fin)
+        ocupacion = cls(programado=mascara(horario.hora_inicio, horario.hora_fin))
+        for inicio, fin in reservas:
+            ocupacion.reservar(inicio, fin)
+        return ocupacion
+    
+    def reservar(self, inicio, fin):
+        self.reservado |= mascara(inicio, fin)
+    
+    def programado_en(self, inicio, fin):
+        m = mascara(inicio, fin)
+        return m != 0 and self.programado & m == m
+    
+    def reservado_en(self, inicio, fin):
+        return self.reservado & mascara(inicio, fin) != 0
+    
+    def libre(self, inicio, fin):
+        """True si el rango está dentro del horario y no tiene reservas."""
+        return self.programado_en(inicio, fin) and not self.reservado_en(inicio, fin)
+    
+    def minuto_programado(self, hora):
+        return (self.programado >> minuto(hora)) & 1 == 1
+    
+    @property
+    def libres(self):
+        return self.programado & ~self.reservado
+    
+    def __or__(self, otra):
+        return Ocupacion(self.programado | otra.programado, self.reservado | otra.reservado)
+    
+    def __and__(self, otra):
+        return Ocupacion(self.programado & otra.programado, self.reservado & otra.reservado)
+    
+    def __eq__(self, otra):
+        return isinstance(otra, Ocupacion) and (self.programado, self.reservado) == (otra.programado, otra.reservado)
+    
+    def __repr__(self):
+        return f'<Ocupacion programado={self.programado.bit_count()} reservado={self.reservado.bit_count()} min>'
+
+def a_hora(m):
+    # Inverso de minuto(); el final del día se representa como 23:59
+    return time(23, 59) if m >= MINUTOS_DIA - 1 else time(m // 60, m % 60)
+
+def intervalos(bits):
+    """Convierte una máscara en una lista de rangos (inicio, fin) como objetos time."""
+    rangos = []
+    while bits:
+        desde = (bits & -bits).bit_length() - 1
+        resto = bits >> desde
+        # Cantidad de bits encendidos consecutivos a partir de 'desde'
+        largo = (~resto & (resto + 1)).bit_length() - 1
+        rangos.append((a_hora(desde), a_hora(desde + largo)))
+        bits &= ~(((1 << largo) - 1) << desde)
+    return rangos
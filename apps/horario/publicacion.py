@@ -0,0 +1,168 @@
+from datetime import date, datetime, time, timedelta
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from apps.cancha.disponibilidad import actualizar_disponibilidad
+from apps.horario.grilla import horarios_modificados
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva
+
+# Un año como máximo por publicación
+MAX_DIAS_PUBLICACION = 366
+
+def _a_hora(valor):
+    return datetime.strptime(valor, "%H:%M").time() if isinstance(valor, str) else valor
+
+def horario_semanal(bloques):
+    """
+    Convierte una lista de bloques {'dias': [0, 1, ...], 'hora_inicio', 'hora_fin'} en
+    {dia_semana: (hora_inicio, hora_fin)}. Retorna (horario_semanal, None) o (None, mensaje de error).
+    """
+    semanal = {}
+    for bloque in bloques:
+        try:
+            hora_inicio = _a_hora(bloque.get('hora_inicio'))
+            hora_fin = _a_hora(bloque.get('hora_fin'))
+            dias = [int(dia) for dia in bloque.get('dias') or []]
+        except (AttributeError, TypeError, ValueError):
+            return None, 'Cada bloque debe indicar los días de la semana (0-6) y las horas en formato HH:MM.'
+        if hora_inicio >= hora_fin:
+            return None, 'La hora de inicio debe ser anterior a la hora de fin.'
+        for dia in dias:
+            if not 0 <= dia <= 6:
+                return None, 'Los días de la semana van de 0 (lunes) a 6 (domingo).'
+            if dia in semanal:
+                return None, 'Un día de la semana no puede estar en más de un bloque.'
+            semanal[dia] = (hora_inicio, hora_fin)
+    if not semanal:
+        return None, 'Debe indicar al menos un día de la semana.'
+    return semanal, None
+
+def validar_rango(desde, hasta):
+    """Retorna ((desde, hasta), None) o (None, mensaje de error)."""
+    try:
+        if isinstance(desde, str):
+            desde = datetime.strptime(desde, "%Y-%m-%d").date()
+        if isinstance(hasta, str):
+            hasta = datetime.strptime(hasta, "%Y-%m-%d").date()
+    except ValueError:
+        return None, 'Las fechas deben tener el formato YYYY-MM-DD.'
+    if not desde or not hasta:
+        return None, 'Debe indicar las fechas desde y hasta.'
+    if desde > hasta:
+        return None, 'La fecha de inicio debe ser anterior a la fecha de fin.'
+    if (hasta - desde).days >= MAX_DIAS_PUBLICACION:
+        return None, f'No se pueden publicar más de {MAX_DIAS_PUBLICACION} días a la vez.'
+    return (desde, hasta), None
+
+def publicar_horarios(cancha_id, desde, hasta, semanal):
+    """
+    Crea los horarios de la cancha entre desde y hasta (inclusive) según el horario semanal
+    {dia_semana: (hora_inicio, hora_fin)}. Los días que ya tienen horario se respetan.
+    Usa una consulta para los días existentes y un bulk_create para el resto.
+    Retorna {'creados': [Horario, ...], 'existentes': [fecha, ...], 'omitidos': [(fecha, motivo), ...]}.
+    """
+    resultado = {'creados': [], 'existentes': [], 'omitidos': []}
+    existentes = set(
+        Horario.objects.filter(cancha_id=cancha_id, dia__range=(desde, hasta)).values_list('dia', flat=True)
+    )
+    nuevos = []
+    dia = desde
+    while dia <= hasta:
+        if dia.weekday() in semanal:
+            if dia in existentes:
+                resultado['existentes'].append(dia)
+            else:
+                hora_inicio, hora_fin = semanal[dia.weekday()]
+                horario = Horario(cancha_id=cancha_id, dia=dia, hora_inicio=hora_inicio, hora_fin=hora_fin)
+                try:
+                    # Validación en memoria; no consulta la base
+                    horario.clean()
+                    nuevos.append(horario)
+                except ValidationError as e:
+                    resultado['omitidos'].append((dia, " ".join(e.messages)))
+        dia += timedelta(days=1)
+    
+    if nuevos:
+        try:
+            with transaction.atomic():
+                resultado['creados'] = Horario.objects.bulk_create(nuevos)
+                # bulk_create no emite señales
+                actualizar_disponibilidad(cancha_id)
+                horarios_modificados(cancha_id)
+        except IntegrityError:
+            raise ValidationError("Otro horario se creó en el rango durante la publicación. Intente nuevamente.")
+    return resultado
+
+def validar_edicion(datos):
+    """
+    Valida los parámetros de edición de horarios: dia (o desde) y hasta opcional, dias_semana opcional
+    (lista de 0 a 6), hora_inicio y hora_fin. Retorna (parametros, None) o (None, mensaje de error).
+    """
+    desde = datos.get('desde') or datos.get('dia')
+    rango, error = validar_rango(desde, datos.get('hasta') or desde)
+    if error:
+        return None, error
+    try:
+        hora_inicio = _a_hora(datos.get('hora_inicio'))
+        hora_fin = _a_hora(datos.get('hora_fin'))
+        dias_semana = sorted({int(dia) for dia in datos.get('dias_semana') or []})
+    except (TypeError, ValueError):
+        return None, 'Las horas deben tener el formato HH:MM y los días de la semana ir de 0 a 6.'
+    if not hora_inicio or not hora_fin:
+        return None, 'Debe especificar una hora de inicio y una hora de fin.'
+    if hora_inicio >= hora_fin:
+        return None, 'La hora de inicio debe ser anterior a la hora de fin.'
+    if hora_fin > time(23, 59):
+        return None, 'La hora de fin no puede superar las 23:59.'
+    if any(not 0 <= dia <= 6 for dia in dias_semana):
+        return None, 'Los días de la semana van de 0 (lunes) a 6 (domingo).'
+    return {
+        'desde': rango[0],
+        'hasta': rango[1],
+        'hora_inicio': hora_inicio,
+        'hora_fin': hora_fin,
+        'dias_semana': dias_semana,
+    }, None
+
+def editar_horarios(cancha_id, desde, hasta, hora_inicio, hora_fin, dias_semana=None):
+    """
+    Cambia las horas de los horarios de la cancha entre desde y hasta, opcionalmente solo en los
+    dias_semana indicados (0 = lunes). Si alguna reserva quedaría fuera del nuevo rango no se modifica
+    ningún horario. Las reservas en conflicto se buscan con una sola consulta y los horarios se
+    actualizan con un único UPDATE.
+    Retorna {'actualizados': cantidad, 'conflictos': [{'reserva', 'dia', 'usuario', 'hora_inicio', 'hora_fin'}, ...]}.
+    """
+    ahora = datetime.now()
+    horarios = Horario.objects.filter(cancha_id=cancha_id, dia__range=(max(desde, date.today()), hasta))
+    if dias_semana:
+        horarios = horarios.filter(dia__iso_week_day__in=[dia + 1 for dia in dias_semana])
+    if hora_inicio <= ahora.time():
+        # Hoy solo se puede abrir desde una hora futura
+        horarios = horarios.exclude(dia=ahora.date())
+    
+    with transaction.atomic():
+        # Bloquear los horarios para que no entren reservas entre la verificación y la actualización
+        ids = list(Horario.objects.bloquear_varios(horarios.values_list('id', flat=True)))
+        conflictos = Reserva.objects.filter(horario_id__in=ids).filter(
+            Q(hora_reserva_inicio__lt=hora_inicio) | Q(hora_reserva_fin__gt=hora_fin)
+        ).order_by('horario__dia', 'hora_reserva_inicio').values(
+            'id', 'horario__dia', 'usuario__email', 'hora_reserva_inicio', 'hora_reserva_fin'
+        )
+        conflictos = [
+            {
+                'reserva': conflicto['id'],
+                'dia': conflicto['horario__dia'],
+                'usuario': conflicto['usuario__email'],
+                'hora_inicio': conflicto['hora_reserva_inicio'],
+                'hora_fin': conflicto['hora_reserva_fin'],
+            }
+            for conflicto in conflictos
+        ]
+        if conflictos:
+            return {'actualizados': 0, 'conflictos': conflictos}
+        actualizados = Horario.objects.filter(id__in=ids).update(hora_inicio=hora_inicio, hora_fin=hora_fin)
+        # update() no emite señales
+        if actualizados:
+            horarios_modificados(cancha_id)
+    return {'actualizados': actualizados, 'conflictos': []}
\ No newline at end of file
@@ -0,0 +1,114 @@
+import datetime
+import logging
+import uuid
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from apps.cancha.disponibilidad import recalcular_disponibilidad_canchas
+from apps.horario.grilla import horarios_modificados
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva
+
+logger = logging.getLogger(__name__)
+
+PURGA_LOCK_KEY = 'horario:purga:lock'
+# Duración del lease; se renueva en cada lote, así una purga larga no lo pierde
+PURGA_LOCK_TIMEOUT = 300
+# Clave del advisory lock de PostgreSQL, que vale entre nodos aunque la cache sea local
+PURGA_ADVISORY_LOCK = 7305001
+PURGA_TAMANO_LOTE = 500
+
+def filtro_horarios_pasados(ahora=None):
+    ahora = ahora or datetime.datetime.now()
+    return Q(dia__lt=ahora.date()) | Q(dia=ahora.date(), hora_fin__lte=ahora.time())
+
+def _eliminar_lote(horario_ids):
+    # DELETE directo en SQL: evita que el Collector de Django cargue cada Reserva en memoria
+    marcadores = ', '.join(['%s'] * len(horario_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Reserva._meta.db_table} WHERE horario_id IN ({marcadores})',
+            horario_ids
+        )
+        reservas = cursor.rowcount
+        cursor.execute(
+            f'DELETE FROM {Horario._meta.db_table} WHERE id IN ({marcadores})',
+            horario_ids
+        )
+        horarios = cursor.rowcount
+    return horarios, reservas
+
+def _tomar_lock(token):
+    # cache.add es atómico: con un backend compartido (Redis/Memcached) el lock vale entre nodos
+    if not cache.add(PURGA_LOCK_KEY, token, PURGA_LOCK_TIMEOUT):
+        return False
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [PURGA_ADVISORY_LOCK])
+            if not cursor.fetchone()[0]:
+                cache.delete(PURGA_LOCK_KEY)
+                return False
+    return True
+
+def _renovar_lock(token):
+    """Extiende el lease si sigue siendo nuestro; retorna False si expiró y otro proceso lo tomó."""
+    if cache.get(PURGA_LOCK_KEY) == token:
+        return cache.touch(PURGA_LOCK_KEY, PURGA_LOCK_TIMEOUT)
+    # Expiró sin que nadie lo tomara: recuperarlo
+    return cache.add(PURGA_LOCK_KEY, token, PURGA_LOCK_TIMEOUT)
+
+def _liberar_lock(token):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [PURGA_ADVISORY_LOCK])
+    # Liberar el lock de la cache solo si sigue siendo nuestro
+    if cache.get(PURGA_LOCK_KEY) == token:
+        cache.delete(PURGA_LOCK_KEY)
+
+def purgar_horarios_pasados(ahora=None, tamano_lote=PURGA_TAMANO_LOTE):
+    """
+    Elimina los horarios vencidos (y sus reservas) en lotes acotados por clave primaria.
+    Solo un proceso a la vez puede purgar: si otro ya tiene el lock retorna None. El lease del lock
+    se renueva en cada lote y la purga se detiene si lo pierde.
+    Retorna un diccionario con la cantidad de horarios, reservas y lotes eliminados.
+    """
+    token = uuid.uuid4().hex
+    if not _tomar_lock(token):
+        logger.info("Purga de horarios omitida: otro proceso tiene el lock.")
+        return None
+    
+    resultado = {'horarios': 0, 'reservas': 0, 'lotes': 0}
+    try:
+        filtro = filtro_horarios_pasados(ahora)
+        ultimo_id = 0
+        while True:
+            lote = list(
+                Horario.objects.filter(filtro, id__gt=ultimo_id)
+                .order_by('id')
+                .values_list('id', 'cancha_id')[:tamano_lote]
+            )
+            if not lote:
+                break
+            horario_ids = [horario_id for horario_id, _ in lote]
+            cancha_ids = {cancha_id for _, cancha_id in lote}
+            with transaction.atomic():
+                horarios, reservas = _eliminar_lote(horario_ids)
+                # El DELETE directo no emite señales: actualizar la disponibilidad y la grilla aquí
+                recalcular_disponibilidad_canchas(cancha_ids)
+                for cancha_id in cancha_ids:
+                    horarios_modificados(cancha_id)
+            resultado['horarios'] += horarios
+            resultado['reservas'] += reservas
+            resultado['lotes'] += 1
+            ultimo_id = horario_ids[-1]
+            if not _renovar_lock(token):
+                logger.warning("Purga de horarios interrumpida: otro proceso tomó el lock.")
+                break
+    finally:
+        _liberar_lock(token)
+    
+    logger.info(
+        "Purga de horarios: %(horarios)s horarios y %(reservas)s reservas eliminados en %(lotes)s lotes.",
+        resultado
+    )
+    return resultado
@@ -1,9 +1,14 @@
 from django.core.exceptions import ValidationError
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from apps.cancha.models import Cancha
 from .serializer import HorarioSerializer
-from .models import Horario
+from .models import Horario, PlantillaHorario
+from .busqueda import validar_parametros_busqueda, buscar_horarios_libres
+from .publicacion import horario_semanal, validar_rango, publicar_horarios, validar_edicion, editar_horarios
 
 # ViewSet para la API REST
 class HorarioViewSet(viewsets.ModelViewSet):
@@ -36,4 +41,70 @@ class HorarioViewSet(viewsets.ModelViewSet):
         return super(HorarioViewSet, self).create(request, *args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
-        return super(HorarioViewSet, self).destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super(HorarioViewSet, self).destroy(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['get'])
+    def libres(self, request):
+        """Rangos libres de todas las canchas: ?dia=&hora_inicio=&hora_fin=&duracion=&distrito="""
+        parametros, error = validar_parametros_busqueda(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        resultados = buscar_horarios_libres(**parametros)
+        return Response([
+            {
+                'cancha': resultado['cancha']['id'],
+                'nombre': resultado['cancha']['nombre'],
+                'slug': resultado['cancha']['slug'],
+                'horario': resultado['horario'],
+                'libres': [
+                    {'hora_inicio': inicio.strftime('%H:%M'), 'hora_fin': fin.strftime('%H:%M')}
+                    for inicio, fin in resultado['libres']
+                ],
+            }
+            for resultado in resultados
+        ])
+    
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Crea los horarios de un rango de fechas a partir de una plantilla semanal:
+        {"cancha": id, "desde": "YYYY-MM-DD", "hasta": "YYYY-MM-DD", "plantilla": id}
+        o con los bloques en línea: "bloques": [{"dias": [0, 1, 2, 3, 4], "hora_inicio": "16:00", "hora_fin": "23:00"}].
+        """
+        cancha = get_object_or_404(Cancha, id=request.data.get('cancha'), responsable=request.user)
+        rango, error = validar_rango(request.data.get('desde'), request.data.get('hasta'))
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        if request.data.get('plantilla'):
+            plantilla = get_object_or_404(PlantillaHorario, id=request.data.get('plantilla'), cancha=cancha)
+            semanal, error = plantilla.horario_semanal(), None
+        else:
+            semanal, error = horario_semanal(request.data.get('bloques') or [])
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            resultado = publicar_horarios(cancha.id, *rango, semanal)
+        except ValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'creados': self.get_serializer(resultado['creados'], many=True).data,
+            'existentes': resultado['existentes'],
+            'omitidos': [{'dia': dia, 'detalle': motivo} for dia, motivo in resultado['omitidos']],
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def editar(self, request):
+        """
+        Cambia las horas de los horarios de un rango de días:
+        {"cancha": id, "desde": "YYYY-MM-DD", "hasta": "YYYY-MM-DD", "dias_semana": [5, 6], "hora_inicio": "08:00", "hora_fin": "23:59"}.
+        Responde 409 con las reservas en conflicto si alguna quedaría fuera del nuevo rango.
+        """
+        cancha = get_object_or_404(Cancha, id=request.data.get('cancha'), responsable=request.user)
+        parametros, error = validar_edicion(request.data)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        resultado = editar_horarios(cancha.id, **parametros)
+        if resultado['conflictos']:
+            return Response(resultado, status=status.HTTP_409_CONFLICT)
+        return Response(resultado)
\ No newline at end of file
@@ -1,9 +1,22 @@
 from django.contrib import admin
-from .models import Reserva
+from .models import Reserva, ReservaRecurrente, ExcepcionReservaRecurrente
 
 class ReservaAdmin(admin.ModelAdmin):
-    list_display = ['usuario', 'horario', 'hora_reserva_inicio', 'hora_reserva_fin', 'fecha_reserva']
+    list_display = ['usuario', 'horario', 'hora_reserva_inicio', 'hora_reserva_fin', 'fecha_reserva', 'recurrente']
     list_filter = ['horario__cancha', 'horario__dia', 'usuario']
     search_fields = ['usuario__email', 'horario__cancha__nombre']
 
-admin.site.register(Reserva, ReservaAdmin)
\ No newline at end of file
+admin.site.register(Reserva, ReservaAdmin)
+
+class ExcepcionReservaRecurrenteInline(admin.TabularInline):
+    model = ExcepcionReservaRecurrente
+    extra = 0
+
+class ReservaRecurrenteAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'cancha', 'dia_semana', 'hora_inicio', 'hora_fin', 'fecha_inicio', 'fecha_fin', 'materializada_hasta']
+    list_filter = ['cancha', 'dia_semana']
+    search_fields = ['usuario__email', 'cancha__nombre']
+    readonly_fields = ['materializada_hasta']
+    inlines = [ExcepcionReservaRecurrenteInline]
+
+admin.site.register(ReservaRecurrente, ReservaRecurrenteAdmin)
\ No newline at end of file
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReservaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reserva'
+    
+    def ready(self):
+        from .restricciones import instalar_restriccion_solapamiento
+        post_migrate.connect(instalar_restriccion_solapamiento, sender=self)
@@ -0,0 +1,92 @@
+import random
+import threading
+import time as reloj
+from datetime import date, time, timedelta
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from apps.cancha.models import Cancha
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva
+from apps.reserva.restricciones import instalar_restriccion_solapamiento
+from apps.reserva.servicio import crear_reserva
+from apps.usuario.models import Usuario
+
+class Command(BaseCommand):
+    help = 'Mide crear_reserva con N hilos reservando en paralelo el mismo horario y verifica que no haya solapamientos'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Cantidad de hilos reservando en paralelo')
+        parser.add_argument('--intentos', type=int, default=25, help='Intentos de reserva por hilo')
+        parser.add_argument('--semilla', type=int, default=None, help='Semilla para los rangos aleatorios')
+    
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        # Idempotente: asegura la restricción aunque la base no se haya creado con migrate
+        instalar_restriccion_solapamiento()
+        Group.objects.get_or_create(name='Cliente')
+        Group.objects.get_or_create(name='Responsable')
+        marca = reloj.time_ns() % 10**8
+        usuario = Usuario.objects.create_user(
+            email=f'benchmark{marca}@example.com', dni=f'{marca:08d}', nombre='Benchmark',
+            apellidos='Reservas', celular=f'9{marca:08d}', password=None
+        )
+        try:
+            cancha = Cancha.objects.create(nombre=f'Benchmark {marca}', responsable=usuario)
+            horario = Horario.objects.create(cancha=cancha, dia=date.today() + timedelta(days=1), hora_inicio=time(0, 0), hora_fin=time(23, 59))
+            resultados = self._ejecutar(usuario, horario.id, options['hilos'], options['intentos'])
+            self._reportar(horario, resultados)
+        finally:
+            usuario.delete()
+    
+    def _ejecutar(self, usuario, horario_id, hilos, intentos):
+        resultados = {'creadas': 0, 'rechazadas': 0, 'reintentos': 0}
+        candado = threading.Lock()
+        
+        def reservar():
+            locales = {'creadas': 0, 'rechazadas': 0, 'reintentos': 0}
+            try:
+                for _ in range(intentos):
+                    # Rangos de una hora que empiezan cada 30 minutos: muchos se solapan entre hilos
+                    inicio = random.randrange(0, 46) * 30
+                    hora_inicio = time(inicio // 60, inicio % 60)
+                    hora_fin = time((inicio + 60) // 60, (inicio + 60) % 60)
+                    while True:
+                        try:
+                            crear_reserva(usuario, horario_id, hora_inicio, hora_fin)
+                            locales['creadas'] += 1
+                        except ValidationError:
+                            locales['rechazadas'] += 1
+                        except OperationalError:
+                            # SQLite: la base estaba bloqueada por otro escritor más tiempo que el timeout
+                            locales['reintentos'] += 1
+                            reloj.sleep(0.01)
+                            continue
+                        break
+            finally:
+                connection.close()
+                with candado:
+                    for clave, valor in locales.items():
+                        resultados[clave] += valor
+        
+        inicio = reloj.perf_counter()
+        trabajadores = [threading.Thread(target=reservar) for _ in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        resultados['segundos'] = reloj.perf_counter() - inicio
+        resultados['hilos'] = hilos
+        return resultados
+    
+    def _reportar(self, horario, resultados):
+        reservas = list(Reserva.objects.filter(horario=horario).order_by('hora_reserva_inicio').values_list('hora_reserva_inicio', 'hora_reserva_fin'))
+        solapamientos = sum(1 for anterior, actual in zip(reservas, reservas[1:]) if actual[0] < anterior[1])
+        total = resultados['creadas'] + resultados['rechazadas']
+        self.stdout.write(f"Hilos: {resultados['hilos']}")
+        self.stdout.write(f"Intentos: {total} (creadas: {resultados['creadas']}, rechazadas por conflicto: {resultados['rechazadas']}, reintentos por bloqueo: {resultados['reintentos']})")
+        self.stdout.write(f"Tiempo: {resultados['segundos']:.3f} s, rendimiento: {total / resultados['segundos']:.1f} intentos/s")
+        self.stdout.write(f"Reservas en la base: {len(reservas)}")
+        estilo = self.style.SUCCESS if solapamientos == 0 and len(reservas) == resultados['creadas'] else self.style.ERROR
+        self.stdout.write(estilo(f"Reservas solapadas: {solapamientos}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.reserva.recurrentes import materializar_pendientes, VENTANA_DIAS
+
+class Command(BaseCommand):
+    help = 'Genera las reservas concretas de las reservas recurrentes dentro de la ventana móvil'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--ventana', type=int, default=VENTANA_DIAS, help='Días hacia adelante a materializar')
+    
+    def handle(self, *args, **options):
+        resultados = materializar_pendientes(ventana_dias=options['ventana'])
+        for recurrente, resultado in resultados.items():
+            self.stdout.write(f"{recurrente}: {len(resultado['creadas'])} reservas creadas.")
+            for dia, motivo in resultado['omitidas']:
+                self.stdout.write(self.style.WARNING(f"  {dia}: omitida. {motivo}"))
+        self.stdout.write(self.style.SUCCESS(f'Reglas procesadas: {len(resultados)}.'))
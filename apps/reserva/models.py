@@ -1,8 +1,49 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from datetime import time
-from apps.horario.models import Horario
+from apps.cancha.models import Cancha
+from apps.horario.models import DIAS_SEMANA, Horario
+from apps.horario.ocupacion import Ocupacion
+
+class ReservaRecurrente(models.Model):
+    DIAS_SEMANA = DIAS_SEMANA
+    
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservas_recurrentes')
+    cancha = models.ForeignKey(Cancha, on_delete=models.CASCADE, related_name='reservas_recurrentes')
+    dia_semana = models.PositiveSmallIntegerField('Día de la semana', choices=DIAS_SEMANA)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    fecha_inicio = models.DateField('Desde')
+    fecha_fin = models.DateField('Hasta')
+    # Última fecha hasta la que ya se generaron reservas concretas
+    materializada_hasta = models.DateField(blank=True, null=True)
+    fecha_creacion = models.DateField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Reserva recurrente'
+        verbose_name_plural = 'Reservas recurrentes'
+    
+    def __str__(self):
+        return f'{self.usuario} reserva {self.cancha.nombre} los {self.get_dia_semana_display()} de {self.hora_inicio} a {self.hora_fin}'
+    
+    def clean(self):
+        if self.hora_inicio >= self.hora_fin:
+            raise ValidationError("La hora de inicio debe ser anterior a la hora de fin.")
+        if self.fecha_inicio > self.fecha_fin:
+            raise ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+
+class ExcepcionReservaRecurrente(models.Model):
+    recurrente = models.ForeignKey(ReservaRecurrente, on_delete=models.CASCADE, related_name='excepciones')
+    dia = models.DateField()
+    
+    class Meta:
+        verbose_name = 'Excepción de reserva recurrente'
+        verbose_name_plural = 'Excepciones de reservas recurrentes'
+        unique_together = ['recurrente', 'dia']
+    
+    def __str__(self):
+        return f'{self.recurrente} - sin reserva el {self.dia}'
 
 class Reserva(models.Model):
     usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservas')
@@ -10,6 +51,7 @@ class Reserva(models.Model):
     hora_reserva_inicio = models.TimeField()
     hora_reserva_fin = models.TimeField()
     fecha_reserva = models.DateField(auto_now_add=True)
+    recurrente = models.ForeignKey(ReservaRecurrente, on_delete=models.SET_NULL, related_name='reservas', blank=True, null=True)
     
     class Meta:
         verbose_name = 'Reserva'
@@ -31,16 +73,22 @@ class Reserva(models.Model):
             raise ValidationError("La hora reserva de inicio debe ser anterior a la hora reserva de fin.")
         
         # Validación: Evitar reservas cruzadas en el mismo horario
-        reservas_conflictivas = Reserva.objects.filter(
-            horario__cancha=self.horario.cancha,
-            horario__dia=self.horario.dia,
-            hora_reserva_inicio__lt=hora_reserva_fin,
-            hora_reserva_fin__gt=hora_reserva_inicio
-        ).exclude(id=self.id)
+        reservas_dia = Reserva.objects.filter(
+            horario__cancha_id=self.horario.cancha_id,
+            horario__dia=self.horario.dia
+        ).exclude(id=self.id).values_list('hora_reserva_inicio', 'hora_reserva_fin')
+        ocupacion = Ocupacion.de_horario(self.horario, reservas_dia)
         
-        if reservas_conflictivas.exists():
+        if ocupacion.reservado_en(hora_reserva_inicio, hora_reserva_fin):
             raise ValidationError("El horario seleccionado ya está reservado. Elige otro horario.")
     
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+    def save(self, *args, validar=True, **kwargs):
+        if not validar:
+            # El llamador ya validó la reserva con el horario bloqueado (ver apps.reserva.servicio)
+            super().save(*args, **kwargs)
+            return
+        # Validar e insertar en una misma transacción con el horario bloqueado
+        with transaction.atomic(using=kwargs.get('using')):
+            self.horario = Horario.objects.bloquear(self.horario_id)
+            self.clean()
+            super().save(*args, **kwargs)
\ No newline at end of file
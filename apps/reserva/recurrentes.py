@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Least
+from django.core.exceptions import ValidationError
+from apps.cancha.disponibilidad import actualizar_disponibilidad
+from apps.horario.grilla import horarios_modificados
+from apps.horario.models import Horario
+from apps.horario.ocupacion import Ocupacion
+from .models import Reserva, ReservaRecurrente
+
+# Cuántos días hacia adelante se generan reservas concretas en cada ejecución
+VENTANA_DIAS = 28
+
+def ocurrencias(recurrente, desde, hasta):
+    """Fechas de la regla entre desde y hasta (inclusive), sin las excepciones."""
+    desde = max(desde, recurrente.fecha_inicio)
+    hasta = min(hasta, recurrente.fecha_fin)
+    if desde > hasta:
+        return []
+    excepciones = set(recurrente.excepciones.filter(dia__range=(desde, hasta)).values_list('dia', flat=True))
+    # Primera fecha de la ventana que cae en el día de la semana de la regla
+    dia = desde + timedelta(days=(recurrente.dia_semana - desde.weekday()) % 7)
+    fechas = []
+    while dia <= hasta:
+        if dia not in excepciones:
+            fechas.append(dia)
+        dia += timedelta(days=7)
+    return fechas
+
+def materializar(recurrente, ventana_dias=VENTANA_DIAS, hoy=None):
+    """
+    Genera las reservas concretas de la regla hasta hoy + ventana_dias, continuando desde
+    donde quedó la ejecución anterior. Los horarios y las reservas de todas las ocurrencias
+    se consultan con una consulta de rango cada uno y las reservas se insertan con bulk_create.
+    materializada_hasta solo avanza hasta el día anterior a la primera fecha omitida (sin horario
+    o en conflicto), para reintentarla en la próxima ejecución; las fechas que ya tienen la
+    reserva de la regla no se repiten.
+    Retorna {'creadas': [Reserva, ...], 'omitidas': [(fecha, motivo), ...]}.
+    """
+    hoy = hoy or date.today()
+    desde = max(recurrente.fecha_inicio, hoy)
+    if recurrente.materializada_hasta:
+        desde = max(desde, recurrente.materializada_hasta + timedelta(days=1))
+    hasta = min(recurrente.fecha_fin, hoy + timedelta(days=ventana_dias))
+    resultado = {'creadas': [], 'omitidas': []}
+    if desde > hasta:
+        return resultado
+    
+    fechas = ocurrencias(recurrente, desde, hasta)
+    with transaction.atomic():
+        horario_ids = Horario.objects.filter(
+            cancha_id=recurrente.cancha_id, dia__in=fechas
+        ).values_list('id', flat=True)
+        horarios = {horario.dia: horario for horario in Horario.objects.bloquear_varios(list(horario_ids)).values()}
+        reservas = Reserva.objects.filter(
+            horario__cancha_id=recurrente.cancha_id,
+            horario__dia__range=(desde, hasta),
+            hora_reserva_inicio__lt=recurrente.hora_fin,
+            hora_reserva_fin__gt=recurrente.hora_inicio
+        ).values_list('horario__dia', 'hora_reserva_inicio', 'hora_reserva_fin', 'recurrente_id')
+        reservas_por_dia, materializadas = {}, set()
+        for dia, inicio, fin, recurrente_id in reservas:
+            reservas_por_dia.setdefault(dia, []).append((inicio, fin))
+            if recurrente_id == recurrente.pk:
+                materializadas.add(dia)
+        
+        nuevas = []
+        for dia in fechas:
+            if dia in materializadas:
+                # Ya generada en una ejecución anterior que se reintenta desde una fecha omitida
+                continue
+            horario = horarios.get(dia)
+            if horario is None:
+                resultado['omitidas'].append((dia, "La cancha no tiene horario ese día."))
+                continue
+            ocupacion = Ocupacion.de_horario(horario, reservas_por_dia.get(dia, []))
+            if not ocupacion.programado_en(recurrente.hora_inicio, recurrente.hora_fin):
+                resultado['omitidas'].append((dia, "La reserva debe estar dentro del horario disponible."))
+            elif ocupacion.reservado_en(recurrente.hora_inicio, recurrente.hora_fin):
+                resultado['omitidas'].append((dia, "El horario ya está reservado."))
+            else:
+                nuevas.append(Reserva(
+                    usuario_id=recurrente.usuario_id,
+                    horario=horario,
+                    hora_reserva_inicio=recurrente.hora_inicio,
+                    hora_reserva_fin=recurrente.hora_fin,
+                    recurrente=recurrente,
+                ))
+        
+        if nuevas:
+            try:
+                with transaction.atomic():
+                    resultado['creadas'] = Reserva.objects.bulk_create(nuevas)
+            except IntegrityError:
+                raise ValidationError("Otra reserva ocupó el horario durante la generación. Intente nuevamente.")
+        if resultado['omitidas']:
+            hasta = resultado['omitidas'][0][0] - timedelta(days=1)
+        ReservaRecurrente.objects.filter(pk=recurrente.pk).update(materializada_hasta=hasta)
+        recurrente.materializada_hasta = hasta
+        
+        # bulk_create no emite señales
+        if resultado['creadas']:
+            actualizar_disponibilidad(recurrente.cancha_id)
+            horarios_modificados(recurrente.cancha_id)
+    return resultado
+
+def materializar_pendientes(ventana_dias=VENTANA_DIAS, hoy=None):
+    """Extiende la ventana de todas las reglas vigentes. Retorna {regla: resultado}."""
+    hoy = hoy or date.today()
+    limite = hoy + timedelta(days=ventana_dias)
+    reglas = ReservaRecurrente.objects.filter(fecha_fin__gte=hoy).exclude(
+        materializada_hasta__gte=Least('fecha_fin', Value(limite))
+    )
+    return {recurrente: materializar(recurrente, ventana_dias, hoy) for recurrente in reglas.select_related('cancha')}
@@ -0,0 +1,55 @@
+import logging
+from django.db import connections
+from .models import Reserva
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_RESTRICCION = 'reserva_sin_solapamiento'
+
+def _sql_sqlite(tabla):
+    # SQLite guarda TimeField como texto HH:MM:SS, por lo que la comparación de cadenas es válida
+    condicion = (
+        f'SELECT 1 FROM {tabla} WHERE horario_id = NEW.horario_id '
+        'AND hora_reserva_inicio < NEW.hora_reserva_fin '
+        'AND hora_reserva_fin > NEW.hora_reserva_inicio'
+    )
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {NOMBRE_RESTRICCION}_insert BEFORE INSERT ON {tabla} '
+        f'WHEN EXISTS ({condicion}) '
+        f"BEGIN SELECT RAISE(ABORT, '{NOMBRE_RESTRICCION}'); END",
+        f'CREATE TRIGGER IF NOT EXISTS {NOMBRE_RESTRICCION}_update BEFORE UPDATE ON {tabla} '
+        f'WHEN EXISTS ({condicion} AND id != NEW.id) '
+        f"BEGIN SELECT RAISE(ABORT, '{NOMBRE_RESTRICCION}'); END",
+    ]
+
+def _sql_postgresql(tabla):
+    # Restricción de exclusión: mismo horario y rangos de horas que se solapan
+    return [
+        'CREATE EXTENSION IF NOT EXISTS btree_gist',
+        f'''DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{NOMBRE_RESTRICCION}') THEN
+                ALTER TABLE {tabla} ADD CONSTRAINT {NOMBRE_RESTRICCION} EXCLUDE USING gist (
+                    horario_id WITH =,
+                    tsrange(DATE '2000-01-01' + hora_reserva_inicio, DATE '2000-01-01' + hora_reserva_fin) WITH &&
+                );
+            END IF;
+        END $$''',
+    ]
+
+def instalar_restriccion_solapamiento(using='default', **kwargs):
+    """
+    Crea en la base la restricción que impide dos reservas solapadas en un mismo horario.
+    Se ejecuta después de migrate; es idempotente. Otros motores se omiten.
+    """
+    connection = connections[using]
+    tabla = connection.ops.quote_name(Reserva._meta.db_table)
+    if connection.vendor == 'sqlite':
+        sentencias = _sql_sqlite(tabla)
+    elif connection.vendor == 'postgresql':
+        sentencias = _sql_postgresql(tabla)
+    else:
+        logger.warning("Restricción de no solapamiento no disponible para %s.", connection.vendor)
+        return
+    with connection.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
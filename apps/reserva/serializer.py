@@ -1,12 +1,12 @@
 from rest_framework import serializers
-from .models import Reserva
+from .models import Reserva, ReservaRecurrente
 from django.core.exceptions import ValidationError
 
 class ReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reserva
-        fields = ['id', 'usuario', 'horario', 'hora_reserva_inicio', 'hora_reserva_fin', 'fecha_reserva']
-        read_only_fields = ['fecha_reserva']
+        fields = ['id', 'usuario', 'horario', 'hora_reserva_inicio', 'hora_reserva_fin', 'fecha_reserva', 'recurrente']
+        read_only_fields = ['fecha_reserva', 'recurrente']
     
     def validate(self, data):
         reserva = Reserva(**data)
@@ -15,4 +15,30 @@ class ReservaSerializer(serializers.ModelSerializer):
         except ValidationError as e:
             raise serializers.ValidationError(e.message_dict)
         
-        return data
\ No newline at end of file
+        return data
+
+class ReservaRecurrenteSerializer(serializers.ModelSerializer):
+    excepciones = serializers.ListField(child=serializers.DateField(), write_only=True, required=False)
+    
+    class Meta:
+        model = ReservaRecurrente
+        fields = ['id', 'usuario', 'cancha', 'dia_semana', 'hora_inicio', 'hora_fin', 'fecha_inicio', 'fecha_fin', 'materializada_hasta', 'excepciones']
+        read_only_fields = ['usuario', 'materializada_hasta']
+    
+    def validate(self, data):
+        datos = {clave: valor for clave, valor in data.items() if clave != 'excepciones'}
+        recurrente = ReservaRecurrente(**datos)
+        try:
+            recurrente.clean()
+        except ValidationError as e:
+            raise serializers.ValidationError(e.message_dict if hasattr(e, 'error_dict') else {'detail': e.messages})
+        
+        return data
+    
+    def create(self, validated_data):
+        excepciones = validated_data.pop('excepciones', [])
+        recurrente = super().create(validated_data)
+        recurrente.excepciones.bulk_create([
+            recurrente.excepciones.model(recurrente=recurrente, dia=dia) for dia in set(excepciones)
+        ])
+        return recurrente
\ No newline at end of file
@@ -0,0 +1,102 @@
+from datetime import time
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from apps.cancha.disponibilidad import actualizar_disponibilidad
+from apps.horario.grilla import horarios_modificados
+from apps.horario.models import Horario
+from apps.horario.ocupacion import Ocupacion
+from .models import Reserva
+
+MENSAJE_RESERVADO = "El horario seleccionado ya está reservado. Elige otro horario."
+
+def _a_hora(valor):
+    return valor if isinstance(valor, time) else time.fromisoformat(valor)
+
+def crear_reserva(usuario, horario_id, hora_reserva_inicio, hora_reserva_fin, cancha_id=None):
+    """
+    Crea una reserva verificando conflictos e insertando en una sola transacción corta.
+    El horario queda bloqueado (lock de fila en PostgreSQL, lock de escritura en SQLite)
+    y la restricción de no solapamiento de la base cubre cualquier carrera restante.
+    Lanza Horario.DoesNotExist si el horario no existe (o no es de cancha_id) y ValidationError
+    si la reserva no es válida o choca con otra.
+    """
+    hora_reserva_inicio = _a_hora(hora_reserva_inicio)
+    hora_reserva_fin = _a_hora(hora_reserva_fin)
+    with transaction.atomic():
+        horario = Horario.objects.bloquear(horario_id)
+        if cancha_id is not None and horario.cancha_id != cancha_id:
+            raise Horario.DoesNotExist
+        reserva = Reserva(
+            usuario=usuario,
+            horario=horario,
+            hora_reserva_inicio=hora_reserva_inicio,
+            hora_reserva_fin=hora_reserva_fin,
+        )
+        reserva.clean()
+        try:
+            # Savepoint: si la restricción de la base rechaza la fila, la transacción sigue usable
+            with transaction.atomic():
+                reserva.save(validar=False)
+        except IntegrityError:
+            raise ValidationError(MENSAJE_RESERVADO)
+    return reserva
+
+def crear_reservas(usuario, items, atomico=True, cancha_id=None):
+    """
+    Crea varias reservas en una transacción. items es una lista de diccionarios con
+    horario, hora_reserva_inicio y hora_reserva_fin. Los conflictos con reservas existentes
+    y entre los propios items se verifican contra una sola consulta.
+    Si atomico es True basta un item inválido para no crear ninguno; si es False se crean
+    los válidos. Retorna (reservas_creadas, errores) con errores = [{'item': i, 'detalle': ...}].
+    """
+    errores = []
+    solicitadas = []
+    for indice, item in enumerate(items):
+        try:
+            horario_id = int(item.get('horario'))
+            inicio = _a_hora(item.get('hora_reserva_inicio'))
+            fin = _a_hora(item.get('hora_reserva_fin'))
+        except (AttributeError, TypeError, ValueError):
+            errores.append({'item': indice, 'detalle': "Datos de reserva inválidos."})
+            continue
+        solicitadas.append((indice, horario_id, inicio, fin))
+    
+    with transaction.atomic():
+        horarios = Horario.objects.bloquear_varios({horario_id for _, horario_id, _, _ in solicitadas})
+        reservas = Reserva.objects.filter(horario_id__in=horarios.keys()).values_list(
+            'horario_id', 'hora_reserva_inicio', 'hora_reserva_fin'
+        )
+        ocupaciones = {horario_id: Ocupacion.de_horario(horario) for horario_id, horario in horarios.items()}
+        for horario_id, inicio, fin in reservas:
+            ocupaciones[horario_id].reservar(inicio, fin)
+        
+        nuevas = []
+        for indice, horario_id, inicio, fin in solicitadas:
+            horario = horarios.get(horario_id)
+            if horario is None or (cancha_id is not None and horario.cancha_id != cancha_id):
+                errores.append({'item': indice, 'detalle': "El horario no existe."})
+            elif inicio >= fin:
+                errores.append({'item': indice, 'detalle': "La hora reserva de inicio debe ser anterior a la hora reserva de fin."})
+            elif not ocupaciones[horario_id].programado_en(inicio, fin):
+                errores.append({'item': indice, 'detalle': "La reserva debe estar dentro del horario disponible."})
+            elif ocupaciones[horario_id].reservado_en(inicio, fin):
+                errores.append({'item': indice, 'detalle': MENSAJE_RESERVADO})
+            else:
+                # Marcar el rango para detectar conflictos entre items del mismo lote
+                ocupaciones[horario_id].reservar(inicio, fin)
+                nuevas.append(Reserva(usuario=usuario, horario=horario, hora_reserva_inicio=inicio, hora_reserva_fin=fin))
+        errores.sort(key=lambda error: error['item'])
+        if not nuevas or (atomico and errores):
+            return [], errores
+        
+        try:
+            with transaction.atomic():
+                creadas = Reserva.objects.bulk_create(nuevas)
+        except IntegrityError:
+            raise ValidationError(MENSAJE_RESERVADO)
+        
+        # bulk_create no emite señales: actualizar disponibilidad y grilla de las canchas afectadas
+        for cancha in {reserva.horario.cancha_id for reserva in creadas}:
+            actualizar_disponibilidad(cancha)
+            horarios_modificados(cancha)
+    return creadas, errores
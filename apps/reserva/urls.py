@@ -4,6 +4,7 @@ from . import views
 
 router = routers.DefaultRouter()
 router.register(r'reservas', views.ReservaViewSet)
+router.register(r'recurrentes', views.ReservaRecurrenteViewSet, basename='reservarecurrente')
 
 urlpatterns = [
     # Rutas relacionadas con la API REST
@@ -7,14 +7,16 @@ from django.http import HttpResponseRedirect
 from django.contrib import messages
 from django.urls import reverse
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .serializer import ReservaSerializer
+from .serializer import ReservaSerializer, ReservaRecurrenteSerializer
 from apps.horario.models import Horario
-from .models import Reserva
-from datetime import timedelta, datetime, time
-from itertools import groupby
-from operator import attrgetter
+from apps.horario.grilla import obtener_dias_horarios_cache
+from .models import Reserva, ReservaRecurrente
+from .servicio import crear_reserva, crear_reservas
+from .recurrentes import materializar
+from datetime import datetime
 
 class ReservaViewSet(viewsets.ModelViewSet):
     serializer_class = ReservaSerializer
@@ -22,81 +24,73 @@ class ReservaViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def create(self, request, *args, **kwargs):
-        horario_id = request.data.get('horario')
-        hora_reserva_inicio = request.data.get('hora_reserva_inicio')
-        hora_reserva_fin = request.data.get('hora_reserva_fin')
-        # Crear instancia de Reserva para validación
-        reserva = Reserva(
-            usuario=request.user,
-            horario_id=horario_id,
-            hora_reserva_inicio=hora_reserva_inicio,
-            hora_reserva_fin=hora_reserva_fin
-        )
         try:
-            reserva.clean()
-        except ValidationError as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            reserva = crear_reserva(
+                usuario=request.user,
+                horario_id=request.data.get('horario'),
+                hora_reserva_inicio=request.data.get('hora_reserva_inicio'),
+                hora_reserva_fin=request.data.get('hora_reserva_fin')
+            )
+        except Horario.DoesNotExist:
+            return Response({"detail": "El horario no existe."}, status=status.HTTP_400_BAD_REQUEST)
+        except (ValidationError, ValueError, TypeError) as e:
+            return Response({"detail": " ".join(getattr(e, 'messages', [str(e)]))}, status=status.HTTP_400_BAD_REQUEST)
         
-        return super(ReservaViewSet, self).create(request, *args, **kwargs)
+        serializer = self.get_serializer(reserva)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     def destroy(self, request, *args, **kwargs):
         return super(ReservaViewSet, self).destroy(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['post'])
+    def multiple(self, request):
+        """
+        Crea varias reservas en una sola transacción.
+        Cuerpo: {"reservas": [{"horario", "hora_reserva_inicio", "hora_reserva_fin"}, ...], "atomico": true}
+        """
+        items = request.data.get('reservas')
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Debe enviar una lista de reservas."}, status=status.HTTP_400_BAD_REQUEST)
+        atomico = request.data.get('atomico', True) not in (False, 'false', '0', 0)
+        try:
+            creadas, errores = crear_reservas(request.user, items, atomico=atomico)
+        except ValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=status.HTTP_409_CONFLICT)
+        
+        if not creadas:
+            return Response({"reservas": [], "errores": errores}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(creadas, many=True)
+        return Response({"reservas": serializer.data, "errores": errores}, status=status.HTTP_201_CREATED)
 
-def obtener_dias_horarios_reserva(reserva):
-    horarios = Horario.objects.filter(cancha=reserva.horario.cancha).order_by('dia', 'hora_inicio')
-    today = datetime.now().date()
+class ReservaRecurrenteViewSet(viewsets.ModelViewSet):
+    serializer_class = ReservaRecurrenteSerializer
+    permission_classes = [IsAuthenticated]
     
-    dias_horarios = []
-    for dia, horarios_dia in groupby(horarios, key=attrgetter('dia')):
-        horarios_dia = list(horarios_dia)
-        horas_dia = []
-        for h in range(24):
-            hora_inicio = time(hour=h, minute=0)
-            if h == 23:
-                hora_fin = time(hour=23, minute=59)
-            else:
-                hora_fin = (datetime.combine(today, hora_inicio) + timedelta(hours=1)).time()
-            
-            # Verificar si el bloque coincide con un horario creado
-            horario_encontrado = next(
-                (horario for horario in horarios_dia if horario.hora_inicio <= hora_inicio < horario.hora_fin),
-                None
-            )
-            if horario_encontrado:
-                # Verificar si está reservado
-                reservado = Reserva.objects.filter(
-                    horario=horario_encontrado,
-                    hora_reserva_inicio=hora_inicio,
-                    hora_reserva_fin=hora_fin
-                )
-                if reservado:
-                    estado = "rojo"  # Reservado
-                else:
-                    estado = "verde"  # Disponible
-            else:
-                estado = "gris"  # Sin horario
-            
-            horas_dia.append({
-                "id": horario_encontrado.id if horario_encontrado else None,
-                "hora_inicio": hora_inicio.strftime('%H:%M'),
-                "hora_fin": hora_fin.strftime('%H:%M'),
-                "estado": estado,
-            })
+    def get_queryset(self):
+        return ReservaRecurrente.objects.filter(usuario=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recurrente = serializer.save(usuario=request.user)
+        # Generar de inmediato las reservas de la primera ventana e informar las omitidas
+        try:
+            resultado = materializar(recurrente)
+        except ValidationError as e:
+            recurrente.delete()
+            return Response({"detail": " ".join(e.messages)}, status=status.HTTP_409_CONFLICT)
         
-        dias_horarios.append({
-            "dia": dia.strftime('%Y-%m-%d'),
-            "horas": horas_dia,
-            "hora_inicio": horarios_dia[0].hora_inicio.strftime('%H:%M') if horarios_dia else None,
-            "hora_fin": horarios_dia[-1].hora_fin.strftime('%H:%M') if horarios_dia else None,
-        })
-    return dias_horarios
+        datos = self.get_serializer(recurrente).data
+        datos['reservas_creadas'] = [reserva.id for reserva in resultado['creadas']]
+        datos['omitidas'] = [{'dia': dia, 'detalle': motivo} for dia, motivo in resultado['omitidas']]
+        return Response(datos, status=status.HTTP_201_CREATED)
 
 @never_cache
 @login_required
 def detalle_reserva(request, reserva_id):
     try:
         reserva = Reserva.objects.select_related('horario__cancha').get(id=reserva_id, usuario=request.user)
-        dias_horarios = obtener_dias_horarios_reserva(reserva)
+        dias_horarios = obtener_dias_horarios_cache(reserva.horario.cancha)
     except Reserva.DoesNotExist:
         messages.error(request, "La reserva que intentas ver ya no existe.")
         return redirect('mis_reservas')
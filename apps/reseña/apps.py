@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReseñaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reseña'
+    
+    def ready(self):
+        import apps.reseña.signals
\ No newline at end of file
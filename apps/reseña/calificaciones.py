@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, F
+from apps.cancha.listado import invalidar_tarjetas
+from apps.cancha.models import CAMPOS_CALIFICACIONES, Cancha
+from .models import Reseña
+
+def registrar_calificacion(cancha_id, agregar=None, quitar=None):
+    """
+    Ajusta los agregados de la cancha al agregar y/o quitar una calificación (1 a 5) con un único
+    UPDATE atómico (expresiones F), sin leer la fila ni pasar por Cancha.save().
+    """
+    if cancha_id is None or agregar == quitar:
+        return
+    cambios = {}
+    
+    def sumar(campo, valor):
+        cambios[campo] = cambios.get(campo, F(campo)) + valor
+    
+    if agregar:
+        sumar('cantidad_calificaciones', 1)
+        sumar('suma_calificaciones', agregar)
+        sumar(f'estrellas_{agregar}', 1)
+    if quitar:
+        sumar('cantidad_calificaciones', -1)
+        sumar('suma_calificaciones', -quitar)
+        sumar(f'estrellas_{quitar}', -1)
+    Cancha.objects.filter(pk=cancha_id).update(**cambios)
+    transaction.on_commit(lambda: invalidar_tarjetas([cancha_id]))
+
+def recalcular_calificaciones():
+    """
+    Reconstruye los agregados e histogramas de todas las canchas a partir de las reseñas con un
+    solo GROUP BY por cancha y calificación. Retorna la cantidad de canchas corregidas.
+    """
+    agregados = {}
+    filas = Reseña.objects.values_list('cancha_id', 'calificacion').annotate(cantidad=Count('id')).order_by()
+    for cancha_id, calificacion, cantidad in filas:
+        valores = agregados.setdefault(cancha_id, dict.fromkeys(CAMPOS_CALIFICACIONES, 0))
+        valores['cantidad_calificaciones'] += cantidad
+        valores['suma_calificaciones'] += calificacion * cantidad
+        valores[f'estrellas_{calificacion}'] += cantidad
+    
+    corregidas = []
+    vacios = dict.fromkeys(CAMPOS_CALIFICACIONES, 0)
+    for cancha in Cancha.objects.only('id', *CAMPOS_CALIFICACIONES):
+        valores = agregados.get(cancha.id, vacios)
+        if any(getattr(cancha, campo) != valor for campo, valor in valores.items()):
+            for campo, valor in valores.items():
+                setattr(cancha, campo, valor)
+            corregidas.append(cancha)
+    Cancha.objects.bulk_update(corregidas, CAMPOS_CALIFICACIONES, batch_size=500)
+    if corregidas:
+        transaction.on_commit(lambda: invalidar_tarjetas([cancha.id for cancha in corregidas]))
+    return len(corregidas)
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from apps.reseña.calificaciones import recalcular_calificaciones
+
+class Command(BaseCommand):
+    help = 'Reconstruye la cantidad y la suma de calificaciones de todas las canchas a partir de sus reseñas'
+    
+    def handle(self, *args, **kwargs):
+        corregidas = recalcular_calificaciones()
+        self.stdout.write(self.style.SUCCESS(f'Calificaciones recalculadas. Canchas corregidas: {corregidas}.'))
\ No newline at end of file
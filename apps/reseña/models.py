@@ -13,6 +13,10 @@ class Reseña(models.Model):
         verbose_name = 'Reseña'
         verbose_name_plural = 'reseñas'
         unique_together = ('usuario', 'cancha')
+        indexes = [
+            # Paginación por cursor de las reseñas de una cancha
+            models.Index(fields=['cancha', '-fecha_creacion', '-id']),
+        ]
     
     def __str__(self):
         return f'{self.usuario} - {self.cancha} - {self.calificacion} estrellas'
\ No newline at end of file
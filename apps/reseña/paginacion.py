@@ -0,0 +1,38 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+from .models import Reseña
+
+RESEÑAS_POR_PAGINA = 10
+
+def codificar_cursor(reseña):
+    # Posición de la última reseña de la página: (fecha_creacion, id)
+    valor = f'{reseña.fecha_creacion.isoformat()}|{reseña.id}'
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha_creacion, id) o lanza ValueError si el cursor no es válido."""
+    try:
+        fecha, reseña_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(fecha), int(reseña_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Cursor inválido.') from e
+
+def paginar(reseñas, cursor=None, tamaño=RESEÑAS_POR_PAGINA):
+    """
+    Pagina un queryset de reseñas de la más reciente a la más antigua por (fecha_creacion, id):
+    cada página continúa después del cursor sin OFFSET, así el costo no crece con las páginas.
+    Retorna (reseñas, cursor de la página siguiente o None).
+    """
+    reseñas = reseñas.order_by('-fecha_creacion', '-id')
+    if cursor:
+        fecha, reseña_id = decodificar_cursor(cursor)
+        reseñas = reseñas.filter(Q(fecha_creacion__lt=fecha) | Q(fecha_creacion=fecha, id__lt=reseña_id))
+    # Una reseña extra indica si hay otra página
+    reseñas = list(reseñas[:tamaño + 1])
+    siguiente = codificar_cursor(reseñas[tamaño - 1]) if len(reseñas) > tamaño else None
+    return reseñas[:tamaño], siguiente
+
+def pagina_reseñas(cancha_id, cursor=None, tamaño=RESEÑAS_POR_PAGINA):
+    """Página de reseñas de una cancha con sus usuarios."""
+    return paginar(Reseña.objects.filter(cancha_id=cancha_id).select_related('usuario'), cursor, tamaño)
\ No newline at end of file
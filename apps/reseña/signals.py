@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Reseña
+from .calificaciones import registrar_calificacion
+
+@receiver(pre_save, sender=Reseña)
+def guardar_calificacion_anterior(sender, instance, **kwargs):
+    # Recordar la calificación y la cancha previas para ajustar los agregados por diferencia
+    instance._anterior = None
+    if instance.pk:
+        instance._anterior = Reseña.objects.filter(pk=instance.pk).values_list('cancha_id', 'calificacion').first()
+
+@receiver(post_save, sender=Reseña)
+def reseña_guardada(sender, instance, created, **kwargs):
+    anterior = getattr(instance, '_anterior', None)
+    if created or anterior is None:
+        registrar_calificacion(instance.cancha_id, agregar=instance.calificacion)
+        return
+    cancha_anterior_id, calificacion_anterior = anterior
+    if cancha_anterior_id != instance.cancha_id:
+        registrar_calificacion(cancha_anterior_id, quitar=calificacion_anterior)
+        registrar_calificacion(instance.cancha_id, agregar=instance.calificacion)
+    else:
+        registrar_calificacion(instance.cancha_id, agregar=instance.calificacion, quitar=calificacion_anterior)
+
+@receiver(post_delete, sender=Reseña)
+def reseña_eliminada(sender, instance, **kwargs):
+    registrar_calificacion(instance.cancha_id, quitar=instance.calificacion)
\ No newline at end of file
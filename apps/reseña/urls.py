@@ -11,4 +11,5 @@ urlpatterns = [
     path('calificar-cancha/<int:cancha_id>/', views.calificar_cancha, name='calificar_cancha'),
     path('editar-reseña/<int:cancha_id>/', views.editar_reseña, name='editar_reseña'),
     path('eliminar-reseña/<int:reseña_id>/', views.eliminar_reseña, name='eliminar_reseña'),
+    path('mas-reseñas/<int:cancha_id>/', views.mas_reseñas, name='mas_reseñas'),
 ]
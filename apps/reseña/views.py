@@ -2,17 +2,38 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from rest_framework import viewsets
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from .serializer import ReseñaSerializer
 from .models import Reseña
+from .paginacion import paginar, pagina_reseñas
 from apps.cancha.models import Cancha
 
 class ReseñaViewSet(viewsets.ModelViewSet):
     serializer_class = ReseñaSerializer
-    queryset = Reseña.objects.all()
+    queryset = Reseña.objects.select_related('usuario', 'cancha')
     permission_classes = [IsAuthenticated]
     
+    def list(self, request, *args, **kwargs):
+        """Reseñas paginadas por cursor: ?cancha=<id>&cursor=<siguiente de la página anterior>"""
+        reseñas = self.get_queryset()
+        cancha_id = request.query_params.get('cancha', '')
+        if cancha_id:
+            if not cancha_id.isdigit():
+                return Response({"detail": "El parámetro cancha debe ser un id numérico."}, status=status.HTTP_400_BAD_REQUEST)
+            reseñas = reseñas.filter(cancha_id=int(cancha_id))
+        try:
+            pagina, siguiente = paginar(reseñas, request.query_params.get('cursor'))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'siguiente': siguiente,
+            'resultados': self.get_serializer(pagina, many=True).data,
+        })
+    
     def perform_create(self, serializer):
         serializer.save(responsable=self.request.user)
 
@@ -69,4 +90,15 @@ def eliminar_reseña(request, reseña_id):
         messages.success(request, "Reseña eliminada correctamente.")
     except:
         messages.error(request, "No se pudo eliminar la reseña.")
-    return redirect('detalle_cancha', cancha_id=reseña.cancha.id, cancha_slug=reseña.cancha.slug)
\ No newline at end of file
+    return redirect('detalle_cancha', cancha_id=reseña.cancha.id, cancha_slug=reseña.cancha.slug)
+
+@login_required
+def mas_reseñas(request, cancha_id):
+    # Siguiente página de reseñas de la cancha para el botón "Ver más" del detalle
+    cancha = get_object_or_404(Cancha, id=cancha_id)
+    try:
+        reseñas, siguiente = pagina_reseñas(cancha.id, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'detail': str(e)}, status=400)
+    html = render_to_string('cancha/detalle_cancha/pagina_reseñas.html', {'reseñas': reseñas}, request=request)
+    return JsonResponse({'html': html, 'siguiente': siguiente})
\ No newline at end of file
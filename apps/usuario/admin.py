@@ -1,6 +1,6 @@
 from django.contrib import admin
-from .models import Usuario
-from django.contrib.auth.models import Group
+from .models import Usuario, anotar_roles
+from .grupos import GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo, transferir_grupo
 
 class UsuarioAdmin(admin.ModelAdmin):
     list_display = ['email', 'dni', 'nombre', 'apellidos', 'celular', 'is_responsible', 'is_staff', 'is_superuser', 'is_active', 'slug']
@@ -10,26 +10,24 @@ class UsuarioAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('nombre', 'apellidos')}
     actions = ['make_responsable', 'remove_responsable']
     
+    def get_queryset(self, request):
+        # El rol se anota en la consulta del listado en lugar de consultarlo por fila
+        return anotar_roles(super().get_queryset(request))
+    
     def is_responsible(self, obj):
-        return obj.groups.filter(name='Responsable').exists()
+        return obj.is_responsible
     is_responsible.boolean = True
     is_responsible.short_description = 'Es Responsable'
+    is_responsible.admin_order_field = 'es_responsable'
     
     def make_responsable(self, request, queryset):
-        responsable_group, _ = Group.objects.get_or_create(name='Responsable')
-        cliente_group = Group.objects.get(name='Cliente')
-        for user in queryset:
-            user.groups.add(responsable_group)
-            user.groups.remove(cliente_group)
+        # Un DELETE y un INSERT para toda la selección
+        transferir_grupo(queryset, grupo(GRUPO_CLIENTE), grupo(GRUPO_RESPONSABLE))
         self.message_user(request, "Los usuarios seleccionados ahora son Responsables.")
     make_responsable.short_description = "Convertir a Responsables"
     
     def remove_responsable(self, request, queryset):
-        responsable_group = Group.objects.get(name='Responsable')
-        cliente_group, _ = Group.objects.get_or_create(name='Cliente')
-        for user in queryset:
-            user.groups.add(cliente_group)
-            user.groups.remove(responsable_group)
+        transferir_grupo(queryset, grupo(GRUPO_RESPONSABLE), grupo(GRUPO_CLIENTE))
         self.message_user(request, "Los usuarios seleccionados han vuelto a ser Clientes.")
     remove_responsable.short_description = "Revertir a Clientes"
 
@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 from apps.usuario.models import Usuario
 from apps.cancha.models import Cancha
 from apps.direccion.models import Direccion
-from django.contrib.auth.models import Group
+from apps.usuario.grupos import GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +28,8 @@ class CanchaConcreteFactory(CanchaFactory):
     
     # Separar la lógica de asignación de grupos en un método privado (princio SOLID: Single Responsibility)
     def _asignar_grupo_responsable(self, usuario: Usuario):
-        cliente_group = Group.objects.get(name='Cliente')
-        responsable_group, _ = Group.objects.get_or_create(name='Responsable')
+        cliente_group = grupo(GRUPO_CLIENTE)
+        responsable_group = grupo(GRUPO_RESPONSABLE)
         
         if cliente_group in usuario.groups.all():
             usuario.groups.remove(cliente_group)
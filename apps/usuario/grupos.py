@@ -0,0 +1,98 @@
+import time
+from django.contrib.auth.models import Group
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed
+from apps.comun import cache_versiones
+
+GRUPO_CLIENTE = 'Cliente'
+GRUPO_RESPONSABLE = 'Responsable'
+GRUPO_ADMINISTRADOR = 'Administrador'
+
+ESPACIO_CACHE = 'grupos'
+# Segundos entre comprobaciones de la versión del registro en la cache, como en el autocompletar
+INTERVALO_VERSION = 5
+
+# Grupos conocidos ya resueltos en este proceso, por nombre
+_grupos = {}
+# Versión del registro vista por este proceso, cuándo se comprobó y cuántas veces se vació _grupos
+_registro = {'version': None, 'comprobado': 0, 'generacion': 0}
+
+def _olvidar_locales():
+    _grupos.clear()
+    _registro['generacion'] += 1
+
+def _comprobar_version():
+    # Los cambios de este proceso llegan por olvidar_grupos; los de otros, por la versión compartida
+    ahora = time.monotonic()
+    if ahora - _registro['comprobado'] > INTERVALO_VERSION:
+        _registro['comprobado'] = ahora
+        version = cache_versiones.version(ESPACIO_CACHE, 'registro')
+        if version != _registro['version']:
+            _registro['version'] = version
+            _olvidar_locales()
+
+def grupo(nombre):
+    """
+    Retorna el Group con ese nombre, creándolo si no existe. Se consulta una vez por proceso: solo se
+    recuerda cuando la transacción se confirma, para no guardar filas revertidas, y la versión del
+    registro en la cache se mira como mucho cada INTERVALO_VERSION segundos.
+    """
+    _comprobar_version()
+    encontrado = _grupos.get(nombre)
+    if encontrado is None:
+        encontrado, _ = Group.objects.get_or_create(name=nombre)
+        generacion = _registro['generacion']
+        
+        def recordar():
+            # Una fila leída antes de que se vaciara el registro puede estar obsoleta
+            if _registro['generacion'] == generacion:
+                _grupos.setdefault(nombre, encontrado)
+        transaction.on_commit(recordar)
+    return encontrado
+
+def olvidar_grupos(created=False, **kwargs):
+    """
+    Descarta los grupos recordados; se llama cuando un grupo cambia o se elimina. La versión del
+    registro vive en la cache, así que con una cache compartida los demás procesos también vuelven a
+    consultar tras su próxima comprobación; con LocMemCache solo se entera este proceso.
+    Group.objects.update() no emite señales: quien renombre grupos así debe llamar a olvidar_grupos().
+    """
+    if created:
+        # Un grupo nuevo no deja obsoleta ninguna fila recordada
+        return
+    _olvidar_locales()
+    transaction.on_commit(lambda: cache_versiones.incrementar_version(ESPACIO_CACHE, 'registro'))
+
+def transferir_grupo(usuarios, desde, hacia, tamaño_lote=1000):
+    """
+    Pasa los usuarios del queryset del grupo desde al grupo hacia con un DELETE y un INSERT por lotes
+    sobre la tabla intermedia, dentro de una transacción. En lugar de una señal por usuario se emite
+    una sola m2m_changed por grupo, como group.user_set.remove(...)/add(...), y como en Django pk_set
+    trae solo los usuarios que realmente cambian. Retorna la cantidad de usuarios que cambiaron.
+    """
+    intermedia = usuarios.model.groups.through
+    using = router.db_for_write(intermedia)
+    with transaction.atomic(using=using):
+        # Una consulta por conjunto antes de escribir: quienes salen de desde y quienes entran a hacia
+        quitar = set(usuarios.filter(groups=desde).values_list('pk', flat=True))
+        agregar = set(usuarios.exclude(groups=hacia).values_list('pk', flat=True))
+        for accion, grupo_destino, ids in (('remove', desde, quitar), ('add', hacia, agregar)):
+            if not ids:
+                continue
+            m2m_changed.send(
+                sender=intermedia, instance=grupo_destino, action=f'pre_{accion}', reverse=True,
+                model=usuarios.model, pk_set=ids, using=using,
+            )
+            if accion == 'remove':
+                intermedia.objects.using(using).filter(group=desde, usuario_id__in=usuarios.values('pk')).delete()
+            else:
+                # ignore_conflicts cubre a quien otra transacción haya agregado mientras tanto
+                intermedia.objects.using(using).bulk_create(
+                    [intermedia(usuario_id=usuario_id, group_id=hacia.pk) for usuario_id in ids],
+                    batch_size=tamaño_lote, ignore_conflicts=True,
+                )
+            m2m_changed.send(
+                sender=intermedia, instance=grupo_destino, action=f'post_{accion}', reverse=True,
+                model=usuarios.model, pk_set=ids, using=using,
+            )
+    return len(quitar | agregar)
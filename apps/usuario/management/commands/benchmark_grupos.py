@@ -0,0 +1,65 @@
+import time as reloj
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.usuario.grupos import GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo, transferir_grupo
+from apps.usuario.models import Usuario
+
+class Command(BaseCommand):
+    help = 'Mide el cambio de grupo Cliente/Responsable de N usuarios en bloque frente al recorrido usuario por usuario'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10000, help='Cantidad de usuarios a crear para la medición')
+        parser.add_argument('--bucle', type=int, default=500, help='Usuarios medidos con el recorrido por usuario (se extrapola)')
+    
+    def handle(self, *args, **options):
+        cliente, responsable = grupo(GRUPO_CLIENTE), grupo(GRUPO_RESPONSABLE)
+        marca = reloj.time_ns() % 10**7
+        cantidad = options['usuarios']
+        # bulk_create: sin save() ni contraseña, solo las filas necesarias para medir
+        creados = Usuario.objects.bulk_create([
+            Usuario(
+                email=f'benchmark{marca}-{i}@example.com', dni=f'{(marca * 10 + i) % 10**8:08d}',
+                celular=f'9{(marca * 10 + i) % 10**8:08d}', nombre='Benchmark', apellidos='Grupos',
+                slug='benchmark-grupos', password='!',
+            )
+            for i in range(cantidad)
+        ], batch_size=1000)
+        ids = [usuario.pk for usuario in creados] or list(
+            Usuario.objects.filter(email__startswith=f'benchmark{marca}-').values_list('pk', flat=True)
+        )
+        usuarios = Usuario.objects.filter(pk__in=ids)
+        try:
+            usuarios.model.groups.through.objects.bulk_create(
+                [usuarios.model.groups.through(usuario_id=usuario_id, group_id=cliente.pk) for usuario_id in ids],
+                batch_size=1000,
+            )
+            self._medir('En bloque a Responsable', cantidad, lambda: transferir_grupo(usuarios, cliente, responsable))
+            self._medir('En bloque a Cliente', cantidad, lambda: transferir_grupo(usuarios, responsable, cliente))
+            
+            muestra = min(options['bucle'], cantidad)
+            
+            def por_usuario():
+                # El recorrido anterior de las acciones del admin
+                for usuario in Usuario.objects.filter(pk__in=ids[:muestra]):
+                    usuario.groups.add(responsable)
+                    usuario.groups.remove(cliente)
+            
+            segundos = self._medir('Por usuario a Responsable', muestra, por_usuario)
+            self.stdout.write(f"  estimado para {cantidad} usuarios: {segundos * cantidad / max(muestra, 1):.1f} s")
+            
+            responsables = usuarios.filter(groups=responsable).count()
+            estilo = self.style.SUCCESS if responsables == muestra else self.style.ERROR
+            self.stdout.write(estilo(f"Usuarios en Responsable al final: {responsables} (esperado {muestra})"))
+        finally:
+            # Cascada sobre la tabla intermedia
+            for inicio in range(0, len(ids), 1000):
+                Usuario.objects.filter(pk__in=ids[inicio:inicio + 1000]).delete()
+    
+    def _medir(self, nombre, cantidad, funcion):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = reloj.perf_counter()
+            funcion()
+            segundos = reloj.perf_counter() - inicio
+        self.stdout.write(f"{nombre}: {cantidad} usuarios, {len(consultas)} consultas, {segundos:.3f} s")
+        return segundos
@@ -0,0 +1,20 @@
+from django.db.models import Q
+from django.utils.text import slugify
+from apps.usuario.management.relleno import ComandoRelleno, Relleno
+from apps.usuario.models import Usuario
+
+class RellenoSlugsUsuario(Relleno):
+    nombre = 'generar_usuario_slugs'
+    campos = ['slug']
+    
+    def consulta(self):
+        # Solo los usuarios sin slug y solo las columnas que se leen
+        return Usuario.objects.filter(Q(slug='') | Q(slug__isnull=True)).only('id', 'nombre', 'apellidos', 'slug')
+    
+    def procesar(self, usuario):
+        usuario.slug = slugify(f'{usuario.nombre} {usuario.apellidos}')
+        return True
+
+class Command(ComandoRelleno):
+    help = 'Genera slugs para usuarios existentes'
+    relleno = RellenoSlugsUsuario
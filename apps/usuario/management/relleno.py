@@ -0,0 +1,123 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+import os
+import time as reloj
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Carpeta de los puntos de control de los rellenos, uno por nombre
+CARPETA_PUNTOS_CONTROL = getattr(settings, 'RELLENOS_DIR', Path(settings.BASE_DIR) / '.rellenos')
+
+logger = logging.getLogger(__name__)
+
+class Relleno(ABC):
+    """
+    Base de los rellenos de datos sobre tablas grandes. Recorre la consulta por ventanas de clave
+    primaria (pk > última procesada, en orden, con .iterator()), escribe cada ventana con un
+    bulk_update de los campos indicados y guarda un punto de control tras cada ventana confirmada,
+    así una ejecución interrumpida continúa donde quedó.
+    Las subclases definen nombre, campos, consulta() y procesar(objeto).
+    """
+    nombre = None
+    campos = []
+    
+    def __init__(self, ventana=1000, max_filas_por_segundo=None, carpeta=CARPETA_PUNTOS_CONTROL, informar=logger.info):
+        self.ventana = ventana
+        self.max_filas_por_segundo = max_filas_por_segundo
+        self.ruta = Path(carpeta) / f'{self.nombre}.json'
+        self.informar = informar
+    
+    @abstractmethod
+    def consulta(self):
+        """Queryset de los objetos a revisar."""
+    
+    @abstractmethod
+    def procesar(self, objeto):
+        """Modifica el objeto en memoria; retorna True si hay que escribirlo."""
+    
+    def leer_punto_control(self):
+        try:
+            return json.loads(self.ruta.read_text())
+        except FileNotFoundError:
+            return None
+    
+    def _guardar_punto_control(self, estado):
+        # Escritura atómica: un corte a mitad de escritura no deja un archivo inválido
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_suffix('.tmp')
+        temporal.write_text(json.dumps(estado))
+        os.replace(temporal, self.ruta)
+    
+    def borrar_punto_control(self):
+        self.ruta.unlink(missing_ok=True)
+    
+    def ejecutar(self, reanudar=True):
+        """Procesa todas las filas pendientes. Retorna {'procesadas', 'actualizadas', 'ultimo_pk', 'segundos'}."""
+        estado = (self.leer_punto_control() if reanudar else None) or {'ultimo_pk': None, 'procesadas': 0, 'actualizadas': 0}
+        if estado['ultimo_pk'] is not None:
+            self.informar(f"{self.nombre}: reanudando después de pk={estado['ultimo_pk']}")
+        procesadas_antes = estado['procesadas']
+        inicio = reloj.monotonic()
+        while True:
+            consulta = self.consulta().order_by('pk')
+            if estado['ultimo_pk'] is not None:
+                consulta = consulta.filter(pk__gt=estado['ultimo_pk'])
+            modificados, ultimo_pk, filas = [], None, 0
+            for objeto in consulta[:self.ventana].iterator(chunk_size=self.ventana):
+                filas += 1
+                ultimo_pk = objeto.pk
+                if self.procesar(objeto):
+                    modificados.append(objeto)
+            if not filas:
+                break
+            with transaction.atomic():
+                if modificados:
+                    self.consulta().model.objects.bulk_update(modificados, self.campos, batch_size=self.ventana)
+            estado = {
+                'ultimo_pk': ultimo_pk,
+                'procesadas': estado['procesadas'] + filas,
+                'actualizadas': estado['actualizadas'] + len(modificados),
+            }
+            self._guardar_punto_control(estado)
+            self._limitar(estado['procesadas'] - procesadas_antes, inicio)
+            segundos = reloj.monotonic() - inicio
+            self.informar(
+                f"{self.nombre}: {estado['procesadas']} filas procesadas, {estado['actualizadas']} actualizadas, "
+                f"{(estado['procesadas'] - procesadas_antes) / max(segundos, 1e-9):.0f} filas/s"
+            )
+        # Terminado: la próxima ejecución empieza desde el principio
+        self.borrar_punto_control()
+        return {**estado, 'segundos': reloj.monotonic() - inicio}
+    
+    def _limitar(self, filas, inicio):
+        # Espera lo necesario para no superar max_filas_por_segundo en promedio
+        if self.max_filas_por_segundo:
+            espera = filas / self.max_filas_por_segundo - (reloj.monotonic() - inicio)
+            if espera > 0:
+                reloj.sleep(espera)
+
+class ComandoRelleno(BaseCommand):
+    """Comando de administración para un Relleno; las subclases definen la clase en relleno."""
+    relleno = None
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--ventana', type=int, default=1000, help='Filas por ventana de clave primaria')
+        parser.add_argument('--max-filas-por-segundo', type=float, default=None, help='Límite de velocidad promedio')
+        parser.add_argument('--reiniciar', action='store_true', help='Ignora el punto de control y empieza desde el principio')
+        parser.add_argument('--carpeta', default=CARPETA_PUNTOS_CONTROL, help='Carpeta de los puntos de control')
+    
+    def handle(self, *args, **options):
+        relleno = self.relleno(
+            ventana=options['ventana'],
+            max_filas_por_segundo=options['max_filas_por_segundo'],
+            carpeta=options['carpeta'],
+            informar=self.stdout.write,
+        )
+        resultado = relleno.ejecutar(reanudar=not options['reiniciar'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{relleno.nombre}: {resultado['procesadas']} filas procesadas, {resultado['actualizadas']} actualizadas "
+            f"en {resultado['segundos']:.1f} s."
+        ))
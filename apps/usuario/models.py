@@ -1,6 +1,10 @@
+from functools import cached_property
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.utils.text import slugify
-from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group
+from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from apps.comun.cambios import CamposModificadosMixin
+from .grupos import GRUPO_ADMINISTRADOR, GRUPO_CLIENTE, GRUPO_RESPONSABLE, grupo
 
 class UsuarioManager(BaseUserManager):
     def create_user(self, email, dni, nombre, apellidos, celular, password=None):
@@ -32,9 +36,7 @@ class UsuarioManager(BaseUserManager):
         user.save(using=self._db)
         
         # Asignar el grupo "Cliente" automáticamente al crear un nuevo usuario
-        cliente_group, _ = Group.objects.get_or_create(name='Cliente')
-        responsable_group, _ = Group.objects.get_or_create(name='Responsable')
-        user.groups.add(cliente_group)
+        user.groups.add(grupo(GRUPO_CLIENTE))
         
         return user
     
@@ -53,14 +55,11 @@ class UsuarioManager(BaseUserManager):
         user.save(using=self._db)
         
         # Asignar el grupo "Administrador" automáticamente
-        admin_group, _ = Group.objects.get_or_create(name='Administrador')
-        responsable_group, _ = Group.objects.get_or_create(name='Responsable')
-        user.groups.add(admin_group)
-        user.groups.add(responsable_group)
+        user.groups.add(grupo(GRUPO_ADMINISTRADOR), grupo(GRUPO_RESPONSABLE))
         
         return user
 
-class Usuario(AbstractBaseUser, PermissionsMixin):
+class Usuario(CamposModificadosMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField('Correo electrónico', max_length=255, unique=True)
     dni = models.CharField('DNI', max_length=8, unique=True)
     nombre = models.CharField('Nombre', max_length=35)
@@ -85,11 +84,29 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         return f'{self.nombre} {self.apellidos}'
     
     def save(self, *args, **kwargs):
-        if not self.pk or Usuario.objects.get(pk=self.pk).nombre != self.nombre:
+        if self._state.adding or self.has_changed('nombre') or self.has_changed('apellidos'):
             self.slug = slugify(f'{self.nombre} {self.apellidos}')
         
         super(Usuario, self).save(*args, **kwargs)
     
+    @cached_property
+    def nombres_grupos(self):
+        # Una consulta por instancia (por solicitud para request.user); m2m_changed la descarta
+        return frozenset(self.groups.values_list('name', flat=True))
+    
     @property
     def is_responsible(self):
-        return self.groups.filter(name='Responsable').exists()
+        # Los listados pueden traer el rol anotado con anotar_roles
+        if 'es_responsable' in self.__dict__:
+            return self.es_responsable
+        return GRUPO_RESPONSABLE in self.nombres_grupos
+    
+    def olvidar_roles(self):
+        self.__dict__.pop('nombres_grupos', None)
+        self.__dict__.pop('es_responsable', None)
+
+def anotar_roles(usuarios):
+    """Anota es_responsable en un queryset de usuarios con un EXISTS, sin una consulta por fila."""
+    return usuarios.annotate(es_responsable=Exists(
+        Usuario.groups.through.objects.filter(usuario_id=OuterRef('pk'), group__name=GRUPO_RESPONSABLE)
+    ))
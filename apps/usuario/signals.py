@@ -0,0 +1,15 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .grupos import olvidar_grupos
+from .models import Usuario
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def grupos_modificados(sender, instance, **kwargs):
+    # Descartar los roles ya resueltos de la instancia; desde Group solo cambia la base
+    if isinstance(instance, Usuario) and kwargs['action'].startswith('post_'):
+        instance.olvidar_roles()
+
+# Un grupo renombrado o eliminado invalida el registro de grupos conocidos
+post_save.connect(olvidar_grupos, sender=Group)
+post_delete.connect(olvidar_grupos, sender=Group)
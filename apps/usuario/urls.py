@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/', include(router.urls)),
     # Rutas generales
     path('', views.inicio, name='inicio'),
+    path('mas-canchas/', views.mas_canchas, name='mas_canchas'),
     path('signup/', views.signup, name='signup'),
     path('signin/', views.signin, name='signin'),
     path('signout/', views.signout, name='signout'),
@@ -6,11 +6,20 @@ from django.views.decorators.http import require_POST
 from django.utils.timezone import now
 from django.contrib import messages
 from django.urls import reverse
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from urllib.parse import urlencode
+from django.db.models import Exists, OuterRef
 from rest_framework import viewsets
 from .serializer import UsuarioSerializer
 from .models import Usuario
 from .forms import RegistroUsuarioForm
 from apps.cancha.models import Cancha
+from apps.cancha.busqueda import buscar_canchas
+from apps.cancha.listado import (
+    ORDENES_CATALOGO, RESULTADOS_BUSQUEDA_MAXIMOS, TARJETAS_POR_PAGINA, consulta_listado, pagina_catalogo, tarjetas, tarjetas_html,
+)
+from apps.direccion.models import Direccion
 from apps.reserva.models import Reserva
 
 # ViewSet para la API REST
@@ -19,25 +28,46 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
     lookup_field = 'slug'
 
-def inicio(request):
-    canchas = Cancha.objects.prefetch_related('direcciones').all()
-    
-    lista_canchas = []
-    for cancha in canchas:
-        calificacion = cancha.promedio_calificaciones()
-        lista_canchas.append({'cancha': cancha, 'calificacion': calificacion})
+def _pagina_inicio(request):
+    """
+    Filtros, orden y cursor del catálogo de inicio (?q, ?distrito, ?orden, ?cursor, ?tamaño).
+    Retorna (canchas, siguiente, filtros); lanza ValueError si el cursor no es válido.
+    """
+    canchas = Cancha.objects.all()
     
     query = request.GET.get('q', '')
     distrito = request.GET.get('distrito', '')
-    if query:
-        canchas = canchas.filter(nombre__icontains=query)
+    orden = request.GET.get('orden', '')
     if distrito:
-        canchas = canchas.filter(direcciones__distrito=distrito)
+        canchas = canchas.filter(Exists(Direccion.objects.filter(cancha=OuterRef('pk'), distrito=distrito)))
+    ids = None
+    if query:
+        # Índice de texto completo sin tildes, con un tope de resultados para acotar la memoria
+        ids = buscar_canchas(query, RESULTADOS_BUSQUEDA_MAXIMOS)
+        canchas = canchas.filter(id__in=ids)
+    if orden not in ORDENES_CATALOGO or (orden == 'relevancia' and not query):
+        orden = 'relevancia' if query else 'calificacion'
+    tamaño = request.GET.get('tamaño', '')
+    tamaño = int(tamaño) if tamaño.isdigit() else TARJETAS_POR_PAGINA
+    
+    # Una sola consulta por página con todo lo que muestran las tarjetas
+    canchas, siguiente = pagina_catalogo(canchas, orden, request.GET.get('cursor'), tamaño, relevancia=ids)
+    return canchas, siguiente, {'query': query, 'distrito': distrito, 'orden': orden}
+
+def inicio(request):
+    try:
+        lista_canchas, siguiente, filtros = _pagina_inicio(request)
+    except ValueError:
+        # Un cursor inválido en la URL vuelve a la primera página
+        return redirect(f"{reverse('inicio')}?{urlencode({k: v for k, v in request.GET.items() if k != 'cursor'})}")
     
     contexto = {
         'canchas': lista_canchas,
-        'query': query,
-        'distrito': distrito,
+        # Tarjetas ya renderizadas, desde la cache de fragmentos por cancha
+        'tarjetas': tarjetas_html(lista_canchas),
+        'siguiente': siguiente,
+        **filtros,
+        'ORDENES': [('calificacion', 'Mejor calificadas'), ('recientes', 'Más recientes'), ('nombre', 'Nombre')],
         'DISTRITOS': [
             ('barranco', 'Barranco'),
             ('callao', 'Callao'),
@@ -64,6 +94,15 @@ def inicio(request):
     }
     return render(request, 'usuario/inicio/inicio.html', contexto)
 
+def mas_canchas(request):
+    # Siguiente página del catálogo para el botón "Ver más" de inicio, con los mismos filtros
+    try:
+        canchas, siguiente, _ = _pagina_inicio(request)
+    except ValueError as e:
+        return JsonResponse({'detail': str(e)}, status=400)
+    html = render_to_string('usuario/inicio/pagina_canchas.html', {'tarjetas': tarjetas_html(canchas)}, request=request)
+    return JsonResponse({'html': html, 'siguiente': siguiente})
+
 def signup(request):
     if request.user.is_authenticated:
         return redirect('inicio')
@@ -256,7 +295,7 @@ def mis_reservas(request):
 @login_required
 def mis_canchas(request):
     try:
-        canchas = Cancha.objects.filter(responsable=request.user).prefetch_related('direcciones')
+        canchas = tarjetas(consulta_listado(Cancha.objects.filter(responsable=request.user)))
     except Reserva.DoesNotExist:
         messages.error(request, "No tienes canchas registradas.")
         return redirect('mis_canchas')
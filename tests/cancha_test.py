@@ -1,6 +1,24 @@
+import re
+from datetime import time
+from unittest import mock
+from io import StringIO
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import Group
-from tests.factories import UsuarioFactory, CanchaFactory
+from rest_framework.test import APIClient
+from django.core.management import call_command
+from apps.cancha.autocompletar import ESPACIO_CACHE as ESPACIO_AUTOCOMPLETAR, INTERVALO_VERSION, indice as indice_autocompletar
+from apps.cancha import busqueda
+from apps.cancha.busqueda import buscar_canchas, normalizar
+from apps.comun import cache_versiones
+from apps.cancha.listado import ESPACIO_CACHE, codificar_cursor, consulta_listado, pagina_catalogo, tarjetas
+from apps.cancha.models import Cancha
+from apps.direccion.models import Direccion
+from apps.usuario.models import Usuario
+from apps.horario.publicacion import editar_horarios
+from tests.factories import UsuarioFactory, CanchaFactory, DireccionFactory, HorarioFactory, ReservaFactory, ReseñaFactory
 
 
 class CanchaModelTest(TestCase):
@@ -25,4 +43,318 @@ class CanchaModelTest(TestCase):
     
     def test_responsable_es_responsable(self):
         """Verifica que el responsable pertenece al grupo 'Responsable'"""
-        self.assertTrue(self.usuario.groups.filter(name="Responsable").exists())
\ No newline at end of file
+        self.assertTrue(self.usuario.groups.filter(name="Responsable").exists())
+    
+    def test_guardar_solo_campos_modificados(self):
+        """Verifica que guardar una cancha leída escribe solo lo modificado, sin releer la fila"""
+        cancha = Cancha.objects.select_related('responsable').get(pk=self.cancha.pk)
+        with CaptureQueriesContext(connection) as consultas:
+            cancha.save()
+        self.assertEqual(len(consultas), 0)
+        cancha.nombre = "Cancha Nueva"
+        with CaptureQueriesContext(connection) as consultas:
+            cancha.save()
+        updates = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('UPDATE "cancha_cancha"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"disponibilidad"', updates[0])
+        # La única lectura de la cancha es la del índice de búsqueda, después del UPDATE
+        self.assertTrue(consultas[0]['sql'].startswith('UPDATE "cancha_cancha"'))
+        cancha.refresh_from_db()
+        self.assertEqual(cancha.slug, "cancha-nueva")
+        self.assertFalse(cancha.has_changed('nombre'))
+    
+    def test_guardar_cancha_borrada(self):
+        """Verifica que guardar una cancha cuya fila se borró mientras tanto falla en lugar de volver a insertarla"""
+        cancha = Cancha.objects.get(pk=self.cancha.pk)
+        Cancha.objects.filter(pk=cancha.pk).delete()
+        cancha.nombre = "Cancha Recuperada"
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            cancha.save()
+        self.assertFalse(Cancha.objects.filter(pk=cancha.pk).exists())
+
+class DisponibilidadApiTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        cache.clear()
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horario = HorarioFactory(cancha=self.cancha)
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.url = f'/cancha/api/canchas/{self.cancha.slug}/disponibilidad/'
+    
+    def test_grilla_compacta(self):
+        """Verifica el formato compacto de la grilla"""
+        response = self.client.get(self.url, {'desde': self.horario.dia.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        dia = response.json()['dias'][0]
+        self.assertEqual(dia['horario'], self.horario.id)
+        self.assertEqual(dia['bloques'], 'g' * 8 + 'v' * 14 + 'g' * 2)
+    
+    def test_etag_condicional(self):
+        """Verifica que If-None-Match responde 304 hasta que cambia el horario de la cancha"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservaFactory(usuario=self.usuario, horario=self.horario)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['dias'][0]['bloques'][18], 'r')
+    
+    def test_etag_desde_la_cancha(self):
+        """Verifica que el 304 solo lee la cancha y que la versión cambia también con escrituras en bloque"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # update() sobre los horarios no emite señales; editar_horarios incrementa la versión igual
+        editar_horarios(self.cancha.id, self.horario.dia, self.horario.dia, time(9, 0), time(20, 0))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dias'][0]['hora_inicio'], '09:00')
+    
+    def test_fecha_invalida(self):
+        """Verifica que una fecha mal formada responde 400"""
+        self.assertEqual(self.client.get(self.url, {'desde': '19-10-2026'}).status_code, 400)
+
+
+class BusquedaCanchasTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.rimac = CanchaFactory(responsable=self.usuario, nombre="Estadio Rímac")
+        self.jesus_maria = CanchaFactory(responsable=self.usuario, nombre="La Bombonera")
+        self.direccion = DireccionFactory(cancha=self.jesus_maria, nombre_calle="Salaverry", distrito="jesus_maria", referencia="")
+    
+    def test_normalizar(self):
+        """Verifica el plegado de tildes y mayúsculas"""
+        self.assertEqual(normalizar("  Jesús   MARÍA! "), "jesus maria")
+    
+    def test_busqueda_sin_tildes(self):
+        """Verifica la búsqueda por nombre y dirección sin tildes y por prefijo"""
+        self.assertEqual(buscar_canchas("rimac"), [self.rimac.id])
+        self.assertEqual(buscar_canchas("jesus maria"), [self.jesus_maria.id])
+        self.assertEqual(buscar_canchas("salav"), [self.jesus_maria.id])
+        self.assertEqual(buscar_canchas("rimac salaverry"), [])
+    
+    def test_sincronizacion_y_reconstruccion(self):
+        """Verifica que el índice sigue los cambios de canchas y direcciones y se puede reconstruir"""
+        self.direccion.cancha = self.rimac
+        self.direccion.save()
+        self.assertEqual(buscar_canchas("salaverry"), [self.rimac.id])
+        self.jesus_maria.nombre = "Cancha Lima"
+        self.jesus_maria.save()
+        self.assertEqual(buscar_canchas("lima"), [self.jesus_maria.id])
+        self.rimac.delete()
+        self.assertEqual(buscar_canchas("salaverry"), [])
+        
+        call_command('reconstruir_busqueda', stdout=StringIO())
+        self.assertEqual(buscar_canchas("cancha lima"), [self.jesus_maria.id])
+    
+    def test_guardar_sin_cambiar_nombre(self):
+        """Verifica que guardar una cancha sin cambiar el nombre no toca el índice de búsqueda"""
+        cancha = Cancha.objects.get(pk=self.rimac.pk)
+        cancha.disponibilidad = True
+        with CaptureQueriesContext(connection) as consultas:
+            cancha.save()
+        self.assertFalse(any('cancha_busqueda' in consulta['sql'] for consulta in consultas))
+        self.assertEqual(buscar_canchas("rimac"), [self.rimac.id])
+    
+    def test_sin_indice(self):
+        """Verifica que sin tabla de índice la introspección se hace una sola vez y se busca por LIKE"""
+        with mock.patch.dict(busqueda._indice_por_base, clear=True), \
+                mock.patch.object(connection.introspection, 'table_names', return_value=[]) as tablas:
+            self.assertEqual(buscar_canchas("bombonera"), [self.jesus_maria.id])
+            self.jesus_maria.nombre = "La Bombonera Norte"
+            self.jesus_maria.save()
+            buscar_canchas("bombonera")
+        tablas.assert_called_once()
+    
+    def test_inicio_aplica_filtros(self):
+        """Verifica que la búsqueda y el distrito filtran la lista del inicio"""
+        respuesta = self.client.get('/', {'q': 'jesus'})
+        self.assertEqual([c.id for c in respuesta.context['canchas']], [self.jesus_maria.id])
+        respuesta = self.client.get('/', {'distrito': 'miraflores'})
+        self.assertEqual(respuesta.context['canchas'], [])
+
+
+class AutocompletarTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario, nombre="Estadio Rímac")
+        DireccionFactory(cancha=self.cancha, nombre_calle="Jirón Ricardo Palma", distrito="rimac")
+        indice_autocompletar.reconstruir()
+    
+    def test_prefijos(self):
+        """Verifica las sugerencias por prefijo sin tildes, desde cualquier palabra y sin repetir"""
+        sugerencias = indice_autocompletar.buscar("ri")
+        self.assertEqual([(s['tipo'], s['texto']) for s in sugerencias], [
+            ('calle', 'Jirón Ricardo Palma'), ('cancha', 'Estadio Rímac'), ('distrito', 'Rímac'),
+        ])
+        self.assertEqual(sugerencias[1]['slug'], self.cancha.slug)
+        self.assertEqual(len(indice_autocompletar.buscar("san", limite=2)), 2)
+        
+        # Dentro del intervalo de comprobación las búsquedas no tocan la base
+        with self.assertNumQueries(0):
+            for _ in range(200):
+                indice_autocompletar.buscar("san juan")
+    
+    def test_sin_cache_compartida(self):
+        """Verifica que sin cache compartida el índice se reconstruye al vencer el intervalo y ve cambios de otros procesos"""
+        # Cambio hecho por otro proceso: sin señales en este
+        Cancha.objects.filter(pk=self.cancha.pk).update(nombre="Coliseo Central")
+        self.assertEqual(indice_autocompletar.buscar("colis"), [])
+        indice_autocompletar._comprobado -= INTERVALO_VERSION + 1
+        with mock.patch('apps.cancha.autocompletar.threading.Thread') as hilo:
+            # La búsqueda que vence el intervalo responde con el índice anterior y deja la recarga a un solo hilo
+            with self.assertNumQueries(0):
+                self.assertEqual(indice_autocompletar.buscar("colis"), [])
+            indice_autocompletar._comprobado -= INTERVALO_VERSION + 1
+            indice_autocompletar.buscar("colis")
+        hilo.assert_called_once_with(target=indice_autocompletar._recargar, daemon=True)
+        with mock.patch('apps.cancha.autocompletar.connection'):
+            indice_autocompletar._recargar()
+        self.assertEqual([s['texto'] for s in indice_autocompletar.buscar("colis")], ["Coliseo Central"])
+    
+    def test_cambio_durante_reconstruccion(self):
+        """Verifica que un cambio confirmado mientras se cargan las filas no queda marcado como incluido"""
+        cargar_direcciones = Direccion.objects.values_list
+        def cargar(*campos):
+            # Otro proceso confirma un cambio entre la carga de canchas y la de calles
+            cache_versiones.incrementar_version(ESPACIO_AUTOCOMPLETAR, 0)
+            return cargar_direcciones(*campos)
+        with mock.patch.object(Direccion.objects, 'values_list', side_effect=cargar):
+            indice_autocompletar.reconstruir()
+        self.assertNotEqual(indice_autocompletar.version, cache_versiones.version(ESPACIO_AUTOCOMPLETAR, 0))
+    
+    def test_actualizacion_incremental(self):
+        """Verifica que el índice sigue los cambios de canchas al confirmarse la transacción"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cancha.nombre = "Coliseo Central"
+            self.cancha.save()
+        self.assertEqual([s['texto'] for s in indice_autocompletar.buscar("colis")], ["Coliseo Central"])
+        self.assertEqual([s['tipo'] for s in indice_autocompletar.buscar("estadio")], [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cancha.delete()
+        self.assertEqual(indice_autocompletar.buscar("colis"), [])
+    
+    def test_endpoint(self):
+        """Verifica el endpoint de autocompletar y la cantidad de sugerencias"""
+        respuesta = self.client.get('/cancha/autocompletar/', {'q': 'estad', 'k': '50'})
+        self.assertEqual(respuesta.json()['sugerencias'][0]['texto'], "Estadio Rímac")
+        self.assertEqual(len(self.client.get('/cancha/autocompletar/', {'q': 's', 'k': '3'}).json()['sugerencias']), 3)
+
+
+class ListadoCanchasTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.usuario.refresh_from_db()
+    
+    def crear_canchas(self, cantidad):
+        for i in range(Cancha.objects.count(), Cancha.objects.count() + cantidad):
+            cancha = CanchaFactory(responsable=self.usuario, nombre=f"Cancha {i}")
+            DireccionFactory(cancha=cancha, distrito="miraflores")
+            DireccionFactory(cancha=cancha, distrito="surquillo")
+    
+    def test_presupuesto_de_consultas(self):
+        """Verifica que inicio y mis canchas usan las mismas consultas con 2 o con 12 canchas"""
+        self.client.force_login(self.usuario)
+        self.crear_canchas(2)
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get('/')
+        with CaptureQueriesContext(connection) as pocas_mis_canchas:
+            self.client.get('/usuario/mis-canchas/')
+        self.crear_canchas(10)
+        with CaptureQueriesContext(connection) as muchas:
+            respuesta = self.client.get('/')
+        with CaptureQueriesContext(connection) as muchas_mis_canchas:
+            self.client.get('/usuario/mis-canchas/')
+        
+        self.assertEqual(len(respuesta.context['canchas']), 12)
+        self.assertEqual(len(muchas), len(pocas))
+        self.assertEqual(len(muchas_mis_canchas), len(pocas_mis_canchas))
+        # Sesión, usuario y el listado: ninguna consulta por tarjeta
+        self.assertLessEqual(len(muchas), 4)
+    
+    def test_direccion_principal(self):
+        """Verifica que la tarjeta muestra la primera dirección registrada"""
+        self.crear_canchas(1)
+        cancha = tarjetas(consulta_listado())[0]
+        self.assertEqual(cancha.direccion.get_distrito_display(), 'Miraflores')
+        self.assertEqual(str(cancha.responsable), str(self.usuario))
+    
+    def test_cursor_invalido(self):
+        """Verifica que un cursor con valores de otro tipo responde 400 en lugar de llegar a la consulta"""
+        self.crear_canchas(3)
+        respuesta = self.client.get('/usuario/mas-canchas/', {'orden': 'recientes', 'tamaño': 1})
+        siguiente = respuesta.json()['siguiente']
+        respuesta = self.client.get('/usuario/mas-canchas/', {'orden': 'recientes', 'tamaño': 1, 'cursor': siguiente})
+        self.assertEqual(respuesta.status_code, 200)
+        for orden, valores in [('calificacion', [[1], 1]), ('recientes', ['xx', 1]), ('nombre', [1, 1]), ('nombre', ['Cancha 1', True])]:
+            with self.subTest(orden=orden, valores=valores):
+                respuesta = self.client.get('/usuario/mas-canchas/', {'orden': orden, 'cursor': codificar_cursor(orden, valores)})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {'detail': 'Cursor inválido.'})
+
+
+class TarjetasCacheTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        cache.clear()
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario, nombre="Cancha Cache")
+        self.direccion = DireccionFactory(cancha=self.cancha, distrito="miraflores")
+    
+    def test_tarjetas_desde_cache(self):
+        """Verifica que la segunda visita sirve las tarjetas desde la cache"""
+        CanchaFactory(responsable=self.usuario, nombre="Otra Cancha")
+        self.client.get('/')
+        cache_versiones.reiniciar_estadisticas(ESPACIO_CACHE)
+        respuesta = self.client.get('/')
+        self.assertContains(respuesta, "Cancha Cache")
+        self.assertEqual(cache_versiones.estadisticas(ESPACIO_CACHE)['hits'], 2)
+        self.assertEqual(cache_versiones.estadisticas(ESPACIO_CACHE)['misses'], 0)
+    
+    def test_responsable_modificado(self):
+        """Verifica que solo un cambio de nombre o apellidos del responsable invalida sus tarjetas"""
+        self.client.get('/')
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        usuario.set_password("OtraClave456")
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            usuario.save()
+        usuario.apellidos = "Pérez"
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario.save()
+        self.assertContains(self.client.get('/'), "Pérez")
+    
+    def test_invalidacion(self):
+        """Verifica que la tarjeta se vuelve a renderizar al cambiar la dirección, las reseñas o la disponibilidad"""
+        self.assertNotContains(self.client.get('/'), "Sí <i")
+        self.direccion.distrito = "surquillo"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direccion.save()
+        self.assertContains(self.client.get('/'), "Surquillo")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            ReseñaFactory(cancha=self.cancha, usuario=UsuarioFactory(email="otro@test.com"), calificacion=5)
+            # Antes del commit la versión no cambia: lo que se cachee ahora se descarta después
+            self.assertNotContains(self.client.get('/'), "(1)")
+        self.assertContains(self.client.get('/'), "(1)")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            HorarioFactory(cancha=self.cancha)
+        self.assertContains(self.client.get('/'), "Sí <i")
+        cache_versiones.reiniciar_estadisticas(ESPACIO_CACHE)
+        self.client.get('/')
+        self.assertEqual(cache_versiones.estadisticas(ESPACIO_CACHE)['hits'], 1)
+
@@ -0,0 +1,54 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import Group
+from apps.cancha.models import Cancha
+from apps.cancha.disponibilidad import actualizar_disponibilidad, recalcular_disponibilidad_canchas
+from tests.factories import UsuarioFactory, CanchaFactory, HorarioFactory, ReservaFactory
+
+
+class DisponibilidadCanchaTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+    
+    def disponibilidad(self):
+        return Cancha.objects.values_list('disponibilidad', flat=True).get(pk=self.cancha.pk)
+    
+    def test_horario_nuevo_marca_disponible(self):
+        """Verifica que crear un horario libre marca la cancha como disponible"""
+        HorarioFactory(cancha=self.cancha)
+        self.assertTrue(self.disponibilidad())
+    
+    def test_reserva_y_cancelacion(self):
+        """Verifica que reservar el único horario y cancelarlo actualiza la disponibilidad"""
+        horario = HorarioFactory(cancha=self.cancha)
+        reserva = ReservaFactory(usuario=self.usuario, horario=horario)
+        self.assertFalse(self.disponibilidad())
+        reserva.delete()
+        self.assertTrue(self.disponibilidad())
+    
+    def test_eliminar_horario(self):
+        """Verifica que eliminar el último horario marca la cancha como no disponible"""
+        horario = HorarioFactory(cancha=self.cancha)
+        horario.delete()
+        self.assertFalse(self.disponibilidad())
+    
+    def test_sin_cambios_no_escribe(self):
+        """Verifica que no se escribe la cancha si la disponibilidad no cambia"""
+        HorarioFactory(cancha=self.cancha)
+        horario = HorarioFactory(cancha=self.cancha)
+        ReservaFactory(usuario=self.usuario, horario=horario)
+        self.assertTrue(self.disponibilidad())
+        self.assertFalse(actualizar_disponibilidad(self.cancha.pk))
+    
+    def test_recalcular_todas(self):
+        """Verifica que la reconstrucción completa corrige valores desactualizados"""
+        HorarioFactory(cancha=self.cancha)
+        Cancha.objects.filter(pk=self.cancha.pk).update(disponibilidad=False)
+        self.assertEqual(recalcular_disponibilidad_canchas(), 1)
+        self.assertTrue(self.disponibilidad())
+        call_command('recalcular_disponibilidad', stdout=StringIO())
+        self.assertTrue(self.disponibilidad())
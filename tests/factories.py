@@ -1,8 +1,12 @@
 import factory
+from datetime import date, time, timedelta
 from django.contrib.auth.models import Group
 from apps.usuario.models import Usuario
 from apps.cancha.models import Cancha
 from apps.direccion.models import Direccion
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva
+from apps.reseña.models import Reseña
 
 
 # Usuario Factory
@@ -49,3 +53,36 @@ class DireccionFactory(factory.django.DjangoModelFactory):
     numero_calle = factory.Faker("random_number", digits=3, fix_len=True)
     distrito = "Miraflores"
     referencia = factory.Faker("sentence", nb_words=5)
+
+
+# Horario Factory
+class HorarioFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Horario
+    
+    cancha = factory.SubFactory(CanchaFactory)
+    dia = factory.Sequence(lambda n: date.today() + timedelta(days=n + 1))
+    hora_inicio = time(8, 0)
+    hora_fin = time(22, 0)
+
+
+# Reserva Factory
+class ReservaFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Reserva
+    
+    usuario = factory.SubFactory(UsuarioFactory)
+    horario = factory.SubFactory(HorarioFactory)
+    hora_reserva_inicio = time(18, 0)
+    hora_reserva_fin = time(19, 0)
+
+
+# Reseña Factory
+class ReseñaFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Reseña
+    
+    usuario = factory.SubFactory(UsuarioFactory)
+    cancha = factory.SubFactory(CanchaFactory)
+    calificacion = 4
+    comentario = "Buena cancha"
\ No newline at end of file
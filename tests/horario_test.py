@@ -0,0 +1,283 @@
+from unittest import mock
+from datetime import date, time, timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from apps.cancha.models import Cancha
+from apps.horario.busqueda import buscar_horarios_libres
+from apps.horario.grilla import obtener_dias_horarios, obtener_dias_horarios_cache, estadisticas_grilla
+from apps.horario.models import Horario, PlantillaHorario
+from apps.horario.ocupacion import Ocupacion, intervalos
+from apps.horario.publicacion import horario_semanal, publicar_horarios, editar_horarios
+from apps.horario.purga import purgar_horarios_pasados, PURGA_LOCK_KEY
+from apps.reserva.models import Reserva
+from tests.factories import UsuarioFactory, CanchaFactory, DireccionFactory, HorarioFactory, ReservaFactory
+
+
+class PurgaHorariosTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        cache.clear()
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.vigente = HorarioFactory(cancha=self.cancha)
+        self.pasados = [HorarioFactory(cancha=self.cancha) for _ in range(5)]
+        for horario in self.pasados:
+            ReservaFactory(usuario=self.usuario, horario=horario)
+        # Mover los horarios al pasado sin pasar por Horario.clean()
+        ayer = date.today() - timedelta(days=1)
+        for i, horario in enumerate(self.pasados):
+            Horario.objects.filter(pk=horario.pk).update(dia=ayer - timedelta(days=i))
+    
+    def test_purga_por_lotes(self):
+        """Verifica que se eliminan los horarios vencidos y sus reservas en lotes"""
+        resultado = purgar_horarios_pasados(tamano_lote=2)
+        self.assertEqual(resultado, {'horarios': 5, 'reservas': 5, 'lotes': 3})
+        self.assertEqual(list(Horario.objects.values_list('pk', flat=True)), [self.vigente.pk])
+        self.assertFalse(Reserva.objects.exists())
+        self.assertTrue(Cancha.objects.get(pk=self.cancha.pk).disponibilidad)
+    
+    def test_purga_con_lock_tomado(self):
+        """Verifica que no se purga si otro proceso tiene el lock"""
+        cache.add(PURGA_LOCK_KEY, 'otro', 60)
+        self.assertIsNone(purgar_horarios_pasados())
+        self.assertEqual(Horario.objects.count(), 6)
+    
+    def test_purga_se_detiene_si_pierde_el_lock(self):
+        """Verifica que la purga renueva el lease por lote y se detiene si otro proceso tomó el lock"""
+        original = Horario.objects.filter
+        
+        def robar_lock(*args, **kwargs):
+            # Simula que el lease expiró y otro nodo lo tomó durante el primer lote
+            if cache.get(PURGA_LOCK_KEY) not in (None, 'otro'):
+                cache.set(PURGA_LOCK_KEY, 'otro', 60)
+            return original(*args, **kwargs)
+        
+        with mock.patch.object(Horario.objects, 'filter', side_effect=robar_lock):
+            resultado = purgar_horarios_pasados(tamano_lote=2)
+        self.assertEqual(resultado['lotes'], 1)
+        self.assertEqual(cache.get(PURGA_LOCK_KEY), 'otro')
+
+
+class GrillaHorariosTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horarios = [HorarioFactory(cancha=self.cancha) for _ in range(3)]
+        # Reserva de tres horas: 18:00 a 21:00
+        ReservaFactory(usuario=self.usuario, horario=self.horarios[0], hora_reserva_inicio=time(18, 0), hora_reserva_fin=time(21, 0))
+    
+    def test_grilla_en_dos_consultas(self):
+        """Verifica que la grilla se construye con dos consultas sin importar la cantidad de días"""
+        with self.assertNumQueries(2):
+            dias_horarios = obtener_dias_horarios(self.cancha)
+        self.assertEqual(len(dias_horarios), 3)
+        self.assertEqual(len(dias_horarios[0]['horas']), 24)
+    
+    def test_reserva_de_varias_horas(self):
+        """Verifica que todos los bloques cubiertos por una reserva larga se marcan como reservados"""
+        horas = obtener_dias_horarios(self.cancha)[0]['horas']
+        estados = {hora['hora_inicio']: hora['estado'] for hora in horas}
+        self.assertEqual(estados['07:00'], 'gris')
+        self.assertEqual(estados['17:00'], 'verde')
+        self.assertEqual([estados['18:00'], estados['19:00'], estados['20:00']], ['rojo'] * 3)
+        self.assertEqual(estados['21:00'], 'verde')
+        self.assertEqual(horas[23]['hora_fin'], '23:59')
+    
+    def test_rango_de_fechas(self):
+        """Verifica que la grilla respeta el rango desde/hasta"""
+        dia = self.horarios[1].dia
+        dias_horarios = obtener_dias_horarios(self.cancha, desde=dia, hasta=dia)
+        self.assertEqual([d['dia'] for d in dias_horarios], [dia.strftime('%Y-%m-%d')])
+
+
+class OcupacionTest(TestCase):
+    def test_rango_libre(self):
+        """Verifica las consultas de rango libre sobre la máscara de bits"""
+        horario = Horario(hora_inicio=time(8, 0), hora_fin=time(22, 0))
+        ocupacion = Ocupacion.de_horario(horario, [(time(18, 0), time(20, 0))])
+        self.assertTrue(ocupacion.libre(time(8, 0), time(9, 30)))
+        self.assertFalse(ocupacion.libre(time(7, 0), time(9, 0)))
+        self.assertFalse(ocupacion.libre(time(19, 30), time(20, 30)))
+        self.assertTrue(ocupacion.libre(time(20, 0), time(21, 0)))
+    
+    def test_union_interseccion(self):
+        """Verifica la unión e intersección de ocupaciones de distintos días"""
+        lunes = Ocupacion.de_horario(Horario(hora_inicio=time(8, 0), hora_fin=time(12, 0)))
+        martes = Ocupacion.de_horario(Horario(hora_inicio=time(10, 0), hora_fin=time(23, 59)))
+        self.assertEqual(intervalos((lunes & martes).libres), [(time(10, 0), time(12, 0))])
+        self.assertEqual(intervalos((lunes | martes).libres), [(time(8, 0), time(23, 59))])
+
+
+class GrillaCacheTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        cache.clear()
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horario = HorarioFactory(cancha=self.cancha)
+    
+    def test_cache_y_invalidacion(self):
+        """Verifica que la grilla se sirve desde cache hasta que cambia una reserva de la cancha"""
+        obtener_dias_horarios_cache(self.cancha)
+        with self.assertNumQueries(0):
+            grilla = obtener_dias_horarios_cache(self.cancha)
+        self.assertEqual(grilla[0]['horas'][18]['estado'], 'verde')
+        # La versión cambia al confirmar la transacción, no antes
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ReservaFactory(usuario=self.usuario, horario=self.horario)
+        self.assertTrue(callbacks)
+        grilla = obtener_dias_horarios_cache(self.cancha)
+        self.assertEqual(grilla[0]['horas'][18]['estado'], 'rojo')
+        self.assertEqual(estadisticas_grilla(), {'hits': 1, 'misses': 2, 'hit_rate': 0.3333})
+    
+    def test_eliminacion_masiva_invalida(self):
+        """Verifica que eliminar los horarios de un día invalida la grilla"""
+        self.assertEqual(len(obtener_dias_horarios_cache(self.cancha)), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Horario.objects.filter(cancha=self.cancha).delete()
+        self.assertEqual(obtener_dias_horarios_cache(self.cancha), [])
+
+
+class BusquedaHorariosLibresTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.miraflores = CanchaFactory(responsable=self.usuario, nombre="Cancha Miraflores")
+        self.surco = CanchaFactory(responsable=self.usuario, nombre="Cancha Surco")
+        DireccionFactory(cancha=self.miraflores, distrito="miraflores")
+        DireccionFactory(cancha=self.surco, distrito="santiago_de_surco")
+        self.dia = date.today() + timedelta(days=3)
+        horario = HorarioFactory(cancha=self.miraflores, dia=self.dia)
+        HorarioFactory(cancha=self.surco, dia=self.dia)
+        ReservaFactory(usuario=self.usuario, horario=horario, hora_reserva_inicio=time(19, 0), hora_reserva_fin=time(20, 0))
+    
+    def test_busqueda_en_dos_consultas(self):
+        """Verifica que la búsqueda recorre todas las canchas con dos consultas"""
+        with self.assertNumQueries(2):
+            resultados = buscar_horarios_libres(self.dia, time(18, 0), time(22, 0), duracion=60)
+        libres = {resultado['cancha']['nombre']: resultado['libres'] for resultado in resultados}
+        self.assertEqual(libres['Cancha Miraflores'], [(time(18, 0), time(19, 0)), (time(20, 0), time(22, 0))])
+        self.assertEqual(libres['Cancha Surco'], [(time(18, 0), time(22, 0))])
+    
+    def test_duracion_y_distrito(self):
+        """Verifica los filtros de duración mínima y distrito"""
+        resultados = buscar_horarios_libres(self.dia, time(18, 0), time(22, 0), duracion=90, distrito="miraflores")
+        self.assertEqual(len(resultados), 1)
+        self.assertEqual(resultados[0]['libres'], [(time(20, 0), time(22, 0))])
+        self.assertEqual(buscar_horarios_libres(self.dia, time(19, 0), time(20, 0), distrito="miraflores"), [])
+
+
+class PublicarHorariosTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.usuario.refresh_from_db()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.desde = date.today() + timedelta(days=7 - date.today().weekday())  # Próximo lunes
+        self.hasta = self.desde + timedelta(days=13)
+    
+    def test_plantilla_semanal(self):
+        """Verifica que se crean los días de la plantilla y se respetan los existentes con una consulta y un insert"""
+        HorarioFactory(cancha=self.cancha, dia=self.desde, hora_inicio=time(10, 0), hora_fin=time(12, 0))
+        semanal, error = horario_semanal([
+            {'dias': [0, 1, 2, 3, 4], 'hora_inicio': '16:00', 'hora_fin': '23:00'},
+            {'dias': [5, 6], 'hora_inicio': '08:00', 'hora_fin': '23:59'},
+        ])
+        self.assertIsNone(error)
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = publicar_horarios(self.cancha.id, self.desde, self.hasta, semanal)
+        sentencias = [consulta['sql'] for consulta in consultas.captured_queries if 'horario_horario' in consulta['sql']]
+        self.assertEqual(sum(sql.startswith('INSERT') for sql in sentencias), 1)
+        self.assertEqual(sum(sql.startswith('SELECT "horario_horario"."dia"') for sql in sentencias), 1)
+        
+        self.assertEqual(len(resultado['creados']), 13)
+        self.assertEqual(resultado['existentes'], [self.desde])
+        self.assertEqual(Horario.objects.get(cancha=self.cancha, dia=self.desde).hora_inicio, time(10, 0))
+        sabado = Horario.objects.get(cancha=self.cancha, dia=self.desde + timedelta(days=5))
+        self.assertEqual((sabado.hora_inicio, sabado.hora_fin), (time(8, 0), time(23, 59)))
+    
+    def test_bloques_invalidos(self):
+        """Verifica que se rechazan días repetidos y horas invertidas"""
+        self.assertIsNotNone(horario_semanal([{'dias': [0], 'hora_inicio': '10:00', 'hora_fin': '09:00'}])[1])
+        self.assertIsNotNone(horario_semanal([
+            {'dias': [0, 1], 'hora_inicio': '10:00', 'hora_fin': '12:00'},
+            {'dias': [1], 'hora_inicio': '14:00', 'hora_fin': '16:00'},
+        ])[1])
+    
+    def test_api_lote(self):
+        """Verifica la creación por lote desde la API"""
+        self.client.force_login(self.usuario)
+        respuesta = self.client.post('/horario/api/horarios/lote/', {
+            'cancha': self.cancha.id,
+            'desde': self.desde.isoformat(),
+            'hasta': self.hasta.isoformat(),
+            'bloques': [{'dias': [5, 6], 'hora_inicio': '08:00', 'hora_fin': '12:00'}],
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(len(respuesta.json()['creados']), 4)
+        self.assertEqual(Horario.objects.filter(cancha=self.cancha).count(), 4)
+    
+    def test_plantilla_no_se_guarda_si_falla(self):
+        """Verifica que la plantilla de guardar_como no se guarda ni se modifica si la publicación falla"""
+        self.client.force_login(self.usuario)
+        url = f'/cancha/publicar-horarios/{self.cancha.id}/{self.cancha.slug}/'
+        datos = {'desde': self.desde.isoformat(), 'hasta': self.hasta.isoformat(), 'guardar_como': 'Semana',
+                 'hora_inicio_0': '08:00', 'hora_fin_0': '12:00'}
+        error = ValidationError("Otro horario se creó en el rango durante la publicación. Intente nuevamente.")
+        with mock.patch('apps.cancha.views.publicar_horarios_rango', side_effect=error):
+            self.client.post(url, datos)
+        self.assertFalse(PlantillaHorario.objects.filter(cancha=self.cancha).exists())
+        
+        self.client.post(url, datos)
+        plantilla = PlantillaHorario.objects.get(cancha=self.cancha, nombre='Semana')
+        with mock.patch('apps.cancha.views.publicar_horarios_rango', side_effect=error):
+            self.client.post(url, {**datos, 'hora_inicio_1': '09:00', 'hora_fin_1': '10:00'})
+        self.assertEqual(list(plantilla.dias.values_list('dia_semana', flat=True)), [0])
+
+
+class EditarHorariosTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.usuario.refresh_from_db()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horarios = [HorarioFactory(cancha=self.cancha) for _ in range(7)]
+        self.desde, self.hasta = self.horarios[0].dia, self.horarios[-1].dia
+    
+    def test_rango_con_dias_semana(self):
+        """Verifica que solo se modifican los días de la semana indicados con un único UPDATE"""
+        sabado = (5 - self.desde.weekday()) % 7
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = editar_horarios(self.cancha.id, self.desde, self.hasta, time(10, 0), time(20, 0), dias_semana=[5])
+        self.assertEqual(resultado, {'actualizados': 1, 'conflictos': []})
+        updates = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE "horario_horario" SET "hora_inicio"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Horario.objects.filter(cancha=self.cancha, hora_inicio=time(10, 0)).get().dia, self.horarios[sabado].dia)
+    
+    def test_conflictos(self):
+        """Verifica que una reserva fuera del nuevo rango impide todos los cambios y se informa"""
+        reserva = ReservaFactory(usuario=self.usuario, horario=self.horarios[3])
+        resultado = editar_horarios(self.cancha.id, self.desde, self.hasta, time(8, 0), time(18, 0))
+        self.assertEqual(resultado['actualizados'], 0)
+        self.assertEqual([c['reserva'] for c in resultado['conflictos']], [reserva.id])
+        self.assertEqual(resultado['conflictos'][0]['dia'], self.horarios[3].dia)
+        self.assertFalse(Horario.objects.filter(hora_fin=time(18, 0)).exists())
+        
+        self.client.force_login(self.usuario)
+        respuesta = self.client.post('/horario/api/horarios/editar/', {
+            'cancha': self.cancha.id, 'desde': self.desde.isoformat(), 'hasta': self.hasta.isoformat(),
+            'hora_inicio': '08:00', 'hora_fin': '18:00',
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['conflictos'][0]['reserva'], reserva.id)
\ No newline at end of file
@@ -0,0 +1,123 @@
+from datetime import date, time, timedelta
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Group
+from apps.horario.models import Horario
+from apps.reserva.models import Reserva, ReservaRecurrente
+from apps.reserva.recurrentes import materializar
+from apps.reserva.servicio import crear_reserva, crear_reservas
+from tests.factories import UsuarioFactory, CanchaFactory, HorarioFactory
+
+
+class CrearReservaTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horario = HorarioFactory(cancha=self.cancha)
+    
+    def test_reserva_y_conflicto(self):
+        """Verifica que el servicio crea la reserva y rechaza una solapada"""
+        crear_reserva(self.usuario, self.horario.id, '18:00', '20:00')
+        with self.assertRaises(ValidationError):
+            crear_reserva(self.usuario, self.horario.id, time(19, 0), time(21, 0))
+        crear_reserva(self.usuario, self.horario.id, time(20, 0), time(21, 0))
+        self.assertEqual(Reserva.objects.count(), 2)
+    
+    def test_restriccion_de_base(self):
+        """Verifica que la base rechaza reservas solapadas aunque se omita la validación"""
+        crear_reserva(self.usuario, self.horario.id, time(18, 0), time(20, 0))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reserva.objects.bulk_create([
+                Reserva(usuario=self.usuario, horario=self.horario, hora_reserva_inicio=time(19, 0), hora_reserva_fin=time(19, 30))
+            ])
+        self.assertEqual(Reserva.objects.count(), 1)
+
+
+class CrearReservasTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.horarios = [HorarioFactory(cancha=self.cancha) for _ in range(3)]
+        crear_reserva(self.usuario, self.horarios[0].id, time(18, 0), time(19, 0))
+    
+    def items(self):
+        return [
+            {'horario': self.horarios[0].id, 'hora_reserva_inicio': '19:00', 'hora_reserva_fin': '20:00'},
+            {'horario': self.horarios[1].id, 'hora_reserva_inicio': '19:00', 'hora_reserva_fin': '20:00'},
+            {'horario': self.horarios[0].id, 'hora_reserva_inicio': '18:30', 'hora_reserva_fin': '19:30'},
+            {'horario': self.horarios[2].id, 'hora_reserva_inicio': '23:00', 'hora_reserva_fin': '23:59'},
+        ]
+    
+    def test_todo_o_nada(self):
+        """Verifica que en modo atómico un item en conflicto impide crear los demás"""
+        creadas, errores = crear_reservas(self.usuario, self.items())
+        self.assertEqual(creadas, [])
+        self.assertEqual([error['item'] for error in errores], [2, 3])
+        self.assertEqual(Reserva.objects.count(), 1)
+    
+    def test_por_item(self):
+        """Verifica que en modo parcial se crean los items válidos con un solo INSERT"""
+        with CaptureQueriesContext(connection) as consultas:
+            creadas, errores = crear_reservas(self.usuario, self.items(), atomico=False)
+        inserts = [consulta for consulta in consultas if consulta['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(creadas), 2)
+        self.assertEqual([error['item'] for error in errores], [2, 3])
+        self.assertEqual(Reserva.objects.count(), 3)
+
+
+class ReservaRecurrenteTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.hoy = date(2030, 1, 7)  # Lunes
+        for semana in range(6):
+            HorarioFactory(cancha=self.cancha, dia=self.hoy + timedelta(days=7 * semana + 1))
+        self.recurrente = ReservaRecurrente.objects.create(
+            usuario=self.usuario, cancha=self.cancha, dia_semana=1,
+            hora_inicio=time(18, 0), hora_fin=time(19, 0),
+            fecha_inicio=self.hoy, fecha_fin=self.hoy + timedelta(days=60)
+        )
+    
+    def test_materializar_ventana(self):
+        """Verifica que se generan los martes de la ventana, omitiendo excepciones y conflictos"""
+        martes = [self.hoy + timedelta(days=7 * semana + 1) for semana in range(4)]
+        self.recurrente.excepciones.create(dia=martes[1])
+        otro = UsuarioFactory(email="otro@test.com")
+        crear_reserva(otro, self.cancha.horarios.get(dia=martes[2]).id, time(18, 30), time(19, 30))
+        
+        resultado = materializar(self.recurrente, ventana_dias=27, hoy=self.hoy)
+        self.assertEqual([r.horario.dia for r in resultado['creadas']], [martes[0], martes[3]])
+        self.assertEqual([dia for dia, _ in resultado['omitidas']], [martes[2]])
+        self.assertEqual(self.recurrente.reservas.count(), 2)
+        
+        # La marca se queda antes del conflicto: la siguiente ejecución lo reintenta sin repetir las creadas
+        self.recurrente.refresh_from_db()
+        self.assertEqual(self.recurrente.materializada_hasta, martes[2] - timedelta(days=1))
+        resultado = materializar(self.recurrente, ventana_dias=35, hoy=self.hoy)
+        self.assertEqual([r.horario.dia for r in resultado['creadas']], [self.hoy + timedelta(days=29)])
+        self.assertEqual([dia for dia, _ in resultado['omitidas']], [martes[2]])
+        self.assertEqual(self.recurrente.reservas.count(), 3)
+    
+    def test_horario_publicado_despues(self):
+        """Verifica que las fechas sin horario se generan cuando el responsable publica el horario más tarde"""
+        tercer_martes = self.hoy + timedelta(days=15)
+        Horario.objects.filter(cancha=self.cancha, dia=tercer_martes).delete()
+        resultado = materializar(self.recurrente, ventana_dias=27, hoy=self.hoy)
+        self.assertEqual(len(resultado['creadas']), 3)
+        self.assertEqual(self.recurrente.materializada_hasta, tercer_martes - timedelta(days=1))
+        
+        HorarioFactory(cancha=self.cancha, dia=tercer_martes)
+        resultado = materializar(self.recurrente, ventana_dias=27, hoy=self.hoy)
+        self.assertEqual([r.horario.dia for r in resultado['creadas']], [tercer_martes])
+        self.assertEqual(resultado['omitidas'], [])
+        self.assertEqual(self.recurrente.materializada_hasta, self.hoy + timedelta(days=27))
+        self.assertEqual(self.recurrente.reservas.count(), 4)
\ No newline at end of file
@@ -0,0 +1,110 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Group
+from apps.cancha.models import Cancha
+from apps.cancha.serializer import CanchaSerializer
+from apps.reseña.calificaciones import recalcular_calificaciones
+from apps.reseña.models import Reseña
+from apps.reseña.paginacion import pagina_reseñas
+from tests.factories import UsuarioFactory, CanchaFactory, ReseñaFactory
+
+
+class CalificacionesCanchaTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.otros = [UsuarioFactory(email=f"otro{i}@test.com") for i in range(2)]
+    
+    def agregados(self):
+        cancha = Cancha.objects.get(pk=self.cancha.pk)
+        return cancha.cantidad_calificaciones, cancha.suma_calificaciones, cancha.calificacion
+    
+    def test_crear_editar_eliminar(self):
+        """Verifica que los agregados de la cancha siguen las altas, ediciones y bajas de reseñas"""
+        reseña = ReseñaFactory(usuario=self.otros[0], cancha=self.cancha, calificacion=5)
+        ReseñaFactory(usuario=self.otros[1], cancha=self.cancha, calificacion=2)
+        self.assertEqual(self.agregados(), (2, 7, 3.5))
+        # Guardar una instancia desactualizada de la cancha no pisa los agregados
+        self.cancha.nombre = "Cancha renombrada"
+        self.cancha.save()
+        self.assertEqual(self.agregados(), (2, 7, 3.5))
+        
+        reseña.calificacion = 3
+        reseña.save()
+        self.assertEqual(self.agregados(), (2, 5, 2.5))
+        
+        reseña.delete()
+        self.assertEqual(self.agregados(), (1, 2, 2.0))
+        Reseña.objects.all().delete()
+        self.assertEqual(self.agregados(), (0, 0, None))
+    
+    def test_histograma(self):
+        """Verifica el histograma en el serializer y que el inicio no consulta las reseñas"""
+        reseña = ReseñaFactory(usuario=self.otros[0], cancha=self.cancha, calificacion=5)
+        ReseñaFactory(usuario=self.otros[1], cancha=self.cancha, calificacion=1)
+        reseña.calificacion = 4
+        reseña.save()
+        datos = CanchaSerializer(Cancha.objects.get(pk=self.cancha.pk)).data
+        self.assertEqual(datos['cantidad_calificaciones'], 2)
+        self.assertEqual(datos['calificacion'], 2.5)
+        self.assertEqual([fila['cantidad'] for fila in datos['histograma_calificaciones']], [0, 1, 0, 0, 1])
+        
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get('/')
+        self.assertContains(respuesta, 'progress-bar')
+        self.assertFalse(any('reseña_reseña' in consulta['sql'] for consulta in consultas.captured_queries))
+    
+    def test_recalcular(self):
+        """Verifica que el recálculo corrige agregados desincronizados con un GROUP BY"""
+        ReseñaFactory(usuario=self.otros[0], cancha=self.cancha, calificacion=4)
+        Cancha.objects.filter(pk=self.cancha.pk).update(cantidad_calificaciones=9, suma_calificaciones=1, estrellas_2=3)
+        with self.assertNumQueries(3):
+            self.assertEqual(recalcular_calificaciones(), 1)
+        self.assertEqual(self.agregados(), (1, 4, 4.0))
+        self.assertEqual([fila['cantidad'] for fila in Cancha.objects.get(pk=self.cancha.pk).histograma_calificaciones], [0, 1, 0, 0, 0])
+        self.assertEqual(recalcular_calificaciones(), 0)
+
+
+class PaginacionReseñasTest(TestCase):
+    def setUp(self):
+        Group.objects.create(name="Cliente")
+        Group.objects.create(name="Responsable")
+        self.usuario = UsuarioFactory()
+        self.usuario.refresh_from_db()
+        self.cancha = CanchaFactory(responsable=self.usuario)
+        self.reseñas = [
+            ReseñaFactory(usuario=UsuarioFactory(email=f"cliente{i}@test.com"), cancha=self.cancha, calificacion=i % 5 + 1)
+            for i in range(12)
+        ]
+        # Fechas repetidas para verificar el desempate por id
+        Reseña.objects.update(fecha_creacion=self.reseñas[0].fecha_creacion)
+    
+    def test_recorrer_paginas(self):
+        """Verifica que el cursor recorre todas las reseñas sin repetir, con una consulta por página"""
+        vistas, cursor = [], None
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                pagina, cursor = pagina_reseñas(self.cancha.id, cursor, tamaño=5)
+                [reseña.usuario.email for reseña in pagina]
+            vistas += [reseña.id for reseña in pagina]
+        self.assertIsNone(cursor)
+        self.assertEqual(vistas, sorted((reseña.id for reseña in self.reseñas), reverse=True))
+    
+    def test_api_y_mas_reseñas(self):
+        """Verifica la paginación de la API y del endpoint de carga incremental"""
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get('/reseña/api/reseñas/', {'cancha': self.cancha.id}).json()
+        self.assertEqual(len(respuesta['resultados']), 10)
+        respuesta = self.client.get('/reseña/api/reseñas/', {'cancha': self.cancha.id, 'cursor': respuesta['siguiente']}).json()
+        self.assertEqual([r['id'] for r in respuesta['resultados']], [self.reseñas[1].id, self.reseñas[0].id])
+        self.assertIsNone(respuesta['siguiente'])
+        self.assertEqual(self.client.get('/reseña/api/reseñas/', {'cursor': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/reseña/api/reseñas/', {'cancha': 'abc'}).status_code, 400)
+        
+        _, cursor = pagina_reseñas(self.cancha.id, tamaño=5)
+        respuesta = self.client.get(f'/reseña/mas-reseñas/{self.cancha.id}/', {'cursor': cursor}).json()
+        self.assertEqual(respuesta['html'].count('list-group-item'), 7)
+        self.assertIsNone(respuesta['siguiente'])
\ No newline at end of file
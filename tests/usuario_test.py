@@ -1,4 +1,18 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+from pathlib import Path
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.db.models.signals import m2m_changed
+from apps.comun import cache_versiones
+from apps.usuario.grupos import ESPACIO_CACHE, GRUPO_CLIENTE, GRUPO_RESPONSABLE, INTERVALO_VERSION, _registro, grupo, olvidar_grupos, transferir_grupo
+from apps.usuario.management.commands.generar_usuario_slugs import RellenoSlugsUsuario
+from apps.usuario.management.relleno import Relleno
+from apps.usuario.models import Usuario, anotar_roles
 from tests.factories import UsuarioFactory
 
 
@@ -15,10 +29,139 @@ class UsuarioModelTest(TestCase):
         """Verifica que el slug se genera correctamente"""
         self.assertEqual(self.usuario.slug, "test-user")
     
+    def test_slug_al_cambiar_apellidos(self):
+        """Verifica que el slug se regenera al cambiar solo los apellidos y se escribe con ellos"""
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        usuario.apellidos = "Pérez"
+        usuario.save()
+        self.assertEqual(Usuario.objects.get(pk=usuario.pk).slug, "test-perez")
+    
     def test_usuario_grupo_cliente(self):
         """Verifica que el usuario pertenece al grupo 'Cliente' por defecto"""
         self.assertTrue(self.usuario.groups.filter(name="Cliente").exists())
     
     def test_usuario_grupo_administrador(self):
         """Verifica que el usuario pertenece al grupo 'Administrador' por defecto"""
-        self.assertFalse(self.usuario.groups.filter(name="Administrador").exists())
\ No newline at end of file
+        self.assertFalse(self.usuario.groups.filter(name="Administrador").exists())
+    
+    def test_roles_en_una_consulta(self):
+        """Verifica que el rol se resuelve con una consulta y se actualiza al cambiar los grupos"""
+        with self.assertNumQueries(1):
+            self.assertFalse(self.usuario.is_responsible)
+            self.assertFalse(self.usuario.is_responsible)
+        responsable, _ = Group.objects.get_or_create(name="Responsable")
+        self.usuario.groups.add(responsable)
+        self.assertTrue(self.usuario.is_responsible)
+    
+    def test_roles_anotados(self):
+        """Verifica que anotar_roles resuelve el rol de cada usuario sin consultas por fila"""
+        responsable, _ = Group.objects.get_or_create(name="Responsable")
+        otro = UsuarioFactory(email="otro@test.com")
+        otro.groups.add(responsable)
+        with self.assertNumQueries(1):
+            roles = {usuario.email: usuario.is_responsible for usuario in anotar_roles(Usuario.objects.all())}
+        self.assertEqual(roles, {"user@test.com": False, "otro@test.com": True})
+
+
+class RegistroGruposTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        olvidar_grupos()
+    
+    def test_grupo_una_consulta_por_proceso(self):
+        """Verifica que un grupo confirmado se resuelve sin consultas y se olvida al renombrarlo"""
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente = grupo(GRUPO_CLIENTE)
+        with self.assertNumQueries(0):
+            self.assertEqual(grupo(GRUPO_CLIENTE), cliente)
+        cliente.name = "Clientes"
+        cliente.save()
+        self.assertNotEqual(grupo(GRUPO_CLIENTE).pk, cliente.pk)
+    
+    def test_grupo_invalidado_por_otro_proceso(self):
+        """Verifica que el grupo recordado se vuelve a consultar cuando otro proceso incrementa la versión del registro"""
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente = grupo(GRUPO_CLIENTE)
+        # Un update() no emite señales; otro proceso lo anuncia con olvidar_grupos() y solo cambia la cache
+        Group.objects.filter(pk=cliente.pk).update(name="Clientes")
+        cache_versiones.incrementar_version(ESPACIO_CACHE, 'registro')
+        # Dentro del intervalo no se consulta ni la base ni la cache
+        with self.assertNumQueries(0), mock.patch.object(cache_versiones, 'version') as version:
+            self.assertEqual(grupo(GRUPO_CLIENTE), cliente)
+        version.assert_not_called()
+        _registro['comprobado'] -= INTERVALO_VERSION + 1
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = grupo(GRUPO_CLIENTE)
+        self.assertNotEqual(nuevo.pk, cliente.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(grupo(GRUPO_CLIENTE), nuevo)
+    
+    def test_transferir_grupo_en_bloque(self):
+        """Verifica que el cambio de grupo usa las mismas consultas y una señal por grupo con 2 o con 8 usuarios"""
+        cliente, responsable = grupo(GRUPO_CLIENTE), grupo(GRUPO_RESPONSABLE)
+        usuarios = [UsuarioFactory(email=f"u{i}@test.com") for i in range(8)]
+        señales = []
+        receptor = lambda sender, action, **kwargs: señales.append(action)
+        m2m_changed.connect(receptor, sender=Usuario.groups.through)
+        self.addCleanup(m2m_changed.disconnect, receptor, sender=Usuario.groups.through)
+        with self.assertNumQueries(6):
+            transferir_grupo(Usuario.objects.filter(pk__in=[u.pk for u in usuarios[:2]]), cliente, responsable)
+        with self.assertNumQueries(6):
+            self.assertEqual(transferir_grupo(Usuario.objects.all(), cliente, responsable), 6)
+        self.assertEqual(Usuario.objects.filter(groups=responsable).count(), 8)
+        self.assertFalse(Usuario.objects.filter(groups=cliente).exists())
+        self.assertEqual(señales, ['pre_remove', 'post_remove', 'pre_add', 'post_add'] * 2)
+    
+    def test_transferir_grupo_pk_set(self):
+        """Verifica que las señales llevan solo los usuarios que cambian y no se emiten si nadie cambia"""
+        cliente, responsable = grupo(GRUPO_CLIENTE), grupo(GRUPO_RESPONSABLE)
+        usuarios = [UsuarioFactory(email=f"u{i}@test.com") for i in range(3)]
+        usuarios[0].groups.add(responsable)
+        usuarios[1].groups.remove(cliente)
+        señales = []
+        receptor = lambda sender, action, pk_set, **kwargs: señales.append((action, pk_set))
+        m2m_changed.connect(receptor, sender=Usuario.groups.through)
+        self.addCleanup(m2m_changed.disconnect, receptor, sender=Usuario.groups.through)
+        self.assertEqual(transferir_grupo(Usuario.objects.all(), cliente, responsable), 3)
+        quitar, agregar = {usuarios[0].pk, usuarios[2].pk}, {usuarios[1].pk, usuarios[2].pk}
+        self.assertEqual(señales, [('pre_remove', quitar), ('post_remove', quitar), ('pre_add', agregar), ('post_add', agregar)])
+        señales.clear()
+        self.assertEqual(transferir_grupo(Usuario.objects.all(), cliente, responsable), 0)
+        self.assertEqual(señales, [])
+
+
+class RellenoSlugsTest(TestCase):
+    def setUp(self):
+        self.usuarios = [UsuarioFactory(email=f"u{i}@test.com", nombre=f"Nombre{i}") for i in range(5)]
+        Usuario.objects.update(slug='')
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.carpeta.cleanup)
+    
+    def test_generar_slugs_por_ventanas(self):
+        """Verifica que el comando genera los slugs por ventanas y borra el punto de control al terminar"""
+        salida = StringIO()
+        call_command('generar_usuario_slugs', ventana=2, carpeta=self.carpeta.name, stdout=salida)
+        self.assertEqual(sorted(Usuario.objects.values_list('slug', flat=True)), [f"nombre{i}-user" for i in range(5)])
+        self.assertIn("5 filas procesadas", salida.getvalue())
+        self.assertIn("filas/s", salida.getvalue())
+        self.assertFalse(any(Path(self.carpeta.name).iterdir()))
+    
+    def test_reanudar_desde_punto_control(self):
+        """Verifica que una ejecución interrumpida continúa después del último pk confirmado"""
+        ruta = Path(self.carpeta.name) / f"{RellenoSlugsUsuario.nombre}.json"
+        ruta.write_text(json.dumps({'ultimo_pk': self.usuarios[2].pk, 'procesadas': 3, 'actualizadas': 3}))
+        resultado = RellenoSlugsUsuario(ventana=2, carpeta=self.carpeta.name, informar=lambda mensaje: None).ejecutar()
+        self.assertEqual(resultado['procesadas'], 5)
+        self.assertEqual(Usuario.objects.exclude(slug='').count(), 2)
+    
+    def test_relleno_incompleto(self):
+        """Verifica que un relleno sin procesar() falla al instanciarlo y no a mitad de la ejecución"""
+        class RellenoIncompleto(Relleno):
+            nombre = 'incompleto'
+            
+            def consulta(self):
+                return Usuario.objects.all()
+        
+        with self.assertRaises(TypeError):
+            RellenoIncompleto(carpeta=self.carpeta.name)
+